@@ -41,9 +41,9 @@ def upload_excel():
         file.save(temp_path)
 
         # Now pass it to your handler (which must use 'with pd.ExcelFile'!)
-        insert_excel_data_to_db(temp_path, cohort)
+        import_report = insert_excel_data_to_db(temp_path, cohort)
 
-        return jsonify({"message": "File processed and data inserted"}), 200
+        return jsonify({"message": "File processed and data inserted", "import_report": import_report}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
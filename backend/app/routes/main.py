@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
+import math
 import os
 import uuid
 import torch
@@ -10,9 +11,6 @@ from collections import defaultdict
 # Database and ML imports
 from db.db_manager import get_db
 from db.db_usage import (
-    get_academic_constraint,
-    get_attendance_constraint,
-    get_effort_constraint,
     get_latest_allocations_from_db,
     update_classroom_allocations,
     drop_allocations_table,
@@ -21,38 +19,71 @@ from db.db_usage import (
     save_allocations_to_db,
     generate_run_number,
     fetch_student_dict_from_id,
-    get_academic_constraint,
     classroom_update,
     compute_classroom_avg_performance
 )
 
 # ML pipeline imports
-from ml.build_graph_from_db import build_graph_from_db
+from ml.graph_snapshot import get_graph_snapshot_cache, load_cohort_graph, load_social_graph
 from ml.cluster_with_gnn_with_constraints import cluster_students_with_gnn, cluster_students_with_gnn_with_user_input
 from ml.export_clusters import export_clusters
+from ml.solver_profiles import get_solver_profile
+from ml.local_search import refine_allocation_result
+from ml.model_cache import get_model_cache
 from ml.fetch_student_name_from_id import fetch_student_name_from_id
 from ml.preserved_relationship import compute_preserved_relationships, save_edge_relationships_db
 
 # Model 2 imports
-from ml.model_2.construct_graph import construct_graph
 from ml.model_2.graph_conversion import preprocessing
 from ml.model_2.model2 import generate_embeddings
-from ml.model_2.allocation import allocate_students
+from ml.model_2.allocation import allocate_students, average_metrics_per_classroom
+from ml.model_2.participant_attributes import PARTICIPANT_METRICS, load_participant_attributes
 from ml.model_2.convert_data_into_graph_cluster import convert_data_in_graph_cluster
 from ml.model_2.random_allocator import random_classroom_allocator
 from ml.model_2.graph_splitting import attach_names_to_graph, get_split_graphs
 from ml.model_2.utils import relationship_counts_per_class
 
+# Analytics materialised per run
+from backend.classforge_project.data_analysis.run_summaries import materialise_run_summaries
+
 pipeline_bp = Blueprint("pipeline", __name__)
 main_bp = Blueprint("main_bp", __name__)
 
+
+def parse_refine_seconds(value):
+    """
+    Local-search time budget from the refine_seconds query parameter; missing
+    or 0 skips the refinement.
+
+    Raises:
+        ValueError: If the value is not a finite, non-negative number.
+    """
+    try:
+        seconds = float(value or 0)
+    except ValueError:
+        seconds = math.nan
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f"refine_seconds must be a non-negative number of seconds, got '{value}'")
+    return seconds
+
+
 @pipeline_bp.route("/get_allocation", methods=['GET'])
 def run_samsun_model_pipeline():
     db = get_db()
     classroom_count = int(request.args.get('classroom_count', 4))
-    graph = build_graph_from_db(db, 2025)
+    warm_start = request.args.get('warm_start', 'true').lower() != 'false'
+    try:
+        refine_seconds = parse_refine_seconds(request.args.get('refine_seconds'))
+        solver_profile = get_solver_profile(request.args.get('solver_profile'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    graph = load_cohort_graph(db, 2025)
     participant_ids = [pid.item() if isinstance(pid, torch.Tensor) else pid for pid in graph.participant_ids]
-    clustered_data, graph = cluster_students_with_gnn(graph, classroom_count)
+    previous_allocations = get_latest_allocations_from_db(db)["Allocations"] if warm_start else None
+    clustered_data, graph = cluster_students_with_gnn(
+        graph, classroom_count, warm_start=warm_start, previous_allocations=previous_allocations,
+        solver_profile=solver_profile, refine_seconds=refine_seconds
+    )
     json_data = export_clusters(clustered_data)
     full_json_dict = fetch_student_dict_from_id(db, json_data)
     compute_preserved_relationships(db, clustered_data, full_json_dict["Run_Number"])
@@ -66,6 +97,8 @@ def run_samsun_model_pipeline():
     }
 
     full_json_dict["AveragePerformance"] = avg_performance
+    full_json_dict["SolverStats"] = clustered_data.solver_stats
+    full_json_dict["SummaryStats"] = materialise_run_summaries(db, full_json_dict["Run_Number"], 2025)
     return jsonify(full_json_dict)
 
 @pipeline_bp.route("/get_allocation_by_user_preference", methods=['POST'])
@@ -76,9 +109,20 @@ def get_allocation_by_user_preference_model1():
     cohort = int(request.args.get("cohort", 2025))
     data = request.get_json() or {}
     relationship_weights = data.get("relationship_weights", {})
-    graph = build_graph_from_db(db, cohort)
+    warm_start = request.args.get('warm_start', 'true').lower() != 'false'
+    try:
+        refine_seconds = parse_refine_seconds(request.args.get('refine_seconds'))
+        solver_profile = get_solver_profile(request.args.get('solver_profile'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    graph = load_cohort_graph(db, cohort)
     participant_ids = [pid.item() if isinstance(pid, torch.Tensor) else pid for pid in graph.participant_ids]
-    clustered_data, graph = cluster_students_with_gnn_with_user_input(graph, classroom_count, relationship_weights)
+    previous_allocations = get_latest_allocations_from_db(db)["Allocations"] if warm_start else None
+    clustered_data, graph = cluster_students_with_gnn_with_user_input(
+        graph, classroom_count, relationship_weights,
+        warm_start=warm_start, previous_allocations=previous_allocations,
+        solver_profile=solver_profile, refine_seconds=refine_seconds
+    )
     json_data = export_clusters(clustered_data)
     full_json_dict = fetch_student_dict_from_id(db, json_data)
     compute_preserved_relationships(db, clustered_data, full_json_dict["Run_Number"])
@@ -91,13 +135,15 @@ def get_allocation_by_user_preference_model1():
         "perc_effort": dict(zip(avg_performance["classroom_id"], avg_performance["avg_perc_effort"])),
     }
     full_json_dict["AveragePerformance"] = avg_performance
+    full_json_dict["SolverStats"] = clustered_data.solver_stats
+    full_json_dict["SummaryStats"] = materialise_run_summaries(db, full_json_dict["Run_Number"], cohort)
     return jsonify(full_json_dict)
 
 @pipeline_bp.route("/cytoscape_subgraphs", methods=['GET'])
 @cross_origin(origin='http://localhost:3000')
 def cytoscape_subgraphs():
     db = get_db()
-    graph = construct_graph(db)
+    graph = load_social_graph(db)
     allocations = get_latest_allocations_from_db(db)
     data = get_split_graphs(graph, allocations)
     return jsonify(data)
@@ -147,45 +193,49 @@ def run_model2_route():
     num_allocations = int(request.args.get('classroomCount', 4))  # default to 4
     cohort = request.args.get('cohort', 2025)                     # default to 2025
     option = request.args.get('option', 'perc_academic')          # default to academic constraint
+    try:
+        refine_seconds = parse_refine_seconds(request.args.get('refine_seconds'))  # default: no local-search refinement
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     # Step 1: Prepare graph + embeddings
     db = get_db()
-    graph = construct_graph(db, cohort=cohort)
+    graph = load_social_graph(db, cohort=cohort)
     pyg_data = preprocessing(graph)
     pyg_data = generate_embeddings(pyg_data)
-    academic_map = get_academic_constraint(db)
-    effort_map = get_effort_constraint(db)
-    attendance_map = get_attendance_constraint(db)
 
     # Choose main constraint for optimization
-    if option == "perc_academic":
-        main_constraint = academic_map
-    elif option == "perc_effort":
-        main_constraint = effort_map
-    elif option == "perc_attendance":
-        main_constraint = attendance_map
-    else:
+    if option not in PARTICIPANT_METRICS:
         return jsonify({"error": f"Unknown option '{option}'"}), 400
 
+    # All metrics in one query: the cohort plus graph nodes from other cohorts
+    attributes = load_participant_attributes(db, cohort=cohort, participant_ids=pyg_data.student_ids)
     allocation_result = allocate_students(
         data=pyg_data,
         num_allocations=num_allocations,
         db=db,
-        constraint_map=main_constraint,
-        all_constraints={
-            "perc_academic": academic_map,
-            "perc_effort": effort_map,
-            "perc_attendance": attendance_map,
-        }
+        attributes=attributes,
+        constraint=option
     )
 
+    # Step 3: Optionally improve the relationship objective with local search
+    local_search_stats = None
+    if refine_seconds > 0:
+        local_search_stats = refine_allocation_result(allocation_result, pyg_data, time_budget=refine_seconds)
+        allocation_result["AveragePerformance"] = average_metrics_per_classroom(
+            allocation_result["Allocations"], attributes
+        )
+
 
     # Step 4: Post-process
     full_json_dict = fetch_student_dict_from_id(db, allocation_result)
     convert_data_in_graph_cluster(allocation_result, pyg_data, graph, db, full_json_dict["Run_Number"])
+    full_json_dict["SummaryStats"] = materialise_run_summaries(db, full_json_dict["Run_Number"], cohort)
 
     # Merge the average scores into the final result
     full_json_dict["AveragePerformance"] = allocation_result.get("AveragePerformance", {})
+    if local_search_stats is not None:
+        full_json_dict["LocalSearchStats"] = local_search_stats
     return jsonify(full_json_dict)
 
 @pipeline_bp.route("/random_allocation", methods=['GET'])
@@ -203,6 +253,22 @@ def run_random_allocation():
     full_json_dict = fetch_student_dict_from_id(db, allocation_data)
     return jsonify(full_json_dict)
 
+@main_bp.route("/model-cache-stats", methods=["GET"])
+def model_cache_stats():
+    """Hit/miss counters of the trained GNN cache used by the allocation routes."""
+    return jsonify(get_model_cache().stats())
+
+@main_bp.route("/graph-snapshot-stats", methods=["GET"])
+def graph_snapshot_stats():
+    """Hit/miss counters of the cohort graph snapshots shared by the pipeline routes."""
+    return jsonify(get_graph_snapshot_cache().stats())
+
+@main_bp.route("/db-pool-stats", methods=["GET"])
+def db_pool_stats():
+    """Pool checkout/wait counters and the connections opened per request."""
+    db = get_db()
+    return jsonify({**db.pool_stats(), "requests": db.request_stats()})
+
 @main_bp.route("/allocation-runs", methods=["GET"])
 def get_allocation_runs():
     runs_path = os.path.join("SchoolData")
@@ -299,7 +365,7 @@ def reallocate_student():
     new_run_number = save_allocations_to_db(db, json_data)
     db= get_db()
     # 6. Rebuild preserved relationships and edges
-    graph = build_graph_from_db(db, cohort=2025)  # or make cohort dynamic
+    graph = load_cohort_graph(db, cohort=2025)  # or make cohort dynamic
     clustered_data = Data(
         x=graph.x,
         edge_index=graph.edge_index,
@@ -311,6 +377,7 @@ def reallocate_student():
 
     compute_preserved_relationships(db, clustered_data, new_run_number)
     save_edge_relationships_db(db, clustered_data, new_run_number, clustered_data.participant_ids)
+    materialise_run_summaries(db, new_run_number, 2025)
 
     return jsonify({
         "message": "Reallocation successful",
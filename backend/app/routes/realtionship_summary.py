@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
-from db.db_usage import get_relationship_summary_by_run
+from backend.classforge_project.data_analysis.run_summaries import compute_run_summary
+from db.db_manager import get_db
+from db.run_summary import cached_run_summary
 
 relationship_bp = Blueprint("relationship_bp", __name__)
 
@@ -11,14 +13,18 @@ def get_relationship_summary():
         return jsonify({"error": "run_number query parameter is required"}), 400
 
     try:
-        df = get_relationship_summary_by_run(run_number)
+        db = get_db()
+        groups = cached_run_summary(
+            db, run_number, "relationship_summary",
+            lambda: compute_run_summary(db, run_number, "relationship_summary"),
+        )
 
-        if df is None or df.empty:
+        if not groups:
             return jsonify({"message": "No data found for this run_number"}), 404
 
         return jsonify({
             "run_number": run_number,
-            "groups": df.to_dict(orient="records")
+            "groups": groups
         })
 
     except Exception as e:
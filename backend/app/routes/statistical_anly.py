@@ -4,7 +4,9 @@ from functools import wraps
 from backend.classforge_project.data_analysis.sna_data_analysis import *
 from backend.classforge_project.data_analysis.sna_relationship_graph import *
 from backend.classforge_project.data_analysis.statistical_analysis import final_calculate_with_normalized_scores
+from backend.classforge_project.data_analysis.run_summaries import compute_run_summary
 from db.db_manager import get_db
+from db.run_summary import cached_run_summary
 
 
 # Create a Blueprint for authentication routess
@@ -16,7 +18,12 @@ def final_calculate_with_normalized_score():
     cohort = request.args.get("cohort", "2025")
     print("---------", run_number)
     try:
-        result = final_calculate_with_normalized_scores(run_number, cohort)
+        db = get_db()
+        result = cached_run_summary(
+            db, run_number, "psychometrics_normalized",
+            lambda: compute_run_summary(db, run_number, "psychometrics_normalized", cohort),
+            cohort=cohort,
+        )
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -4,7 +4,9 @@ from functools import wraps
 from backend.classforge_project.data_analysis.sna_data_analysis import *
 from backend.classforge_project.data_analysis.sna_relationship_graph import *
 from backend.classforge_project.data_analysis.sna_relationship_graph import network_analysis
+from backend.classforge_project.data_analysis.run_summaries import compute_run_summary
 from db.db_manager import get_db
+from db.run_summary import cached_run_summary
 
 
 # Create a Blueprint for authentication routess
@@ -66,7 +68,8 @@ def sna_summary_by_run():
     """
     Analyze SNA metrics per classroom for a given run_number.
     If no run_number is provided, uses the most recent run based on classroom_allocation.created_at.
-    Returns: JSON object with top centrality metrics by classroom.
+    Returns: JSON object with top centrality metrics by classroom, read from
+    the summary materialised when the run was saved.
     """
     db = get_db()
 
@@ -74,8 +77,10 @@ def sna_summary_by_run():
     run_number = request.args.get("run_number")
 
     try:
-
-        sna_per_class = generate_sna_summary_per_classroom(run_number, db)
+        sna_per_class = cached_run_summary(
+            db, run_number, "sna_per_classroom",
+            lambda: compute_run_summary(db, run_number, "sna_per_classroom"),
+        )
         return jsonify(sna_per_class)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,80 @@
+import logging
+import time
+
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+
+from db.db_usage import get_relationship_summary_by_run
+from db.run_summary import save_run_summary
+from ml.model_2.utils import relationship_counts_for_run
+from backend.classforge_project.data_analysis.sna_data_analysis import generate_sna_summary_per_classroom
+from backend.classforge_project.data_analysis.statistical_analysis import final_calculate_with_normalized_scores
+
+logger = logging.getLogger(__name__)
+
+
+def relationship_summary_records(run_number):
+    """Group-level preserved relationship counts of a run; the payload of /relationship-summary."""
+    df = get_relationship_summary_by_run(run_number)
+    if df is None or df.empty:
+        return None
+    return df.to_dict(orient="records")
+
+
+def sna_summary_payload(db, run_number):
+    """Per-classroom centrality summary of a run; the payload of /sna_by_run_number."""
+    result = generate_sna_summary_per_classroom(run_number, db)
+    # Errors come back as (body, status)
+    return result if isinstance(result, list) else None
+
+
+# Summary name -> (payload builder, whether the payload depends on the cohort)
+RUN_SUMMARIES = {
+    "relationship_counts": (lambda db, run_number, cohort: relationship_counts_for_run(db, run_number), False),
+    "relationship_summary": (lambda db, run_number, cohort: relationship_summary_records(run_number), False),
+    "sna_per_classroom": (lambda db, run_number, cohort: sna_summary_payload(db, run_number), False),
+    "psychometrics_normalized": (
+        lambda db, run_number, cohort: final_calculate_with_normalized_scores(run_number, str(cohort)), True
+    ),
+}
+
+
+def compute_run_summary(db, run_number, summary, cohort=None):
+    build, by_cohort = RUN_SUMMARIES[summary]
+    return build(db, run_number, cohort if by_cohort else None)
+
+
+def materialise_run_summaries(db, run_number, cohort="2025"):
+    """
+    Computes the analytics of a freshly saved allocation run once (relationship
+    counts, preservation, psychometric averages and centrality summaries) and
+    stores them in public.run_summary, so the analytics routes only look them
+    up. Must run after the run's classroom_allocation, preserve_edge and
+    edge_relationship rows are written. A summary that fails is logged and
+    left to be computed on its first request.
+
+    Returns:
+        dict: Seconds spent per stored summary.
+    """
+    timings = {}
+    # One transaction for all summaries, with a savepoint per summary: a failed
+    # one is undone without touching the others or the caller's transaction
+    with db.transaction(), db.connection.cursor() as cursor:
+        for summary, (_, by_cohort) in RUN_SUMMARIES.items():
+            start = time.perf_counter()
+            cursor.execute("SAVEPOINT run_summary")
+            try:
+                payload = compute_run_summary(db, run_number, summary, cohort)
+                if payload:
+                    save_run_summary(db, run_number, summary, payload, cohort=str(cohort) if by_cohort else "")
+                # fetch_all/query_df log failed queries instead of raising
+                if db.connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    raise RuntimeError("a query failed")
+            except Exception as e:
+                logger.warning(f"Could not materialise {summary} for run {run_number}: {e}")
+                cursor.execute("ROLLBACK TO SAVEPOINT run_summary")
+                continue
+            cursor.execute("RELEASE SAVEPOINT run_summary")
+            if payload:
+                timings[summary] = round(time.perf_counter() - start, 4)
+    logger.info(f"Materialised run summaries for {run_number}: {timings}")
+    return timings
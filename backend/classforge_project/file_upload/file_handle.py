@@ -1,4 +1,9 @@
 from db.db_manager import get_db
+from ml.embedding_store import bump_raw_data_version
+from ml.graph_snapshot import get_graph_snapshot_cache
+from ml.workbook_reader import read_workbook_sheets
+import io
+import time
 import pandas as pd
 # Extended sheet to table mapping (including all schema entries)
 sheet_table_map = {
@@ -75,46 +80,131 @@ column_renames = {
 edge_columns = ["id", "source", "target"]
 
 
+def prepare_sheet(df, sheet_name, table_name, cohort_value):
+    """
+    Applies the column renames of its table to a parsed workbook sheet.
+    Returns None for sheets without data.
+    """
+    df.columns = df.columns.str.strip()
+
+    if sheet_name in column_renames:
+        df.rename(columns=column_renames[sheet_name], inplace=True)
+    elif sheet_name.startswith("net_") or table_name in ["advice", "feedback", "disrespect", "influential", "friends", "more_time", "net_affiliation_0_school_activity"]:
+        if len(df.columns) == 2:
+            df.columns = ["source", "target"]
+        elif len(df.columns) == 3:
+            df.columns = ["id", "source", "target"]
+
+    if table_name == "participants":
+        df["cohort"] = cohort_value
+
+    df.dropna(how="all", inplace=True)
+    df.columns = [col.lower() for col in df.columns]
+
+    if df.empty:
+        return None
+    return df
+
+
+def integer_columns(cursor, table_name):
+    """Columns of raw.<table_name> declared with an integer type."""
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = 'raw' AND table_name = %s AND data_type IN ('smallint', 'integer', 'bigint');",
+        (table_name,),
+    )
+    return {name for name, in cursor.fetchall()}
+
+
+def frame_to_csv_buffer(df, integer_columns=()):
+    """
+    Serialises a sheet for COPY ... (FORMAT csv): empty fields are NULL, and
+    float columns the table declares as integer (integer columns with blanks,
+    which pandas reads as float) are written without a trailing ".0" so they
+    load. Other columns keep pandas' text, e.g. "85.0" in a text column.
+    """
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if col in integer_columns and pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            df[col] = values.astype("Int64")
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="")
+    buffer.seek(0)
+    return buffer
+
+
+def stage_sheet(cursor, df, table_name):
+    """
+    Streams a sheet into a temporary staging table shaped like its raw table
+    (dropped at commit). Type errors surface here, before raw tables are touched.
+
+    Returns:
+        dict: Rows, seconds and rows per second of the COPY.
+    """
+    columns = list(df.columns)
+    col_str = ", ".join(columns)
+    start = time.perf_counter()
+    cursor.execute(
+        f"CREATE TEMP TABLE staging_{table_name} ON COMMIT DROP AS "
+        f"SELECT {col_str} FROM raw.{table_name} WITH NO DATA;"
+    )
+    buffer = frame_to_csv_buffer(df, integer_columns(cursor, table_name))
+    cursor.copy_expert(f"COPY staging_{table_name} ({col_str}) FROM STDIN WITH (FORMAT csv)", buffer)
+    seconds = time.perf_counter() - start
+    return {"rows": len(df), "seconds": round(seconds, 4), "rows_per_second": round(len(df) / seconds)}
+
+
 def insert_excel_data_to_db(excel_path, cohort_value):
+    """
+    Imports a survey workbook: every sheet is COPY-ed into a staging table,
+    then all staged rows are appended to their raw tables in the same
+    transaction, so the cohort's data becomes visible all at once or not at all.
+
+    Returns:
+        dict | bool: Per-sheet rows/second and total import time, or False if
+        the import failed and nothing was inserted.
+    """
     db = get_db()
-    conn = db.connection  # Get the raw psycopg2 connection
+    start = time.perf_counter()
+    report = {"sheets": {}}
 
     try:
+        # Sheets are parsed in parallel before the transaction is opened
+        sheets, report["parse"] = read_workbook_sheets(excel_path, list(sheet_table_map))
+        print(f"Parsed {len(sheets)} sheets in {report['parse']['total_seconds']} s "
+              f"({report['parse']['engine']}, {report['parse']['workers']} workers)")
+
+        conn = db.connection  # Get the raw psycopg2 connection
         with conn:
             with conn.cursor() as cursor:
-                with pd.ExcelFile(excel_path) as xls:
-                    for sheet_name, table_name in sheet_table_map.items():
-                        print(f"Processing: {sheet_name} → {table_name}")
-                        df = xls.parse(sheet_name)
-                        df.columns = df.columns.str.strip()
-
-                        if sheet_name in column_renames:
-                            df.rename(columns=column_renames[sheet_name], inplace=True)
-                        elif sheet_name.startswith("net_") or table_name in ["advice", "feedback", "disrespect", "influential", "friends", "more_time", "net_affiliation_0_school_activity"]:
-                            if len(df.columns) == 2:
-                                df.columns = ["source", "target"]
-                            elif len(df.columns) == 3:
-                                df.columns = ["id", "source", "target"]
-
-                        if table_name == "participants":
-                            df["cohort"] = cohort_value
-
-                        df.dropna(how="all", inplace=True)
-                        df.columns = [col.lower() for col in df.columns]
-
-                        if df.empty:
-                            print(f"Skipped {sheet_name} — no data")
-                            continue
-
-                        columns = list(df.columns)
-                        data = [tuple(map(lambda x: x.item() if hasattr(x, 'item') else x, row)) for row in df.to_numpy()]
-                        placeholders = ", ".join(["%s"] * len(columns))
-                        col_str = ", ".join(columns)
-                        query = f"INSERT INTO raw.{table_name} ({col_str}) VALUES ({placeholders});"
-
-                        cursor.executemany(query, data)
-                        print(f"Inserted {len(data)} rows into '{table_name}'")
-        return True
+                staged = []
+                for sheet_name, table_name in sheet_table_map.items():
+                    print(f"Processing: {sheet_name} → {table_name}")
+                    df = prepare_sheet(sheets[sheet_name], sheet_name, table_name, cohort_value)
+                    if df is None:
+                        print(f"Skipped {sheet_name} — no data")
+                        continue
+
+                    report["sheets"][sheet_name] = stage_sheet(cursor, df, table_name)
+                    staged.append((table_name, ", ".join(df.columns)))
+                    print(f"Staged {len(df)} rows for '{table_name}' "
+                          f"({report['sheets'][sheet_name]['rows_per_second']} rows/s)")
+
+                # Publish every sheet at once; nothing is visible before the commit
+                for table_name, col_str in staged:
+                    cursor.execute(f"INSERT INTO raw.{table_name} ({col_str}) SELECT {col_str} FROM staging_{table_name};")
+                    print(f"Inserted {cursor.rowcount} rows into '{table_name}'")
+                # Cached embeddings and graphs are keyed by this version
+                bump_raw_data_version(cursor)
+
+        report["total_rows"] = sum(sheet["rows"] for sheet in report["sheets"].values())
+        report["total_seconds"] = round(time.perf_counter() - start, 3)
+        print(f"Imported {report['total_rows']} rows in {report['total_seconds']} s")
+
+        # Cached cohort graphs were built from the old data
+        get_graph_snapshot_cache().invalidate()
+        return report
 
     except Exception as e:
         print(f"Failed to import entire file: {e}")
@@ -70,6 +70,10 @@ def createApp(config_class=Config):
     app.register_blueprint(stats_bp)
     app.register_blueprint(sna_bp)
 
+    # One database connection per request, handed back when the request ends
+    from db.db_manager import init_app as init_db
+    init_db(app)
+
 
 
 
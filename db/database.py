@@ -1,8 +1,14 @@
 import psycopg2
 from psycopg2 import OperationalError, Error
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+import io
 import json
 import pandas as pd
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from threading import Lock
 import os
 
@@ -10,6 +16,24 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pooled mode, enabled by a "pool" section in config.json or CLASSFORGE_DB_POOL=1
+DEFAULT_POOL_CONFIG = {
+    "enabled": False,
+    "minconn": 1,
+    "maxconn": 10,
+    "wait_timeout": 30.0,           # seconds a request waits for a free connection
+    "health_check_interval": 30.0,  # idle seconds after which a connection is pinged before reuse
+}
+
+def _copy_value(value):
+    """Formats a value for COPY's text format: \\N for NULL, backslash escapes for separators."""
+    if value is None:
+        return "\\N"
+    if hasattr(value, "item"):
+        value = value.item()  # NumPy scalars
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
 class Database:
     _instance = None
     _lock = Lock()
@@ -25,9 +49,51 @@ class Database:
         if self._initialized:
             return
         self.config = self.load_config(config_file)
+        self.pool_config = self.load_pool_config(self.config)
+        self.pooled = self.pool_config["enabled"]
+        self._pool = None
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(self.pool_config["maxconn"])
+        self._last_used = {}
+        self._stats_lock = Lock()
+        self._pool_stats = {
+            "checkouts": 0, "waited_checkouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+            "timeouts": 0, "health_checks": 0, "health_check_failures": 0, "in_use": 0,
+        }
+        self._request_stats = {
+            "requests": 0, "connections_opened_total": 0, "connections_opened_max": 0, "connections_opened_last": 0,
+        }
         self.connection = None
         self._initialized = True
 
+    @staticmethod
+    def load_pool_config(config):
+        pool_config = {**DEFAULT_POOL_CONFIG, **config.get("pool", {})}
+        if os.environ.get("CLASSFORGE_DB_POOL") is not None:
+            pool_config["enabled"] = os.environ["CLASSFORGE_DB_POOL"].lower() in ("1", "true", "yes")
+        for key in ("minconn", "maxconn"):
+            env_value = os.environ.get(f"CLASSFORGE_DB_POOL_{key.upper()}")
+            if env_value is not None:
+                pool_config[key] = int(env_value)
+        return pool_config
+
+    @property
+    def connection(self):
+        """
+        The psycopg2 connection queries run on. Every thread (i.e. every Flask
+        request) has its own: checked out of the pool on first use in pooled
+        mode, opened by connect() otherwise. Concurrent requests therefore never
+        share a socket or each other's transactions.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None and self.pooled and self._pool is not None:
+            connection = self._checkout()
+        return connection
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
     def load_config(self, config_file):
         # Always load the config file relative to the location of database.py
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -41,6 +107,10 @@ class Database:
             raise
 
     def connect(self):
+        if self.pooled:
+            # Connections are checked out lazily by the `connection` property
+            self._open_pool()
+            return
         if self.connection is None:
             try:
                 self.connection = psycopg2.connect(
@@ -50,6 +120,7 @@ class Database:
                     port=self.config['port'],
                     dbname=self.config['dbname']
                 )
+                self._count_opened()
                 logger.info("Connected to PostgreSQL database.")
             except OperationalError as e:
                 logger.error(f"Database connection failed: {e}")
@@ -70,7 +141,7 @@ class Database:
         try:
             with self.connection.cursor() as cursor:
                 cursor.execute(query, data)
-                self.connection.commit()
+                self._commit_statement()
                 logger.info("Query executed.")
         except Error as e:
             logger.error(f"Query execution failed: {e}")
@@ -94,11 +165,56 @@ class Database:
         try:
             with self.connection.cursor() as cursor:
                 cursor.executemany(query, data)
-                self.connection.commit()
+                self._commit_statement()
                 logger.info("Bulk insert executed.")
         except Error as e:
             logger.error(f"Bulk insert failed: {e}")
 
+    def bulk_insert(self, table, columns, rows, method="copy", page_size=1000):
+        """
+        Writes many rows in a few round trips: streams them through
+        COPY FROM STDIN, and falls back to multi-row INSERTs via execute_values
+        if COPY is rejected (e.g. by a proxy or missing privileges).
+
+        Args:
+            table (str): Target table, e.g. "public.edge_relationship".
+            columns (list[str]): Target columns, in row order.
+            rows (iterable[tuple]): Rows to write; None becomes NULL.
+            method (str): "copy", or "values" to skip COPY and use execute_values.
+            page_size (int): Rows per INSERT statement of the fallback.
+
+        Returns:
+            int | None: Number of rows written, or None if the write failed.
+        """
+        if not self.connection:
+            logger.warning("No database connection.")
+            return None
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return 0
+        col_str = ", ".join(columns)
+        try:
+            with self.connection.cursor() as cursor:
+                # A savepoint lets the fallback run even inside a transaction
+                cursor.execute("SAVEPOINT bulk_insert")
+                if method == "copy":
+                    try:
+                        buffer = io.StringIO("".join("\t".join(map(_copy_value, row)) + "\n" for row in rows))
+                        cursor.copy_expert(f"COPY {table} ({col_str}) FROM STDIN", buffer)
+                    except Error as e:
+                        logger.warning(f"COPY into {table} failed, falling back to INSERT: {e}")
+                        cursor.execute("ROLLBACK TO SAVEPOINT bulk_insert")
+                        method = "values"
+                if method == "values":
+                    execute_values(cursor, f"INSERT INTO {table} ({col_str}) VALUES %s", rows, page_size=page_size)
+                cursor.execute("RELEASE SAVEPOINT bulk_insert")
+                self._commit_statement()
+                logger.info(f"Bulk insert of {len(rows)} rows into {table} ({method}).")
+                return len(rows)
+        except Error as e:
+            logger.error(f"Bulk insert failed: {e}")
+            return None
+
     def query_df(self, query, data=None):
         if not self.connection:
             logger.warning("No database connection.")
@@ -110,11 +226,221 @@ class Database:
             return None
 
     def close_connection(self):
+        if getattr(self._local, "request_scoped", False):
+            # Kept for the rest of the request, end_request() cleans up
+            return
+        if getattr(self._local, "transaction_depth", 0):
+            # `with db:` blocks inside transaction() must not end it early
+            return
+        if self.pooled:
+            self._release()
+            return
         if self.connection:
             self.connection.close()
             self.connection = None
             logger.info("Database connection closed.")
 
+    def _open_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                return
+            try:
+                self._pool = ThreadedConnectionPool(
+                    self.pool_config["minconn"],
+                    self.pool_config["maxconn"],
+                    user=self.config['user'],
+                    password=self.config['password'],
+                    host=self.config['host'],
+                    port=self.config['port'],
+                    dbname=self.config['dbname']
+                )
+                logger.info(f"Opened PostgreSQL connection pool ({self.pool_config['minconn']}-"
+                            f"{self.pool_config['maxconn']} connections).")
+            except OperationalError as e:
+                logger.error(f"Database connection pool failed: {e}")
+                self._pool = None
+
+    def _checkout(self):
+        """Takes a connection from the pool for the calling thread, waiting for a free one if needed."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.pool_config["wait_timeout"]):
+            with self._stats_lock:
+                self._pool_stats["timeouts"] += 1
+            logger.error("Timed out waiting for a pooled database connection.")
+            return None
+        waited = time.perf_counter() - start
+
+        try:
+            connection = self._pool.getconn()
+            if not self._is_healthy(connection):
+                self._pool.putconn(connection, close=True)
+                connection = self._pool.getconn()
+        except (OperationalError, PoolError) as e:
+            self._slots.release()
+            logger.error(f"Pooled connection checkout failed: {e}")
+            return None
+
+        with self._stats_lock:
+            stats = self._pool_stats
+            stats["checkouts"] += 1
+            stats["in_use"] += 1
+            stats["wait_seconds_total"] += waited
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+            if waited > 0.001:
+                stats["waited_checkouts"] += 1
+        self._local.connection = connection
+        self._count_opened()
+        return connection
+
+    def _is_healthy(self, connection):
+        """Pings connections that sat idle, since the server or a proxy may have dropped them."""
+        if connection.closed:
+            return False
+        last_used = self._last_used.get(id(connection))
+        if last_used is None or time.monotonic() - last_used < self.pool_config["health_check_interval"]:
+            return True
+        with self._stats_lock:
+            self._pool_stats["health_checks"] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Error:
+            with self._stats_lock:
+                self._pool_stats["health_check_failures"] += 1
+            return False
+
+    def _release(self):
+        """Returns the calling thread's connection to the pool."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        self._local.connection = None
+        try:
+            if not connection.closed:
+                # Nothing uncommitted leaks into the next request
+                connection.rollback()
+            self._last_used[id(connection)] = time.monotonic()
+            self._pool.putconn(connection, close=bool(connection.closed))
+        except (Error, PoolError) as e:
+            logger.error(f"Returning pooled connection failed: {e}")
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self._pool_stats["in_use"] -= 1
+
+    def _count_opened(self):
+        """Counts a connect (or pooled checkout) against the calling thread's request."""
+        self._local.connections_opened = getattr(self._local, "connections_opened", 0) + 1
+
+    def begin_request(self):
+        """
+        Scopes the connection to the calling thread's request: `with db:` blocks
+        and close_connection() keep it open, so every helper of the request
+        reuses one connection instead of reconnecting.
+        """
+        self._local.request_scoped = True
+        self._local.connections_opened = 0
+        self._local.transaction_depth = 0
+
+    def connections_opened_in_request(self):
+        """Connects (or pooled checkouts) since begin_request() on this thread."""
+        return getattr(self._local, "connections_opened", 0)
+
+    def end_request(self, exc=None):
+        """
+        Ends the request scope: ends whatever transaction the request left open
+        (uncommitted work of a failed request, an open or aborted transaction,
+        or just the reads of a successful one, whose locks would otherwise
+        block DDL from other sessions) by rolling it back, as _release does for
+        pooled connections. The connection belongs to this thread, so no other
+        request's transaction is touched. Returns a pooled connection to the
+        pool, closes the request's own connection in unpooled mode and records
+        how many connections the request opened.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and not connection.closed:
+            if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        self._local.request_scoped = False
+        self._local.transaction_depth = 0
+        if self.pooled:
+            self._release()
+        elif connection is not None:
+            # Per-thread connections of finished requests must not pile up
+            connection.close()
+            self._local.connection = None
+
+        opened = self.connections_opened_in_request()
+        with self._stats_lock:
+            stats = self._request_stats
+            stats["requests"] += 1
+            stats["connections_opened_total"] += opened
+            stats["connections_opened_max"] = max(stats["connections_opened_max"], opened)
+            stats["connections_opened_last"] = opened
+        return opened
+
+    def request_stats(self):
+        """Connections opened per request, over the requests served so far."""
+        with self._stats_lock:
+            stats = dict(self._request_stats)
+        stats["connections_opened_mean"] = (
+            round(stats["connections_opened_total"] / stats["requests"], 3) if stats["requests"] else None
+        )
+        return stats
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups the statements inside into one transaction: execute_query and
+        execute_many stop committing individually, and the block commits on
+        exit or rolls back on an exception. Nested blocks join the outer one.
+        Isolated per thread (request), since every thread has its own
+        connection. The connection stays open until the block ends.
+        """
+        depth = getattr(self._local, "transaction_depth", 0)
+        if depth == 0:
+            self.connect()
+        self._local.transaction_depth = depth + 1
+        try:
+            yield self
+        except Exception:
+            if depth == 0 and self.connection:
+                self.connection.rollback()
+            raise
+        else:
+            if depth == 0 and self.connection:
+                self.connection.commit()
+        finally:
+            self._local.transaction_depth = depth
+
+    def _commit_statement(self):
+        if not getattr(self._local, "transaction_depth", 0):
+            self.connection.commit()
+
+    def pool_stats(self):
+        """Checkout and wait metrics of the connection pool."""
+        with self._stats_lock:
+            stats = dict(self._pool_stats)
+        checkouts = stats["checkouts"]
+        stats["wait_seconds_mean"] = round(stats["wait_seconds_total"] / checkouts, 6) if checkouts else None
+        stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 6)
+        stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 6)
+        stats.update(
+            pooled=self.pooled,
+            minconn=self.pool_config["minconn"],
+            maxconn=self.pool_config["maxconn"],
+            available=self.pool_config["maxconn"] - stats["in_use"],
+        )
+        return stats
+
+    def close_pool(self):
+        """Closes every pooled connection, e.g. at shutdown."""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
     def fetch_one(self, query, data=None):
         if not self.connection:
             logger.warning("No database connection.")
@@ -1,5 +1,9 @@
+import logging
+
 from .database import Database
 
+logger = logging.getLogger(__name__)
+
 # Get the singleton instance and connect
 def get_db():
     db = Database(config_file='./config.json')
@@ -9,3 +13,31 @@ def get_db():
 def close_db():
     db = Database()
     db.close_connection()
+
+def init_app(app):
+    """
+    Scopes the database connection to each Flask request: helpers reuse one
+    connection (or one pooled checkout) for the whole request, it is cleaned
+    up in teardown, and the number of connections the request opened is sent
+    in the X-DB-Connections-Opened response header.
+    """
+    from flask import g
+
+    @app.before_request
+    def begin_db_request():
+        g.db = Database(config_file='./config.json')
+        g.db.begin_request()
+
+    @app.after_request
+    def report_db_connections(response):
+        if "db" in g:
+            response.headers["X-DB-Connections-Opened"] = str(g.db.connections_opened_in_request())
+        return response
+
+    @app.teardown_request
+    def end_db_request(exc=None):
+        db = g.pop("db", None)
+        if db is not None:
+            opened = db.end_request(exc)
+            if opened > 1:
+                logger.info(f"Request opened {opened} database connections")
@@ -9,6 +9,8 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 #import ml.evaluate_model
 import json
 from db.db_manager import get_db
+from db.migrations import ensure_run_partitions
+from db.run_summary import delete_run_summaries
 from pathlib import Path
 import uuid
 from sqlalchemy import text
@@ -305,14 +307,16 @@ def classroom_update(participant_id: int, classroom_id: str):
     try:
         full_classroom_id = f"Classroom_{classroom_id}"
 
-        db.execute_query("""
-            UPDATE public.classroom_allocation
-            SET classroom_id = %s
-            WHERE participant_id = %s
-            RETURNING participant_id;
-        """, (full_classroom_id, participant_id))
-        
-        db.commit()
+        with db.transaction(), db.connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE public.classroom_allocation
+                SET classroom_id = %s
+                WHERE participant_id = %s
+                RETURNING run_number;
+            """, (full_classroom_id, participant_id))
+            # Summaries of the edited runs describe the old allocation
+            delete_run_summaries(cursor, {row[0] for row in cursor.fetchall()})
+
         return {
             "status": "success",
             "participant_id": participant_id,
@@ -359,25 +363,12 @@ def fetch_student_dict_from_id(db, json_data):
     "Total_Students": 175
     """
 
-    #At first save this allocation
-    run_number = save_allocations_to_db(db, json_data )
-
-
-    allocations = json_data["Allocations"]
-
     try:
-        enriched = {}
-
-        with db:
-            for classroom, student_ids in allocations.items():
-                query = f"""
-                    SELECT participant_id, first_name, last_name
-                    FROM raw.participants
-                    WHERE participant_id = ANY(%s);
-                """
-                result = db.query_df(query, (student_ids,))
-
-                enriched[classroom] = result.to_dict(orient="records")
+        # The insert and the name lookup share one connection and transaction,
+        # so a failed lookup does not leave an unreported run behind
+        with db.transaction():
+            run_number = save_allocations_to_db(db, json_data)
+            enriched = enrich_allocations_with_names(db, json_data["Allocations"])
         return {
             "Allocations": enriched,
             "Total_Classrooms": json_data["Total_Classrooms"],
@@ -389,6 +380,39 @@ def fetch_student_dict_from_id(db, json_data):
         return jsonify({"error": str(e)}), 500
 
 
+def enrich_allocations_with_names(db, allocations: dict) -> dict:
+    """
+    Replaces the participant ids of every classroom with their
+    {participant_id, first_name, last_name} records, fetched for all
+    classrooms in one query. Records keep the order the query returns them
+    in; ids without a participant row are left out.
+    """
+    assignment = pd.DataFrame(
+        [(classroom, student_id) for classroom, student_ids in allocations.items() for student_id in student_ids],
+        columns=["classroom", "participant_id"],
+    )
+    if assignment.empty:
+        return {classroom: [] for classroom in allocations}
+    names = db.query_df(
+        """
+        SELECT participant_id, first_name, last_name
+        FROM raw.participants
+        WHERE participant_id = ANY(%s);
+        """,
+        (assignment["participant_id"].drop_duplicates().tolist(),),
+    )
+    if names is None:
+        raise RuntimeError("Participant name lookup failed")
+
+    # Participant rows in query order, each tagged with its classroom
+    names = names.merge(assignment, on="participant_id", how="inner")
+    records = names[["participant_id", "first_name", "last_name"]].to_dict(orient="records")
+    enriched = {classroom: [] for classroom in allocations}
+    for classroom, positions in names.groupby("classroom", sort=False).indices.items():
+        enriched[classroom] = [records[position] for position in positions]
+    return enriched
+
+
 def save_allocations_to_db(db, allocation_data: dict):
     run_number = generate_run_number()
     rows_to_insert = []
@@ -397,13 +421,15 @@ def save_allocations_to_db(db, allocation_data: dict):
         for student_id in student_ids:
             rows_to_insert.append((run_number, classroom_name, student_id))
 
-    query = """
-    INSERT INTO public.classroom_allocation (run_number, classroom_id, participant_id)
-    VALUES (%s, %s, %s)
-    """
-
     with db:
-        db.execute_many(query, rows_to_insert)
+        # No-op unless the run tables are partitioned by run (see db/migrations.py)
+        ensure_run_partitions(db, run_number)
+        written = db.bulk_insert(
+            "public.classroom_allocation", ["run_number", "classroom_id", "participant_id"], rows_to_insert
+        )
+    # bulk_insert logs and swallows database errors; raising lets an enclosing transaction() roll back
+    if written is None:
+        raise RuntimeError(f"Saving the allocations of run {run_number} failed")
 
     print(f"Inserted {len(rows_to_insert)} rows for run {run_number}")
     return run_number
@@ -480,48 +506,6 @@ def get_latest_allocations_from_db(db_session) -> dict:
     }
 
 
-def get_effort_constraint(db_session):
-    df = db.query_df("SELECT participant_id, perc_effort FROM raw.participants;")
-    # Clean types
-    df['participant_id'] = pd.to_numeric(df['participant_id'], errors='coerce').fillna(0).astype(int)
-    df['perc_effort'] = pd.to_numeric(df['perc_effort'], errors='coerce').fillna(0)
-
-    print(df.columns)
-
-
-    # Convert to dict mapping: participant_id -> perc_academic
-    constraint_map = dict(zip(df['participant_id'], df['perc_effort']))
-    return constraint_map
-    
-
-def get_attendance_constraint(db_session):
-    df = db.query_df("SELECT participant_id, attendance FROM raw.participants;")
-    # Clean types
-    df['participant_id'] = pd.to_numeric(df['participant_id'], errors='coerce').fillna(0).astype(int)
-    df['attendance'] = pd.to_numeric(df['attendance'], errors='coerce').fillna(0)
-
-    print(df.columns)
-
-
-    # Convert to dict mapping: participant_id -> perc_academic
-    constraint_map = dict(zip(df['participant_id'], df['attendance']))
-    return constraint_map
-
-
-def get_academic_constraint(db_session):
-    df = db.query_df("SELECT participant_id, perc_academic FROM raw.participants;")
-
-    # Clean types
-    df['participant_id'] = pd.to_numeric(df['participant_id'], errors='coerce').fillna(0).astype(int)
-    df['perc_academic'] = pd.to_numeric(df['perc_academic'], errors='coerce').fillna(0)
-
-    print(df.columns)
-
-    # Convert to dict mapping: participant_id -> perc_academic
-    constraint_map = dict(zip(df['participant_id'], df['perc_academic']))
-    return constraint_map
-
-
 import pandas as pd
 from collections import defaultdict
 
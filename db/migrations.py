@@ -0,0 +1,253 @@
+"""
+Versioned schema of the allocation run tables: public.classroom_allocation,
+public.edge_relationship, public.preserve_edge and public.run_summary, plus the
+raw data version stamp (raw.data_version). Each
+migration runs once, in its own transaction, and is recorded in
+public.schema_migrations. Run it as a deploy step, before starting the backend.
+
+Usage (from the repository root; --config defaults to db/config.json):
+    python -m db.migrations [--partition-by-run]
+"""
+import argparse
+import hashlib
+import logging
+import os
+
+from db.run_summary import RUN_SUMMARY_DDL
+
+logger = logging.getLogger(__name__)
+
+# List-partition the per-run tables by run_number when they are first created.
+# Off by default: the indexes alone keep run lookups flat, while the latest-run
+# queries (ORDER BY id/created_at) lock every partition, which needs a higher
+# max_locks_per_transaction once thousands of runs are stored
+PARTITION_BY_RUN = os.environ.get("CLASSFORGE_PARTITION_RUNS", "").lower() in ("1", "true", "yes")
+
+# Tables holding many rows per run; the ones that can be partitioned by run
+RUN_TABLES = ("classroom_allocation", "edge_relationship")
+
+MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS public.schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# A partitioned table's primary key must contain the partition key
+RUN_TABLES_DDL = {
+    "classroom_allocation": """
+        CREATE TABLE IF NOT EXISTS {schema}.classroom_allocation (
+            id SERIAL,
+            run_number TEXT NOT NULL,
+            classroom_id TEXT NOT NULL,
+            participant_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY ({primary_key})
+        ){partition_clause}
+    """,
+    "edge_relationship": """
+        CREATE TABLE IF NOT EXISTS {schema}.edge_relationship (
+            id SERIAL,
+            run_number TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL,
+            relationship_type TEXT NOT NULL,
+            classroom_id INTEGER,
+            PRIMARY KEY ({primary_key})
+        ){partition_clause}
+    """,
+}
+
+PRESERVE_EDGE_DDL = """
+    CREATE TABLE IF NOT EXISTS {schema}.preserve_edge (
+        id SERIAL PRIMARY KEY,
+        run_number TEXT NOT NULL,
+        group_id TEXT,
+        friend INTEGER,
+        influence INTEGER,
+        feedback INTEGER,
+        more_time INTEGER,
+        advice INTEGER,
+        disrespect INTEGER
+    )
+"""
+
+# Lookups of the analytics: one run's rows, one relationship type of a run, the latest run
+RUN_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS classroom_allocation_run_classroom_idx "
+    "ON {schema}.classroom_allocation (run_number, classroom_id)",
+    "CREATE INDEX IF NOT EXISTS classroom_allocation_created_at_idx "
+    "ON {schema}.classroom_allocation (created_at)",
+    "CREATE INDEX IF NOT EXISTS edge_relationship_run_type_idx "
+    "ON {schema}.edge_relationship (run_number, relationship_type)",
+    "CREATE INDEX IF NOT EXISTS preserve_edge_run_idx ON {schema}.preserve_edge (run_number)",
+]
+# ORDER BY id DESC only has the primary key to use when id leads it
+PARTITIONED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS classroom_allocation_id_idx ON {schema}.classroom_allocation (id)",
+]
+
+# One-row counter of writes to the raw survey tables, read by ml.embedding_store.raw_data_version
+RAW_DATA_VERSION_DDL = [
+    "CREATE SCHEMA IF NOT EXISTS raw",
+    """
+    CREATE TABLE IF NOT EXISTS raw.data_version (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        version BIGINT NOT NULL DEFAULT 1,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "INSERT INTO raw.data_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING",
+]
+
+# (schema, table) -> whether the table is partitioned
+_partitioned = {}
+
+
+def _execute(db, statements, data=None):
+    """Runs DDL on the open connection; unlike execute_query, errors propagate."""
+    with db.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement, data)
+
+
+def is_partitioned(db, table, schema="public"):
+    if (schema, table) not in _partitioned:
+        row = db.fetch_one(
+            """
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relname = %s
+            """,
+            (schema, table),
+        )
+        _partitioned[(schema, table)] = row is not None
+    return _partitioned[(schema, table)]
+
+
+def create_run_tables(db, schema="public", partition_by_run=False):
+    """
+    Creates the run tables that do not exist yet. Partitioned tables get a
+    DEFAULT partition, so rows of a run without its own partition are still
+    accepted; existing tables are left as they are.
+    """
+    for table, ddl in RUN_TABLES_DDL.items():
+        if partition_by_run:
+            _execute(db, [
+                ddl.format(schema=schema, primary_key="run_number, id",
+                           partition_clause=" PARTITION BY LIST (run_number)"),
+                f"CREATE TABLE IF NOT EXISTS {schema}.{table}_default PARTITION OF {schema}.{table} DEFAULT",
+            ])
+        else:
+            _execute(db, [ddl.format(schema=schema, primary_key="id", partition_clause="")])
+        _partitioned.pop((schema, table), None)
+    _execute(db, [PRESERVE_EDGE_DDL.format(schema=schema)])
+
+    for table in RUN_TABLES:
+        if is_partitioned(db, table, schema) != partition_by_run:
+            logger.warning(f"{schema}.{table} already exists and is "
+                           f"{'' if is_partitioned(db, table, schema) else 'not '}partitioned by run")
+
+
+def create_run_indexes(db, schema="public"):
+    """Creates the run lookup indexes; on a partitioned table they cascade to every partition."""
+    statements = list(RUN_INDEXES)
+    if is_partitioned(db, "classroom_allocation", schema):
+        statements += PARTITIONED_INDEXES
+    _execute(db, [statement.format(schema=schema) for statement in statements])
+
+
+def partition_name(table, run_number):
+    # Run numbers are UUIDs; a digest keeps any run number a valid identifier
+    return f"{table}_r{hashlib.md5(str(run_number).encode()).hexdigest()[:16]}"
+
+
+def ensure_run_partitions(db, run_number, schema="public"):
+    """
+    Gives a run its own partition of every partitioned run table, so lookups
+    by run_number only read that run's rows. Called before the run's first
+    insert; does nothing for tables that are not partitioned.
+    """
+    for table in RUN_TABLES:
+        if is_partitioned(db, table, schema):
+            _execute(db, [
+                f"CREATE TABLE IF NOT EXISTS {schema}.{partition_name(table, run_number)} "
+                f"PARTITION OF {schema}.{table} FOR VALUES IN (%s)"
+            ], (str(run_number),))
+
+
+# (version, name, apply(db, partition_by_run)), in order; append, never edit
+MIGRATIONS = [
+    (1, "run tables", lambda db, partition_by_run: create_run_tables(db, partition_by_run=partition_by_run)),
+    (2, "run lookup indexes", lambda db, partition_by_run: create_run_indexes(db)),
+    (3, "run summaries", lambda db, partition_by_run: _execute(db, [RUN_SUMMARY_DDL])),
+    (4, "raw data version", lambda db, partition_by_run: _execute(db, RAW_DATA_VERSION_DDL)),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(db):
+    """Highest applied migration, 0 for a database without any."""
+    _execute(db, [MIGRATIONS_DDL])
+    row = db.fetch_one("SELECT COALESCE(MAX(version), 0) FROM public.schema_migrations")
+    return row[0] if row else 0
+
+
+def migrate(db, partition_by_run=None):
+    """
+    Applies the migrations newer than the database's schema version, each in
+    one transaction together with its schema_migrations row.
+
+    Args:
+        db (Database): An instance of the Database class.
+        partition_by_run (bool, optional): Create the run tables list-partitioned
+            by run_number, defaults to CLASSFORGE_PARTITION_RUNS. Only affects
+            tables that do not exist yet.
+
+    Returns:
+        list[int]: Versions applied by this call.
+
+    Raises:
+        RuntimeError: If there is no database connection.
+    """
+    if not db.connection:
+        raise RuntimeError("Cannot migrate: no database connection")
+    if partition_by_run is None:
+        partition_by_run = PARTITION_BY_RUN
+    with db.transaction():
+        current = schema_version(db)
+
+    applied = []
+    for version, name, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        with db.transaction():
+            apply(db, partition_by_run)
+            _execute(db, ["INSERT INTO public.schema_migrations (version, name) VALUES (%s, %s)"], (version, name))
+        applied.append(version)
+        logger.info(f"Applied migration {version}: {name}")
+    return applied
+
+
+def main():
+    from db.database import Database
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.json", help="Database config, relative to db/ or absolute")
+    parser.add_argument("--partition-by-run", action="store_true", default=None,
+                        help="Create the run tables list-partitioned by run_number")
+    args = parser.parse_args()
+
+    db = Database(config_file=args.config)
+    db.connect()
+    try:
+        applied = migrate(db, partition_by_run=args.partition_by_run)
+    finally:
+        db.close_connection()
+    print(f"Schema version {SCHEMA_VERSION}; applied {applied or 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Created by migration 3 (db/migrations.py). Payloads are JSON text: json/jsonb columns reject the NaN the analytics can contain
+RUN_SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS public.run_summary (
+        run_number TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        cohort TEXT NOT NULL DEFAULT '',
+        payload TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_number, summary, cohort)
+    )
+"""
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def load_run_summary(db, run_number, summary, cohort=""):
+    """Returns the stored payload of one run's summary, or None."""
+    row = db.fetch_one(
+        "SELECT payload FROM public.run_summary WHERE run_number = %s AND summary = %s AND cohort = %s",
+        (str(run_number), summary, str(cohort or "")),
+    )
+    return json.loads(row[0]) if row else None
+
+
+def save_run_summary(db, run_number, summary, payload, cohort=""):
+    """Stores (or replaces) the payload of one run's summary."""
+    db.execute_query(
+        """
+        INSERT INTO public.run_summary (run_number, summary, cohort, payload)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (run_number, summary, cohort)
+        DO UPDATE SET payload = EXCLUDED.payload, created_at = CURRENT_TIMESTAMP
+        """,
+        (str(run_number), summary, str(cohort or ""), json.dumps(payload, default=_json_default)),
+    )
+
+
+def delete_run_summaries(cursor, run_numbers):
+    """
+    Drops the stored summaries of runs whose allocation changed, so they are
+    recomputed on their next request. Run it in the transaction of the change.
+    """
+    cursor.execute("DELETE FROM public.run_summary WHERE run_number = ANY(%s)", ([str(r) for r in run_numbers],))
+
+
+def cached_run_summary(db, run_number, summary, compute, cohort=""):
+    """
+    Looks a run's summary up by primary key and only calls `compute()` on a
+    miss, e.g. for runs saved before the summaries were materialised. Only
+    non-empty dict/list payloads are stored, so error results (None, empty
+    frames, (body, status) tuples) are recomputed on the next call; calls
+    without a run number are computed every time.
+
+    Args:
+        db (Database): An instance of the Database class.
+        run_number (str): Allocation run the summary belongs to.
+        summary (str): Name of the summary, e.g. "sna_per_classroom".
+        compute (callable): Builds the payload from the raw and run tables.
+        cohort (str, optional): Cohort the summary was computed for, if any.
+
+    Returns:
+        The stored payload, or whatever `compute()` returned.
+    """
+    if not run_number:
+        return compute()
+    payload = load_run_summary(db, run_number, summary, cohort)
+    if payload is not None:
+        return payload
+    payload = compute()
+    if isinstance(payload, (dict, list)) and payload:
+        save_run_summary(db, run_number, summary, payload, cohort)
+    return payload
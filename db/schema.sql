@@ -1,5 +1,8 @@
 DROP TABLE IF EXISTS allocations, courses, classrooms, users CASCADE;
 
+-- The allocation run tables (classroom_allocation, edge_relationship, preserve_edge,
+-- run_summary) and their indexes are versioned in db/migrations.py: python -m db.migrations
+
 -- Users table
 CREATE TABLE users (
     user_id SERIAL PRIMARY KEY,
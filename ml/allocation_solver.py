@@ -0,0 +1,387 @@
+import time
+from collections import defaultdict
+from ortools.sat.python import cp_model
+from .solver_profiles import get_solver_profile
+
+# Solver backends accepted by the clustering functions
+SOLVER_BACKENDS = ("one_hot", "integer", "decomposition")
+
+# Edge objective encodings for the one-hot backend
+EDGE_ENCODINGS = ("aggregated", "per_edge")
+
+
+def class_size_bounds(num_students, num_clusters):
+    """
+    Returns the (min, max) number of students allowed in each classroom so that
+    class sizes differ by at most one.
+    """
+    base = num_students // num_clusters
+    remainder = num_students % num_clusters
+    min_per_class = base
+    max_per_class = base + 1 if remainder > 0 else base
+    return min_per_class, max_per_class
+
+
+def edge_coefficients(edge_type, relation_weights):
+    """
+    Maps every edge to its integer objective coefficient.
+
+    Args:
+        edge_type (list[int]): Relation id of every edge.
+        relation_weights (dict[int, int]): Coefficient per relation id. Positive values
+            reward keeping the pair together, negative values penalise it.
+
+    Returns:
+        list[int]: One coefficient per edge (0 for relations without a weight).
+    """
+    return [int(relation_weights.get(int(rel), 0)) for rel in edge_type]
+
+
+def aggregate_edge_pairs(edge_index, coefficients):
+    """
+    Collapses parallel and reciprocal edges into one weight per unordered pair.
+    Being in the same classroom is symmetric, so (a, b) and (b, a) of any relation
+    contribute to the same term. Self-loops and pairs whose weights cancel out are
+    dropped.
+
+    Returns:
+        dict[tuple[int, int], int]: Summed coefficient per (low, high) node pair.
+    """
+    pair_weights = {}
+    for (src, tgt), coeff in zip(zip(*edge_index), coefficients):
+        if coeff == 0 or src == tgt:
+            continue
+        pair = (src, tgt) if src < tgt else (tgt, src)
+        pair_weights[pair] = pair_weights.get(pair, 0) + coeff
+    return {pair: weight for pair, weight in pair_weights.items() if weight != 0}
+
+
+def allocation_objective(labels, preferred_clusters, pair_weights):
+    """
+    Scores a 1-indexed allocation with the same objective the CP-SAT models maximise,
+    so allocations produced by different backends can be compared directly.
+    """
+    score = sum(1 for label, preferred in zip(labels, preferred_clusters) if label == int(preferred) + 1)
+    score += sum(weight for (src, tgt), weight in pair_weights.items() if labels[src] == labels[tgt])
+    return score
+
+
+def repair_class_sizes(labels, num_clusters, preferred_clusters, pair_weights):
+    """
+    Moves students from overfull to underfull classrooms until every class is
+    within the balanced bounds, each time picking the student whose move costs
+    the least objective.
+
+    Returns:
+        int: Number of moves made. `labels` (1-indexed) is updated in place.
+    """
+    min_per_class, max_per_class = class_size_bounds(len(labels), num_clusters)
+    neighbours = defaultdict(list)
+    for (src, tgt), weight in pair_weights.items():
+        neighbours[src].append((tgt, weight))
+        neighbours[tgt].append((src, weight))
+
+    def gain(node, label):
+        score = 1 if label == int(preferred_clusters[node]) + 1 else 0
+        return score + sum(weight for other, weight in neighbours[node] if labels[other] == label)
+
+    moves = 0
+    while True:
+        sizes = {c: 0 for c in range(1, num_clusters + 1)}
+        for label in labels:
+            sizes[label] += 1
+        over = [c for c, size in sizes.items() if size > max_per_class]
+        under = [c for c, size in sizes.items() if size < min_per_class]
+        if not over and not under:
+            return moves
+
+        # Pair an offending class with the most suitable partner on the other side
+        if over:
+            source = max(over, key=sizes.get)
+            targets = under or [c for c, size in sizes.items() if size < max_per_class]
+        else:
+            targets = [min(under, key=sizes.get)]
+            source = max((c for c, size in sizes.items() if size > min_per_class), key=sizes.get)
+
+        candidates = [node for node, label in enumerate(labels) if label == source]
+        node, target = max(
+            ((node, target) for node in candidates for target in targets),
+            key=lambda move: gain(move[0], move[1]) - gain(move[0], source),
+        )
+        labels[node] = target
+        moves += 1
+
+
+def balanced_hint(preferred_clusters, num_clusters, pair_weights, previous_labels=None):
+    """
+    Builds a feasible starting allocation for CP-SAT: every student starts in
+    their previous classroom when known, otherwise in their k-means cluster, and
+    the class sizes are then repaired to the balanced bounds.
+
+    Args:
+        preferred_clusters (list[int]): 0-indexed k-means cluster of every student.
+        num_clusters (int): Number of classrooms.
+        pair_weights (dict[tuple[int, int], int]): Aggregated edge weights.
+        previous_labels (list[int | None], optional): 1-indexed classroom of every
+            student in the previous run, None for students that were not allocated.
+
+    Returns:
+        list[int]: 1-indexed classroom per student.
+    """
+    labels = [int(preferred) + 1 for preferred in preferred_clusters]
+    if previous_labels is not None:
+        labels = [
+            previous if previous is not None and 1 <= previous <= num_clusters else label
+            for label, previous in zip(labels, previous_labels)
+        ]
+    repair_class_sizes(labels, num_clusters, preferred_clusters, pair_weights)
+    return labels
+
+
+def solve_integer_allocation(num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+                             profile=None, log_search_progress=False, hint=None):
+    """
+    Original formulation: one IntVar per student with reified class-membership
+    and same-class booleans. Kept for comparison with the one-hot backend.
+
+    Args:
+        num_students (int): Number of students (nodes).
+        num_clusters (int): Number of classrooms.
+        preferred_clusters (list[int]): 0-indexed k-means cluster of every student.
+        edge_index (list[list[int]]): [sources, targets] node indices.
+        coefficients (list[int]): Objective coefficient of every edge.
+        profile (SolverProfile | str, optional): Search settings, defaults to "balanced".
+        hint (list[int], optional): 1-indexed starting classroom per student, passed
+            to CP-SAT as solution hints.
+
+    Returns:
+        tuple[list[int] | None, dict]: 1-indexed classroom per student (None when no
+        solution was found) and the solver statistics.
+    """
+    start = time.perf_counter()
+    model_cp = cp_model.CpModel()
+    assignments = [model_cp.NewIntVar(1, num_clusters, f"student_{i}") for i in range(num_students)]
+
+    min_per_class, max_per_class = class_size_bounds(num_students, num_clusters)
+    membership_vars = []
+    for c in range(1, num_clusters + 1):
+        class_members = []
+        for i in range(num_students):
+            is_in_class = model_cp.NewBoolVar(f"is_{i}_in_class_{c}")
+            model_cp.Add(assignments[i] == c).OnlyEnforceIf(is_in_class)
+            model_cp.Add(assignments[i] != c).OnlyEnforceIf(is_in_class.Not())
+            class_members.append(is_in_class)
+            membership_vars.append((i, c, is_in_class))
+        model_cp.Add(sum(class_members) >= min_per_class)
+        model_cp.Add(sum(class_members) <= max_per_class)
+
+    match_vars = []
+    for i in range(num_students):
+        match = model_cp.NewBoolVar(f"match_{i}")
+        model_cp.Add(assignments[i] == (int(preferred_clusters[i]) + 1)).OnlyEnforceIf(match)
+        model_cp.Add(assignments[i] != (int(preferred_clusters[i]) + 1)).OnlyEnforceIf(match.Not())
+        match_vars.append(match)
+
+    edge_terms = []
+    same_class_vars = []
+    for (src, tgt), coeff in zip(zip(*edge_index), coefficients):
+        if coeff == 0:
+            continue
+        same_class = model_cp.NewBoolVar(f"same_class_{src}_{tgt}")
+        model_cp.Add(assignments[src] == assignments[tgt]).OnlyEnforceIf(same_class)
+        model_cp.Add(assignments[src] != assignments[tgt]).OnlyEnforceIf(same_class.Not())
+        edge_terms.append(coeff * same_class)
+        same_class_vars.append((src, tgt, same_class))
+
+    # Hint every variable so the hint is a complete solution CP-SAT can start from
+    if hint is not None:
+        for i, label in enumerate(hint):
+            model_cp.AddHint(assignments[i], int(label))
+            model_cp.AddHint(match_vars[i], int(label) == int(preferred_clusters[i]) + 1)
+        for i, c, is_in_class in membership_vars:
+            model_cp.AddHint(is_in_class, int(hint[i]) == c)
+        _hint_same_class(model_cp, same_class_vars, hint)
+
+    model_cp.Maximize(sum(match_vars) + sum(edge_terms))
+    build_time = time.perf_counter() - start
+
+    def read_labels(solver):
+        return [solver.Value(assignments[i]) for i in range(num_students)]
+
+    return _solve(model_cp, read_labels, build_time, "integer", profile, log_search_progress,
+                  hinted=hint is not None)
+
+
+def solve_one_hot_allocation(num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+                             profile=None, log_search_progress=False, hint=None,
+                             edge_encoding="aggregated", class_bounds=None):
+    """
+    One-hot formulation: a Boolean x[i, c] per student and classroom with
+    AddExactlyOne per student and a linear cardinality constraint per classroom.
+    The k-means preference becomes a plain objective literal, so no reified
+    equalities are needed.
+
+    With edge_encoding="aggregated" (default) edges are summed per node pair and
+    each pair gets one same-class indicator linked linearly to x, so the model
+    grows with the number of distinct pairs. "per_edge" keeps one exactly
+    reified indicator per raw edge.
+
+    class_bounds optionally overrides the balanced size limits with one
+    (min, max) pair per classroom.
+
+    Other args and the return value are the same as for `solve_integer_allocation`.
+    """
+    if edge_encoding not in EDGE_ENCODINGS:
+        raise ValueError(f"Unknown edge encoding '{edge_encoding}'. Expected one of {EDGE_ENCODINGS}")
+
+    start = time.perf_counter()
+    model_cp = cp_model.CpModel()
+    x = [
+        [model_cp.NewBoolVar(f"x_{i}_{c}") for c in range(num_clusters)]
+        for i in range(num_students)
+    ]
+
+    for i in range(num_students):
+        model_cp.AddExactlyOne(x[i])
+
+    if class_bounds is None:
+        class_bounds = [class_size_bounds(num_students, num_clusters)] * num_clusters
+    for c, (min_per_class, max_per_class) in enumerate(class_bounds):
+        model_cp.AddLinearConstraint(
+            sum(x[i][c] for i in range(num_students)), min_per_class, max_per_class
+        )
+
+    # Matching the preferred cluster is simply the literal of that class
+    match_vars = [x[i][int(preferred_clusters[i])] for i in range(num_students)]
+
+    if edge_encoding == "aggregated":
+        pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+        edge_terms, same_class_vars = _add_pair_terms(model_cp, x, pair_weights, num_clusters)
+    else:
+        pair_weights = None
+        edge_terms, same_class_vars = _add_per_edge_terms(model_cp, x, edge_index, coefficients, num_clusters)
+
+    if hint is not None:
+        for i, label in enumerate(hint):
+            for c in range(num_clusters):
+                model_cp.AddHint(x[i][c], c == int(label) - 1)
+        _hint_same_class(model_cp, same_class_vars, hint)
+
+    model_cp.Maximize(sum(match_vars) + sum(edge_terms))
+    build_time = time.perf_counter() - start
+
+    def read_labels(solver):
+        return [
+            next(c for c in range(num_clusters) if solver.BooleanValue(x[i][c])) + 1
+            for i in range(num_students)
+        ]
+
+    labels, stats = _solve(model_cp, read_labels, build_time, "one_hot", profile, log_search_progress,
+                           hinted=hint is not None)
+    stats["edge_encoding"] = edge_encoding
+    stats["num_edges"] = len(coefficients)
+    if pair_weights is not None:
+        stats["num_edge_pairs"] = len(pair_weights)
+    return labels, stats
+
+
+def _add_pair_terms(model_cp, x, pair_weights, num_clusters):
+    """
+    Adds one same-class indicator per node pair, linked to x with linear
+    inequalities. Only the side the objective pushes against is constrained:
+    a rewarded pair can only be counted when both students share a class, and a
+    penalised pair must be counted whenever they do.
+    """
+    edge_terms = []
+    same_class_vars = []
+    for (src, tgt), weight in pair_weights.items():
+        same_class = model_cp.NewBoolVar(f"same_class_{src}_{tgt}")
+        for c in range(num_clusters):
+            if weight > 0:
+                # same_class and src in c => tgt in c
+                model_cp.Add(same_class + x[src][c] - x[tgt][c] <= 1)
+            else:
+                # src and tgt both in c => same_class
+                model_cp.Add(same_class >= x[src][c] + x[tgt][c] - 1)
+        edge_terms.append(weight * same_class)
+        same_class_vars.append((src, tgt, same_class))
+    return edge_terms, same_class_vars
+
+
+def _add_per_edge_terms(model_cp, x, edge_index, coefficients, num_clusters):
+    """
+    Adds one exactly reified same-class indicator per raw edge, expressed as
+    clauses over x.
+    """
+    edge_terms = []
+    same_class_vars = []
+    for (src, tgt), coeff in zip(zip(*edge_index), coefficients):
+        if coeff == 0:
+            continue
+        same_class = model_cp.NewBoolVar(f"same_class_{src}_{tgt}")
+        for c in range(num_clusters):
+            model_cp.AddImplication(x[src][c], x[tgt][c]).OnlyEnforceIf(same_class)
+            model_cp.AddImplication(x[tgt][c], x[src][c]).OnlyEnforceIf(same_class)
+            model_cp.AddBoolOr([x[src][c].Not(), x[tgt][c].Not()]).OnlyEnforceIf(same_class.Not())
+        edge_terms.append(coeff * same_class)
+        same_class_vars.append((src, tgt, same_class))
+    return edge_terms, same_class_vars
+
+
+def _hint_same_class(model_cp, same_class_vars, hint):
+    for src, tgt, same_class in same_class_vars:
+        model_cp.AddHint(same_class, int(hint[src]) == int(hint[tgt]))
+
+
+class _SolutionTimer(cp_model.CpSolverSolutionCallback):
+    """
+    Records when each improving solution is found, to measure time-to-first-feasible
+    and time-to-best.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.solution_times = []
+
+    def on_solution_callback(self):
+        self.solution_times.append(self.WallTime())
+
+
+def _solve(model_cp, read_labels, build_time, backend, profile, log_search_progress, hinted=False):
+    profile = get_solver_profile(profile)
+    proto = model_cp.Proto()
+    solver = cp_model.CpSolver()
+    profile.apply(solver.parameters)
+    solver.parameters.log_search_progress = log_search_progress
+    timer = _SolutionTimer()
+    status = solver.Solve(model_cp, timer)
+
+    stats = {
+        "backend": backend,
+        "profile": profile.name,
+        "status": solver.StatusName(status),
+        "model_build_time": round(build_time, 4),
+        "num_variables": len(proto.variables),
+        "num_constraints": len(proto.constraints),
+        "solve_time": round(solver.WallTime(), 4),
+        "deterministic_time": round(solver.ResponseProto().deterministic_time, 4),
+        "num_branches": solver.NumBranches(),
+        "num_conflicts": solver.NumConflicts(),
+        "hinted": hinted,
+        "num_solutions": len(timer.solution_times),
+        "time_to_first_feasible": round(timer.solution_times[0], 4) if timer.solution_times else None,
+        "time_to_best": round(timer.solution_times[-1], 4) if timer.solution_times else None,
+        "objective": None,
+        "best_bound": None,
+        "gap": None,
+    }
+
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None, stats
+
+    objective = solver.ObjectiveValue()
+    bound = solver.BestObjectiveBound()
+    stats["objective"] = objective
+    stats["best_bound"] = bound
+    stats["gap"] = round(abs(bound - objective) / max(1.0, abs(objective)), 6)
+    return read_labels(solver), stats
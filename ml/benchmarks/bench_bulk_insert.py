@@ -0,0 +1,82 @@
+"""
+Rows per second of the allocation persistence writes: single-row INSERTs via
+executemany (what the helpers used), execute_values and COPY FROM STDIN via
+Database.bulk_insert. Rows shaped like public.edge_relationship are written to a
+temporary table of the configured database, so nothing persists.
+
+Usage (from the repository root; --config defaults to db/config.json):
+    python -m ml.benchmarks.bench_bulk_insert --rows 1000 10000 100000
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from db.database import Database
+
+EDGE_TYPES = ["friend", "influence", "feedback", "more_time", "advice", "disrespect"]
+COLUMNS = ["run_number", "source_id", "target_id", "relationship_type", "classroom_id"]
+
+
+def synthetic_edge_rows(num_rows, seed=42):
+    """Intra-classroom edge rows of one allocation run."""
+    rng = np.random.default_rng(seed)
+    run_number = str(uuid.uuid4())
+    sources = rng.integers(100000, 200000, num_rows).tolist()
+    targets = rng.integers(100000, 200000, num_rows).tolist()
+    types = rng.choice(EDGE_TYPES, num_rows).tolist()
+    classrooms = rng.integers(1, 7, num_rows).tolist()
+    return [(run_number, s, t, r, c) for s, t, r, c in zip(sources, targets, types, classrooms)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--config", default="config.json", help="Database config, relative to db/ or absolute")
+    parser.add_argument("--executemany-max", type=int, default=10000,
+                        help="Skip the single-row INSERT baseline above this many rows")
+    args = parser.parse_args()
+
+    db = Database(config_file=args.config)
+    db.connect()
+    db.execute_query("""
+        CREATE TEMP TABLE bench_edge_relationship (
+            id SERIAL PRIMARY KEY, run_number TEXT, source_id INTEGER, target_id INTEGER,
+            relationship_type TEXT, classroom_id INTEGER
+        )
+    """)
+    insert = (f"INSERT INTO bench_edge_relationship ({', '.join(COLUMNS)}) "
+              f"VALUES ({', '.join(['%s'] * len(COLUMNS))})")
+
+    writers = {
+        "executemany": lambda rows: db.execute_many(insert, rows),
+        "execute_values": lambda rows: db.bulk_insert("bench_edge_relationship", COLUMNS, rows, method="values"),
+        "copy": lambda rows: db.bulk_insert("bench_edge_relationship", COLUMNS, rows),
+    }
+
+    print(f"{'rows':>8} " + " ".join(f"{name + ' rows/s':>22}" for name in writers) + f" {'copy speedup':>13}")
+    for num_rows in args.rows:
+        rows = synthetic_edge_rows(num_rows)
+        rates = {}
+        for name, write in writers.items():
+            if name == "executemany" and num_rows > args.executemany_max:
+                rates[name] = None
+                continue
+            db.execute_query("TRUNCATE bench_edge_relationship")
+            start = time.perf_counter()
+            write(rows)
+            elapsed = time.perf_counter() - start
+            written = db.fetch_one("SELECT COUNT(*) FROM bench_edge_relationship")[0]
+            assert written == num_rows, f"{name} wrote {written} of {num_rows} rows"
+            rates[name] = num_rows / elapsed
+
+        baseline = rates["executemany"] or rates["execute_values"]
+        print(f"{num_rows:>8} " + " ".join(
+            f"{rates[name]:>22,.0f}" if rates[name] else f"{'skipped':>22}" for name in writers
+        ) + f" {rates['copy'] / baseline:>12.1f}x")
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Quality-vs-time comparison of the monolithic one-hot CP-SAT solve and the
+decomposition backend on synthetic cohorts.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_decomposition --sizes 300 700 1500 --profile fast
+"""
+import argparse
+import json
+
+from sklearn.cluster import KMeans
+
+from ml.allocation_solver import edge_coefficients
+from ml.decomposition_solver import PARTITION_METHODS, compare_with_monolithic
+from ml.solver_profiles import SOLVER_PROFILES, get_solver_profile
+from ml.benchmarks.synthetic import synthetic_cohort
+
+# Same relation weights as cluster_students_with_gnn
+RELATION_WEIGHTS = {0: 2, 1: 2, 2: 2, 3: 2, 4: 2, 5: -5}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 700, 1500])
+    parser.add_argument("--classrooms", type=int, default=6)
+    parser.add_argument("--profile", choices=SOLVER_PROFILES, default="fast")
+    parser.add_argument("--time-limit", type=float, help="Override the profile's time limit")
+    parser.add_argument("--block-size", type=int, default=150)
+    parser.add_argument("--partition", choices=PARTITION_METHODS, default="embedding")
+    args = parser.parse_args()
+
+    profile = get_solver_profile(args.profile)
+    if args.time_limit:
+        profile = profile.replace(max_time_in_seconds=args.time_limit)
+
+    reports = []
+    for num_students in args.sizes:
+        # Node features stand in for GNN embeddings
+        x, edge_index, edge_type = synthetic_cohort(num_students)
+        preferred = KMeans(n_clusters=args.classrooms, random_state=42).fit_predict(x)
+        coefficients = edge_coefficients(edge_type.tolist(), RELATION_WEIGHTS)
+
+        report = compare_with_monolithic(
+            num_students, args.classrooms, preferred.tolist(), edge_index.tolist(), coefficients,
+            embeddings=x, partition=args.partition, block_size=args.block_size,
+            profile=profile,
+        )
+        reports.append(report)
+        print(json.dumps(report, indent=2))
+
+    print(f"{'students':>8} {'mono obj':>10} {'mono s':>8} {'decomp obj':>10} {'decomp s':>8} {'ratio':>6}")
+    for r in reports:
+        print(f"{r['num_students']:>8} {str(r['monolithic']['objective']):>10} {r['monolithic']['wall_time']:>8} "
+              f"{r['decomposition']['objective']:>10} {r['decomposition']['wall_time']:>8} "
+              f"{str(r['objective_ratio']):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of the edge ingestion in build_graph_from_db: the previous
+row-by-row `iterrows` loop against the vectorised `edges_from_frames`, on
+synthetic relationship tables of 10k, 100k and 1M edges in total.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_edge_ingestion --edges 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+from ml.build_graph_from_db import edges_from_frames
+
+NUM_RELATIONS = 6
+
+
+def legacy_edges(edge_frames, participant_ids):
+    """The per-row loop build_graph_from_db used before edges_from_frames."""
+    id_to_index = {pid: idx for idx, pid in enumerate(participant_ids)}
+    edge_index, edge_type = [], []
+    for df, relation_type in edge_frames:
+        for _, row in df.iterrows():
+            src = row["source"]
+            tgt = row["target"]
+            if pd.isna(src) or pd.isna(tgt):
+                continue
+            if src not in id_to_index or tgt not in id_to_index:
+                continue
+            edge_index.append([id_to_index[int(src)], id_to_index[int(tgt)]])
+            edge_type.append(relation_type)
+    if not edge_index:
+        return torch.empty((2, 0), dtype=torch.long), torch.empty((0,), dtype=torch.long)
+    return torch.tensor(edge_index, dtype=torch.long).t().contiguous(), torch.tensor(edge_type, dtype=torch.long)
+
+
+def synthetic_tables(num_edges, seed=42):
+    """
+    Six relationship tables whose ids are 90% in-cohort, 8% from other cohorts
+    and 2% missing, like rows fetched without a cohort filter.
+    """
+    rng = np.random.default_rng(seed)
+    num_students = max(100, num_edges // 8)
+    participant_ids = pd.Series(rng.permutation(np.arange(100000, 100000 + num_students)))
+
+    frames = []
+    for relation_type, size in enumerate(np.diff(np.linspace(0, num_edges, NUM_RELATIONS + 1).astype(int))):
+        columns = {}
+        for column in ("source", "target"):
+            values = rng.choice(participant_ids.to_numpy(), size).astype(float)
+            draw = rng.random(size)
+            values[draw < 0.10] = rng.integers(1, 99999, int((draw < 0.10).sum()))
+            values[draw < 0.02] = np.nan
+            columns[column] = values
+        frames.append((pd.DataFrame(columns), relation_type))
+    return frames, participant_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edges", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'edges':>9} {'kept':>9} {'legacy s':>9} {'vector s':>9} {'speedup':>8}")
+    for num_edges in args.edges:
+        frames, participant_ids = synthetic_tables(num_edges)
+
+        start = time.perf_counter()
+        legacy_index, legacy_type = legacy_edges(frames, participant_ids)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        edge_index, edge_type = edges_from_frames(frames, participant_ids)
+        vector_time = time.perf_counter() - start
+
+        assert torch.equal(edge_index, legacy_index) and torch.equal(edge_type, legacy_type)
+        print(f"{num_edges:>9} {edge_index.shape[1]:>9} {legacy_time:>9.3f} {vector_time:>9.4f} "
+              f"{legacy_time / vector_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Feature preprocessing of graph_to_pyg_data: the per-node `preprocess_value`
+loop against the column-wise `preprocess_features`, on synthetic participant
+attributes exported as text (percent signs, padding and NA markers mixed with
+plain numbers), followed by the tensor copy and normalisation.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_feature_preprocessing --participants 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from ml.model_2.csr_graph import NODE_FEATURES
+from ml.model_2.graph_conversion import normalize_features, preprocess_features, preprocess_value
+
+
+def legacy_features(columns, nodes, keys):
+    """The per-node loop graph_to_pyg_data used before preprocess_features."""
+    node_features = []
+    for position, node in enumerate(nodes):
+        node_features.append([preprocess_value(column[position], node, key) for column, key in zip(columns, keys)])
+    return normalize_features(torch.tensor(node_features, dtype=torch.float))
+
+
+def synthetic_columns(num_participants, seed=42):
+    """
+    One object column per feature: 50% floats, 30% "NN.N%" strings, 15% padded
+    numbers and 5% NA markers, like a spreadsheet import with mixed formatting.
+    """
+    rng = np.random.default_rng(seed)
+    markers = np.array(["N/A", "NA", "", "null", "None"], dtype=object)
+    columns = []
+    for _ in NODE_FEATURES:
+        numbers = rng.uniform(0, 100, num_participants).round(1)
+        column = numbers.astype(object)
+        draw = rng.random(num_participants)
+        percent = (draw >= 0.5) & (draw < 0.8)
+        padded = (draw >= 0.8) & (draw < 0.95)
+        missing = draw >= 0.95
+        column[percent] = [f"{value}%" for value in numbers[percent]]
+        column[padded] = [f"  {value} " for value in numbers[padded]]
+        column[missing] = rng.choice(markers, int(missing.sum()))
+        columns.append(column)
+    nodes = list(range(100000, 100000 + num_participants))
+    return columns, nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--participants", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    print(f"{'participants':>12} {'legacy s':>9} {'column s':>9} {'speedup':>8}")
+    for num_participants in args.participants:
+        columns, nodes = synthetic_columns(num_participants)
+
+        start = time.perf_counter()
+        legacy = legacy_features(columns, nodes, NODE_FEATURES)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        features = normalize_features(torch.from_numpy(preprocess_features(columns, nodes, NODE_FEATURES)))
+        column_time = time.perf_counter() - start
+
+        assert torch.equal(legacy, features)
+        print(f"{num_participants:>12} {legacy_time:>9.3f} {column_time:>9.3f} {legacy_time / column_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
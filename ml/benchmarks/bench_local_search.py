@@ -0,0 +1,81 @@
+"""
+Compares a one-shot one-hot CP-SAT solve with the local-search refiner started
+from the balanced k-means allocation, both given the same time budget.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_local_search --students 2000 --time-limit 20
+"""
+import argparse
+import json
+import time
+
+from sklearn.cluster import KMeans
+
+from ml.allocation_solver import (
+    aggregate_edge_pairs,
+    allocation_objective,
+    balanced_hint,
+    edge_coefficients,
+    solve_one_hot_allocation,
+)
+from ml.local_search import DEFAULT_RELATION_WEIGHTS, LocalSearchRefiner
+from ml.solver_profiles import SOLVER_PROFILES, get_solver_profile
+from ml.benchmarks.synthetic import synthetic_cohort
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--classrooms", type=int, default=6)
+    parser.add_argument("--profile", choices=SOLVER_PROFILES, default="fast")
+    parser.add_argument("--time-limit", type=float, default=20.0, help="Budget given to both approaches")
+    args = parser.parse_args()
+
+    x, edge_index, edge_type = synthetic_cohort(args.students)
+    preferred = KMeans(n_clusters=args.classrooms, random_state=42).fit_predict(x).tolist()
+    coefficients = edge_coefficients(edge_type.tolist(), DEFAULT_RELATION_WEIGHTS)
+    pair_weights = aggregate_edge_pairs(edge_index.tolist(), coefficients)
+
+    # Deterministic-time limits would stop CP-SAT before the wall-clock budget
+    profile = get_solver_profile(args.profile).replace(
+        max_time_in_seconds=args.time_limit, max_deterministic_time=None, relative_gap_limit=0.0
+    )
+    start = time.perf_counter()
+    cp_labels, cp_stats = solve_one_hot_allocation(
+        args.students, args.classrooms, preferred, edge_index.tolist(), coefficients, profile=profile
+    )
+    cp_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    initial = balanced_hint(preferred, args.classrooms, pair_weights)
+    refiner = LocalSearchRefiner(initial, args.classrooms, pair_weights, preferred)
+    ls_labels, ls_stats = refiner.run(time_budget=args.time_limit - (time.perf_counter() - start))
+    ls_time = time.perf_counter() - start
+
+    cp_objective = allocation_objective(cp_labels, preferred, pair_weights) if cp_labels is not None else None
+    ls_objective = allocation_objective(ls_labels, preferred, pair_weights)
+    report = {
+        "num_students": args.students,
+        "num_clusters": args.classrooms,
+        "num_edge_pairs": len(pair_weights),
+        "time_limit": args.time_limit,
+        "cp_sat": {
+            "status": cp_stats["status"],
+            "objective": cp_objective,
+            "best_bound": cp_stats["best_bound"],
+            "wall_time": round(cp_time, 4),
+        },
+        "local_search": {
+            "initial_objective": ls_stats["initial_objective"],
+            "objective": ls_objective,
+            "moves": ls_stats["moves"],
+            "swaps": ls_stats["swaps"],
+            "kicks": ls_stats["kicks"],
+            "wall_time": round(ls_time, 4),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput (nodes per second) and peak memory of full-batch versus
+neighbour-sampled mini-batch training of ImprovedClassForgeGNN. Every run uses
+a fresh process so its peak resident memory is measured on its own.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_mini_batch --sizes 5000 50000 --epochs 3
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+
+import torch
+
+from ml.benchmarks.synthetic import synthetic_cohort
+
+
+def _train(task):
+    num_students, mini_batch, epochs = task
+    # Imported in the child so the parent's memory does not count
+    from ml.cluster_with_gnn_with_constraints import GNN_HYPERPARAMETERS, GNN_MINI_BATCH, ImprovedClassForgeGNN
+    from ml.neighbor_sampling import NeighborSampler
+    from ml.trainer import EarlyStoppingTrainer
+
+    x, edge_index, edge_type = (torch.tensor(a) for a in synthetic_cohort(num_students))
+    torch.manual_seed(42)
+    model = ImprovedClassForgeGNN(
+        in_channels=x.shape[1],
+        hidden_channels=GNN_HYPERPARAMETERS["hidden_channels"],
+        embedding_size=GNN_HYPERPARAMETERS["embedding_size"],
+        num_relations=len(set(edge_type.tolist())),
+    )
+    optimizer = torch.optim.Adam(model.parameters(), lr=GNN_HYPERPARAMETERS["lr"])
+    # Fixed number of epochs: throughput is measured, not convergence
+    trainer = EarlyStoppingTrainer(max_epochs=epochs, patience=epochs)
+
+    if mini_batch:
+        sampler = NeighborSampler(edge_index, num_students, num_neighbors=GNN_MINI_BATCH["num_neighbors"],
+                                  batch_size=GNN_MINI_BATCH["batch_size"], seed=42)
+        stats = trainer.fit(
+            model, optimizer,
+            lambda m, b: m(x[b.n_id], b.edge_index, edge_type[b.edge_ids])[:b.batch_size].norm(p=2).mean(),
+            batches=sampler,
+        )
+    else:
+        stats = trainer.fit(
+            model, optimizer, lambda m: m(x, edge_index, edge_type).norm(p=2).mean(), num_nodes=num_students
+        )
+
+    return {
+        "num_students": num_students,
+        "num_edges": int(edge_index.shape[1]),
+        "mode": "mini_batch" if mini_batch else "full_batch",
+        "epochs": stats["epochs_run"],
+        "mean_epoch_time": stats["mean_epoch_time"],
+        "nodes_per_second": stats["nodes_per_second"],
+        "sampled_nodes_per_second": stats["sampled_nodes_per_second"],
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--epochs", type=int, default=3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for num_students in args.sizes:
+        for mini_batch in (False, True):
+            with context.Pool(1) as pool:
+                row = pool.apply(_train, ((num_students, mini_batch, args.epochs),))
+            rows.append(row)
+            print(json.dumps(row))
+
+    print(f"{'students':>8} {'mode':>11} {'s/epoch':>8} {'nodes/s':>10} {'peak MB':>8}")
+    for r in rows:
+        print(f"{r['num_students']:>8} {r['mode']:>11} {r['mean_epoch_time']:>8.3f} "
+              f"{r['nodes_per_second']:>10} {r['peak_rss_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
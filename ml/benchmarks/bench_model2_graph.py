@@ -0,0 +1,154 @@
+"""
+Latency of the in-process part of /run_model2 with the former networkx graph
+against the array-backed CSRGraph: graph construction, PyG conversion,
+GraphSAGE embeddings, allocation and the edge-type alignment done before the
+relationships are saved. Database reads are served from in-memory frames and
+the writes are skipped, so only the pipeline's own compute is measured.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_model2_graph --students 1000 10000 50000
+"""
+import argparse
+import re
+import time
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import torch
+
+from ml.benchmarks.synthetic import synthetic_cohort
+from ml.build_graph_from_db import RELATIONSHIPS_UNION
+from ml.model_2.allocation import allocate_students
+from ml.model_2.construct_graph import construct_graph
+from ml.model_2.graph_conversion import graph_edge_types, preprocessing
+from ml.model_2.model2 import generate_embeddings
+from ml.model_2.participant_attributes import PARTICIPANT_METRICS
+
+LEGACY_TABLES = ["friends", "influential", "feedback", "more_time", "advice", "disrespect"]
+
+
+class FrameDB:
+    """Answers the read queries of construct_graph from synthetic frames."""
+
+    def __init__(self, participants, relationships):
+        self.participants = participants
+        self.relationships = relationships
+
+    def query_df(self, query, data=None):
+        if "raw.participants" in query:
+            return self.participants.copy()
+        if query == RELATIONSHIPS_UNION:
+            return self.relationships.copy()
+        table = re.search(r"FROM raw\.(\w+)", query).group(1)
+        edge_type = LEGACY_TABLES.index(table)
+        frame = self.relationships[self.relationships["edge_type"] == edge_type]
+        return frame[["source", "target"]].reset_index(drop=True)
+
+    def fetch_all(self, query, data=None):
+        # No data version: embeddings are computed, not read from the store
+        return None
+
+    def rollback(self):
+        pass
+
+
+def legacy_construct_graph(db, cohort=None):
+    """The networkx construct_graph /run_model2 used before CSRGraph."""
+    graph = nx.DiGraph(cohort=str(cohort) if cohort else None, data_version=None)
+    df_participants = db.query_df("SELECT participant_id, perc_academic, perc_effort, attendance, cohort "
+                                  "FROM raw.participants")
+    for _, row in df_participants.iterrows():
+        graph.add_node(
+            row['participant_id'],
+            perc_academic=row['perc_academic'],
+            perc_effort=row['perc_effort'],
+            attendance=row['attendance']
+        )
+    for edge_type, table_name in enumerate(LEGACY_TABLES):
+        df_relationships = db.query_df(f"SELECT source, target FROM raw.{table_name}")
+        for _, row in df_relationships.iterrows():
+            graph.add_edge(row['source'], row['target'], edge_type=edge_type)
+    return graph
+
+
+def synthetic_tables(num_students, seed=42):
+    """raw.participants and the relationship rows of one synthetic cohort."""
+    rng = np.random.default_rng(seed)
+    _, edge_index, edge_type = synthetic_cohort(num_students, seed=seed)
+    participant_ids = rng.permutation(np.arange(100000, 100000 + num_students))
+    participants = pd.DataFrame({
+        "participant_id": participant_ids,
+        "perc_academic": rng.uniform(40, 100, num_students).round(1),
+        "perc_effort": rng.uniform(40, 100, num_students).round(1),
+        "attendance": rng.uniform(60, 100, num_students).round(1),
+        "cohort": "2025",
+    })
+    relationships = pd.DataFrame({
+        "source": participant_ids[edge_index[0]],
+        "target": participant_ids[edge_index[1]],
+        "edge_type": edge_type,
+    }).sort_values("edge_type", kind="stable").reset_index(drop=True)
+    return participants, relationships
+
+
+def run_pipeline(build, db, attributes, classrooms):
+    """Runs the /run_model2 compute and returns (per-stage seconds, PyG data)."""
+    timings = {}
+    start = time.perf_counter()
+    graph = build(db)
+    timings["construct"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pyg_data = preprocessing(graph)
+    timings["preprocessing"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    torch.manual_seed(42)
+    pyg_data = generate_embeddings(pyg_data)
+    timings["embeddings"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    allocate_students(data=pyg_data, num_allocations=classrooms, db=db, attributes=attributes)
+    timings["allocation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pyg_data.edge_type = graph_edge_types(graph)
+    timings["edge_types"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    return timings, pyg_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--classrooms", type=int, default=6)
+    args = parser.parse_args()
+
+    stages = ["construct", "preprocessing", "embeddings", "allocation", "edge_types", "total"]
+    print(f"{'students':>8} {'graph':>8} " + " ".join(f"{stage:>13}" for stage in stages))
+    for num_students in args.students:
+        participants, relationships = synthetic_tables(num_students)
+        db = FrameDB(participants, relationships)
+        attributes = participants.set_index("participant_id")[list(PARTICIPANT_METRICS.values())]
+        attributes.columns = list(PARTICIPANT_METRICS)
+
+        legacy_timings, legacy_data = run_pipeline(legacy_construct_graph, db, attributes, args.classrooms)
+        csr_timings, csr_data = run_pipeline(construct_graph, db, attributes, args.classrooms)
+
+        # Same nodes, features and edges in the same order, so the results match
+        assert [int(sid) for sid in legacy_data.student_ids] == csr_data.student_ids
+        assert torch.equal(legacy_data.x, csr_data.x)
+        assert torch.equal(legacy_data.edge_index, csr_data.edge_index)
+        assert torch.equal(legacy_data.edge_type, csr_data.edge_type)
+
+        for name, timings in (("networkx", legacy_timings), ("csr", csr_timings)):
+            print(f"{num_students:>8} {name:>8} " + " ".join(f"{timings[stage]:>13.3f}" for stage in stages))
+        print(f"{'':>8} {'speedup':>8} " + " ".join(
+            f"{legacy_timings[stage] / csr_timings[stage]:>12.1f}x" for stage in stages
+        ))
+
+
+if __name__ == "__main__":
+    main()
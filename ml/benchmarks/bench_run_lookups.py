@@ -0,0 +1,152 @@
+"""
+Latency of the run lookups the analytics make (one run's allocation, one
+relationship type of a run, the run's preserved groups, the latest run) as runs
+accumulate, for three layouts of the run tables: without indexes (as before
+db/migrations.py), with the migration's indexes, and list-partitioned by run.
+The tables are created in a scratch schema of the configured database, which
+is dropped afterwards.
+
+Usage (from the repository root; --config defaults to db/config.json):
+    python -m ml.benchmarks.bench_run_lookups --runs 10 10000
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+from psycopg2 import Error
+
+from db.database import Database
+from db.migrations import create_run_indexes, create_run_tables, ensure_run_partitions
+
+SCHEMA = "bench_run_lookups"
+EDGE_TYPES = ["friend", "influence", "feedback", "more_time", "advice", "disrespect"]
+LAYOUTS = ["no indexes", "indexed", "partitioned"]
+
+LOOKUPS = {
+    "allocation": ("SELECT classroom_id, participant_id FROM {schema}.classroom_allocation "
+                   "WHERE run_number = %s", lambda run: (run,)),
+    "edges by type": ("SELECT source_id, target_id, classroom_id FROM {schema}.edge_relationship "
+                      "WHERE run_number = %s AND relationship_type = %s", lambda run: (run, "friend")),
+    "preserved groups": ("SELECT * FROM {schema}.preserve_edge WHERE run_number = %s", lambda run: (run,)),
+    "latest by id": ("SELECT run_number FROM {schema}.classroom_allocation ORDER BY id DESC LIMIT 1", None),
+    "latest by created_at": ("SELECT run_number FROM {schema}.classroom_allocation "
+                             "ORDER BY created_at DESC LIMIT 1", None),
+}
+
+
+def fill_runs(db, run_numbers, students, edges, seed=42):
+    """Writes `students` allocation rows, `edges` relationships and 4 groups per run."""
+    rng = np.random.default_rng(seed)
+    participant_ids = np.arange(100000, 100000 + students)
+    classrooms = (np.arange(students) % 4).astype(str).tolist()
+    for run_number in run_numbers:
+        db.bulk_insert(f"{SCHEMA}.classroom_allocation", ["run_number", "classroom_id", "participant_id"],
+                       [(run_number, c, p) for c, p in zip(classrooms, participant_ids.tolist())])
+        db.bulk_insert(
+            f"{SCHEMA}.edge_relationship",
+            ["run_number", "source_id", "target_id", "relationship_type", "classroom_id"],
+            list(zip([run_number] * edges, rng.choice(participant_ids, edges).tolist(),
+                     rng.choice(participant_ids, edges).tolist(), rng.choice(EDGE_TYPES, edges).tolist(),
+                     rng.integers(0, 4, edges).tolist())),
+        )
+        db.bulk_insert(f"{SCHEMA}.preserve_edge", ["run_number", "group_id", "friend", "influence", "feedback",
+                                                   "more_time", "advice", "disrespect"],
+                       [(run_number, str(g), *rng.integers(0, 20, 6).tolist()) for g in range(4)])
+
+
+def build(db, layout, num_runs, students, edges):
+    db.execute_query(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    db.execute_query(f"CREATE SCHEMA {SCHEMA}")
+    create_run_tables(db, SCHEMA, partition_by_run=layout == "partitioned")
+    if layout != "no indexes":
+        create_run_indexes(db, SCHEMA)
+    db.commit()
+
+    run_numbers = [str(uuid.uuid4()) for _ in range(num_runs)]
+    start = time.perf_counter()
+    for run_number in run_numbers:
+        if layout == "partitioned":
+            # One transaction per run, as in save_allocations_to_db
+            ensure_run_partitions(db, run_number, SCHEMA)
+        fill_runs(db, [run_number], students, edges)
+    db.execute_query(f"ANALYZE {SCHEMA}.classroom_allocation")
+    db.execute_query(f"ANALYZE {SCHEMA}.edge_relationship")
+    db.execute_query(f"ANALYZE {SCHEMA}.preserve_edge")
+    # ANALYZE of a parent locks every partition and can run out of lock slots
+    db.rollback()
+    return run_numbers, time.perf_counter() - start
+
+
+def time_lookups(db, run_numbers, repeats, seed=0):
+    """Median milliseconds per lookup over `repeats` random runs; None if it failed."""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for name, (query, params) in LOOKUPS.items():
+        query = query.format(schema=SCHEMA)
+        samples = []
+        try:
+            for run_number in rng.choice(run_numbers, repeats):
+                start = time.perf_counter()
+                with db.connection.cursor() as cursor:
+                    cursor.execute(query, params(run_number) if params else None)
+                    cursor.fetchall()
+                samples.append(time.perf_counter() - start)
+            results[name] = statistics.median(samples) * 1000
+        except Error as e:
+            db.rollback()
+            print(f"  {name} failed: {str(e).strip().splitlines()[0]}")
+            results[name] = None
+        db.rollback()
+    return results
+
+
+def drop_schema(db):
+    # Partitions first, in batches: one DROP SCHEMA locks every partition at once
+    while True:
+        partitions = db.fetch_all(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = %s AND c.relkind = 'r' LIMIT 200",
+            (SCHEMA,),
+        )
+        if not partitions:
+            break
+        db.execute_query("DROP TABLE " + ", ".join(f"{SCHEMA}.{name}" for name, in partitions))
+    db.execute_query(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, nargs="+", default=[10, 10000], help="Stored runs")
+    parser.add_argument("--students", type=int, default=200, help="Allocation rows per run")
+    parser.add_argument("--edges", type=int, default=300, help="Relationship rows per run")
+    parser.add_argument("--repeats", type=int, default=50, help="Lookups timed per query")
+    parser.add_argument("--layouts", nargs="+", default=LAYOUTS, choices=LAYOUTS)
+    parser.add_argument("--config", default="config.json", help="Database config, relative to db/ or absolute")
+    args = parser.parse_args()
+
+    db = Database(config_file=args.config)
+    db.connect()
+    rows = {}
+    try:
+        for num_runs in args.runs:
+            for layout in args.layouts:
+                run_numbers, fill_seconds = build(db, layout, num_runs, args.students, args.edges)
+                print(f"{num_runs} runs, {layout}: filled in {fill_seconds:.1f} s")
+                rows[(num_runs, layout)] = time_lookups(db, run_numbers, args.repeats)
+                drop_schema(db)
+    finally:
+        drop_schema(db)
+
+    print(f"\nMedian lookup latency (ms), {args.students} allocation and {args.edges} relationship rows per run")
+    print(f"{'runs':>6} {'layout':>12} " + " ".join(f"{name:>20}" for name in LOOKUPS))
+    for (num_runs, layout), results in rows.items():
+        print(f"{num_runs:>6} {layout:>12} " + " ".join(
+            f"{results[name]:>20.2f}" if results[name] is not None else f"{'failed':>20}" for name in LOOKUPS
+        ))
+    db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
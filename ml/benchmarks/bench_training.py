@@ -0,0 +1,82 @@
+"""
+Epochs saved and end-to-end latency (training + k-means) of the early-stopping
+trainer against the fixed 200-epoch loop, on synthetic cohorts.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_training --sizes 150 500 1000 2000
+"""
+import argparse
+import json
+import time
+
+import torch
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+from ml.cluster_with_gnn_with_constraints import GNN_HYPERPARAMETERS, ImprovedClassForgeGNN
+from ml.trainer import EarlyStoppingTrainer
+from ml.benchmarks.synthetic import synthetic_cohort
+
+
+def run(x, edge_index, edge_type, num_clusters, trainer):
+    """Trains a freshly seeded model with `trainer` and clusters its embeddings."""
+    torch.manual_seed(42)
+    model = ImprovedClassForgeGNN(
+        in_channels=x.shape[1],
+        hidden_channels=GNN_HYPERPARAMETERS["hidden_channels"],
+        embedding_size=GNN_HYPERPARAMETERS["embedding_size"],
+        num_relations=len(set(edge_type.tolist())),
+    )
+    optimizer = torch.optim.Adam(model.parameters(), lr=GNN_HYPERPARAMETERS["lr"])
+
+    start = time.perf_counter()
+    stats = trainer.fit(model, optimizer, lambda m: m(x, edge_index, edge_type).norm(p=2).mean())
+    with torch.no_grad():
+        embeddings = model(x, edge_index, edge_type).cpu().numpy()
+    labels = KMeans(n_clusters=num_clusters, random_state=42).fit_predict(embeddings)
+    stats["end_to_end_time"] = round(time.perf_counter() - start, 4)
+    return labels, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[150, 500, 1000, 2000])
+    parser.add_argument("--classrooms", type=int, default=6)
+    args = parser.parse_args()
+
+    max_epochs = GNN_HYPERPARAMETERS["max_epochs"]
+    rows = []
+    for num_students in args.sizes:
+        x, edge_index, edge_type = synthetic_cohort(num_students)
+        x, edge_index, edge_type = torch.tensor(x), torch.tensor(edge_index), torch.tensor(edge_type)
+
+        # patience == max_epochs reproduces the fixed-length loop
+        fixed_labels, fixed = run(x, edge_index, edge_type, args.classrooms,
+                                  EarlyStoppingTrainer(max_epochs=max_epochs, patience=max_epochs))
+        early_labels, early = run(x, edge_index, edge_type, args.classrooms, EarlyStoppingTrainer(
+            max_epochs=max_epochs, patience=GNN_HYPERPARAMETERS["patience"],
+            min_delta=GNN_HYPERPARAMETERS["min_delta"],
+        ))
+        row = {
+            "num_students": num_students,
+            "fixed_epochs": fixed["epochs_run"],
+            "early_epochs": early["epochs_run"],
+            "stop_reason": early["stop_reason"],
+            "mean_epoch_ms": round(early["mean_epoch_time"] * 1000, 2),
+            "fixed_latency": fixed["end_to_end_time"],
+            "early_latency": early["end_to_end_time"],
+            "speedup": round(fixed["end_to_end_time"] / early["end_to_end_time"], 2),
+            # Agreement of the two k-means partitions (1.0 = identical)
+            "adjusted_rand": round(adjusted_rand_score(fixed_labels, early_labels), 4),
+        }
+        rows.append(row)
+        print(json.dumps(row))
+
+    print(f"{'students':>8} {'epochs':>11} {'ms/epoch':>9} {'fixed s':>8} {'early s':>8} {'speedup':>8} {'ARI':>6}")
+    for r in rows:
+        print(f"{r['num_students']:>8} {r['fixed_epochs']:>5}->{r['early_epochs']:<5} {r['mean_epoch_ms']:>9} "
+              f"{r['fixed_latency']:>8} {r['early_latency']:>8} {r['speedup']:>8} {r['adjusted_rand']:>6}")
+
+
+if __name__ == "__main__":
+    main()
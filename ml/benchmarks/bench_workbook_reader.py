@@ -0,0 +1,93 @@
+"""
+Parse time of the sheets a survey import reads (participants, responses and
+the six net_* sheets): pd.ExcelFile.parse one sheet at a time, as the import
+used to, against read_workbook_sheets in-process and with one worker process
+per sheet, for every available engine. The synthetic workbook has the import's
+sheets plus filler sheets, with `--rows` rows in each.
+
+Usage (from the repository root):
+    python -m ml.benchmarks.bench_workbook_reader --sheets 20 --rows 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml.workbook_reader import FAST_ENGINE, read_workbook_sheets
+
+NETWORK_SHEETS = ["net_0_Friends", "net_1_Influential", "net_2_Feedback",
+                  "net_3_MoreTime", "net_4_Advice", "net_5_Disrespect"]
+IMPORT_SHEETS = ["participants", "responses", *NETWORK_SHEETS]
+
+
+def synthetic_workbook(path, num_sheets, num_rows, seed=42):
+    """Writes the import's sheets, then filler sheets up to `num_sheets`."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(100000, 100000 + num_rows)
+    sheets = {
+        "participants": pd.DataFrame({
+            "Participant-ID": ids,
+            "First-Name": [f"First{i}" for i in range(num_rows)],
+            "Last-Name": [f"Last{i}" for i in range(num_rows)],
+            "Perc_Effort": rng.uniform(40, 100, num_rows).round(1),
+            "Attendance": rng.uniform(60, 100, num_rows).round(1),
+            "Perc_Academic": rng.uniform(40, 100, num_rows).round(1),
+            "House": rng.choice(["Red", "Blue", "Green", "Gold"], num_rows),
+        }),
+        "responses": pd.DataFrame(
+            {"Participant-ID": ids, "Status": "Completed"}
+            | {f"Manbox5_{i}": rng.integers(1, 6, num_rows) for i in range(1, 6)}
+        ),
+    }
+    for sheet in NETWORK_SHEETS:
+        sheets[sheet] = pd.DataFrame({"Source": rng.choice(ids, num_rows), "Target": rng.choice(ids, num_rows)})
+    for i in range(len(sheets), num_sheets):
+        sheets[f"filler_{i}"] = pd.DataFrame(rng.uniform(0, 1, (num_rows, 4)), columns=list("ABCD"))
+
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+
+def legacy_parse(path):
+    """The sheet-by-sheet parse the import used before read_workbook_sheets."""
+    with pd.ExcelFile(path) as xls:
+        return {name: xls.parse(name) for name in IMPORT_SHEETS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sheets", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50000, help="Rows per sheet")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size, defaults to min(sheets, CPU count)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "survey.xlsx")
+        start = time.perf_counter()
+        synthetic_workbook(path, args.sheets, args.rows)
+        print(f"Wrote {args.sheets} sheets x {args.rows} rows ({os.path.getsize(path) / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - start:.1f} s; {os.cpu_count()} CPUs")
+
+        start = time.perf_counter()
+        expected = legacy_parse(path)
+        legacy_time = time.perf_counter() - start
+        print(f"{'reader':>32} {'workers':>8} {'seconds':>8} {'speedup':>8}")
+        print(f"{'ExcelFile.parse (openpyxl)':>32} {1:>8} {legacy_time:>8.2f} {1:>7.1f}x")
+
+        engines = ["openpyxl"] + ([FAST_ENGINE] if FAST_ENGINE else [])
+        for engine in engines:
+            for workers in (1, args.workers or os.cpu_count() or 1):
+                sheets, stats = read_workbook_sheets(path, IMPORT_SHEETS, engine=engine, max_workers=workers)
+                for name in IMPORT_SHEETS:
+                    pd.testing.assert_frame_equal(expected[name], sheets[name])
+                label = f"read_workbook_sheets ({engine})"
+                print(f"{label:>32} {stats['workers']:>8} {stats['total_seconds']:>8.2f} "
+                      f"{legacy_time / stats['total_seconds']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import torch
 import json
@@ -8,6 +9,7 @@ from sqlalchemy import create_engine
 # from db_config import load_db_url
 from pathlib import Path
 import uuid
+from .embedding_store import raw_data_version
 # from db.db_manager import get_db
 
 
@@ -22,7 +24,114 @@ import uuid
 #    dbname = config["dbname"]
 #    return f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
 
-def build_graph_from_db(db,cohort=None):
+EDGE_TYPE = {
+    "friend": 0,
+    "influence": 1,
+    "feedback": 2,
+    "more_time": 3,
+    "advice": 4,
+    "disrespect": 5
+}
+
+network_tables = {
+    "friend": "raw.friends",
+    "influence": "raw.influential",
+    "feedback": "raw.feedback",
+    "more_time": "raw.more_time",
+    "advice": "raw.advice",
+    "disrespect": "raw.disrespect"
+}
+
+RELATIONSHIPS_UNION = " UNION ALL ".join(
+    f"SELECT source, target, {EDGE_TYPE[relation]}::smallint AS edge_type FROM {table}"
+    for relation, table in network_tables.items()
+)
+
+
+def load_relationship_edges(db, cohort=None, report=False):
+    """
+    Fetches all six relationship tables in one UNION ALL query with a typed
+    `edge_type` column. With a cohort, both endpoints are joined against that
+    cohort's participants on the server, so other cohorts' edges never leave
+    the database.
+
+    Args:
+        db (Database): An instance of the Database class.
+        cohort (int | str, optional): Cohort to keep, bound as a query parameter.
+        report (bool): Also count the unfiltered rows and print how many rows
+            the cohort filter saved. For benchmarking and debugging only: the
+            count is an extra scan over all six tables.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: Frame with `source`, `target`, `edge_type` columns,
+        and the rows transferred with and without the cohort filter.
+    """
+    if cohort:
+        query = f"""
+            WITH cohort_ids AS (
+                SELECT DISTINCT participant_id FROM raw.participants WHERE cohort = %(cohort)s
+            )
+            SELECT r.source, r.target, r.edge_type
+            FROM ({RELATIONSHIPS_UNION}) r
+            JOIN cohort_ids s ON s.participant_id = r.source
+            JOIN cohort_ids t ON t.participant_id = r.target
+        """
+        relationships = db.query_df(query, {"cohort": str(cohort)})
+    else:
+        relationships = db.query_df(RELATIONSHIPS_UNION)
+    if relationships is None:
+        relationships = pd.DataFrame(columns=["source", "target", "edge_type"])
+
+    stats = {"rows_transferred": len(relationships), "rows_unfiltered": None}
+    if report:
+        if cohort:
+            row = db.fetch_one(f"SELECT COUNT(*) FROM ({RELATIONSHIPS_UNION}) r")
+            stats["rows_unfiltered"] = int(row[0]) if row else None
+        else:
+            stats["rows_unfiltered"] = len(relationships)
+        print(f"- Relationship rows transferred: {stats['rows_transferred']} "
+              f"(without cohort filter: {stats['rows_unfiltered']})")
+    return relationships, stats
+
+
+def edges_from_frames(edge_frames, participant_ids):
+    """
+    Maps relationship rows onto node indices in one vectorised pass per table.
+    Rows with a missing source/target or an id outside `participant_ids` are dropped.
+
+    Args:
+        edge_frames (list[tuple[pd.DataFrame, int]]): (frame with `source`/`target`
+            columns, edge type) per relationship table.
+        participant_ids (pd.Series): Participant id of every node, in node order.
+
+    Returns:
+        tuple[torch.Tensor, torch.Tensor]: edge_index [2, num_edges] and edge_type [num_edges].
+    """
+    # Duplicate ids resolve to their last node, like a dict built from the ids
+    node_of = pd.Series(np.arange(len(participant_ids)), index=pd.Index(participant_ids))
+    node_of = node_of[~node_of.index.duplicated(keep="last")]
+    node_positions = node_of.to_numpy()
+
+    sources, targets, types = [], [], []
+    for df, relation_type in edge_frames:
+        if df is None or df.empty:
+            continue
+        # get_indexer returns -1 for NaN and unknown ids
+        src = node_of.index.get_indexer(df["source"])
+        tgt = node_of.index.get_indexer(df["target"])
+        known = (src >= 0) & (tgt >= 0)
+        sources.append(node_positions[src[known]])
+        targets.append(node_positions[tgt[known]])
+        types.append(np.full(int(known.sum()), relation_type, dtype=np.int64))
+
+    if not sources or sum(len(part) for part in sources) == 0:
+        return torch.empty((2, 0), dtype=torch.long), torch.empty((0,), dtype=torch.long)
+    edge_index = torch.from_numpy(np.stack([np.concatenate(sources), np.concatenate(targets)]).astype(np.int64))
+    edge_type = torch.from_numpy(np.concatenate(types))
+    return edge_index, edge_type
+
+
+def build_graph_from_db(db,cohort=None,data_version=None):
     #engine = create_engine(db_url)
 
     ## === Load participants ===
@@ -43,34 +152,15 @@ def build_graph_from_db(db,cohort=None):
 
      #Fetch participant data of respective cohort if any for node features
 
-    EDGE_TYPE = {
-        "friend": 0,
-        "influence": 1,
-        "feedback": 2,
-        "more_time": 3,
-        "advice": 4,
-        "disrespect": 5
-    }
-
-    network_tables = {
-        "friend": "raw.friends",
-        "influence": "raw.influential",
-        "feedback": "raw.feedback",
-        "more_time": "raw.more_time",
-        "advice": "raw.advice",
-        "disrespect": "raw.disrespect"
-    }
-
     participants_query = """
         SELECT participant_id, perc_academic, perc_effort, attendance, complete_years, cohort 
         FROM raw.participants
-        """ + (f" WHERE cohort = '{cohort}'" if cohort else "")
-    participants = db.query_df(participants_query)
+        """ + (" WHERE cohort = %(cohort)s" if cohort else "")
+    participants = db.query_df(participants_query, {"cohort": str(cohort)} if cohort else None)
     print(participants,"-------------")
 
     participants["participant_id"] = participants["participant_id"].astype(int)
 
-    id_to_index = {pid: idx for idx, pid in enumerate(participants["participant_id"])}
     num_nodes = len(participants)
     # === Feature processing ===
     feature_cols = ["perc_effort", "attendance", "perc_academic", "complete_years"]
@@ -85,36 +175,16 @@ def build_graph_from_db(db,cohort=None):
     x = torch.tensor(scaler.fit_transform(participants[feature_cols]), dtype=torch.float)
 
     # === Build edges ===
-    edge_index = []
-    edge_type = []
-
-    def add_edges(df, relation):
-        for _, row in df.iterrows():
-            src = row["source"]
-            tgt = row["target"]
-            if pd.isna(src) or pd.isna(tgt):
-                continue
-            if src not in id_to_index or tgt not in id_to_index:
-                continue
-            edge_index.append([id_to_index[int(src)], id_to_index[int(tgt)]])
-            edge_type.append(EDGE_TYPE[relation])
-
-    for relation, table in network_tables.items():
-        #df = pd.read_sql(f"SELECT source, target FROM {table}", engine)
-        relation_query = f"SELECT source, target FROM {table}"
-        df = db.query_df(relation_query)
-        add_edges(df, relation)
-
-    if edge_index:
-        edge_index = torch.tensor(edge_index, dtype=torch.long).t().contiguous()
-        edge_type = torch.tensor(edge_type, dtype=torch.long)
-    else:
-        edge_index = torch.empty((2, 0), dtype=torch.long)
-        edge_type = torch.empty((0,), dtype=torch.long)
+    relationships, _ = load_relationship_edges(db, cohort)
+    edge_frames = [(frame, relation_type) for relation_type, frame in relationships.groupby("edge_type")]
+    edge_index, edge_type = edges_from_frames(edge_frames, participants["participant_id"])
 
     y = torch.randint(0, 3, (num_nodes,), dtype=torch.long)
     graph = Data(x=x, edge_index=edge_index, edge_type=edge_type, y=y)
     graph.participant_ids = torch.tensor(participants["participant_id"].values, dtype=torch.long)
+    # Key of the embedding store: embeddings are reused while the raw tables are unchanged
+    graph.cohort = str(cohort) if cohort else None
+    graph.data_version = data_version or raw_data_version(db)
 
     #torch.save(data, "data/student_graph.pt")
     #print("Graph saved to data/student_graph.pt")
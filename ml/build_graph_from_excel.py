@@ -2,6 +2,7 @@ import pandas as pd
 import torch
 from sklearn.preprocessing import StandardScaler
 from torch_geometric.data import Data
+from ml.workbook_reader import read_workbook_sheets
 
 EDGE_TYPE = {
     "friend": 0,
@@ -22,8 +23,10 @@ network_sheets = {
 }
 
 def build_graph_from_excel(file_path):
-    xl = pd.ExcelFile(file_path)
-    participants = xl.parse("participants")
+    # Participants and the six network sheets are parsed concurrently
+    sheets, parse_stats = read_workbook_sheets(file_path, ["participants", *network_sheets.values()])
+    print(f"Parsed {len(sheets)} sheets in {parse_stats['total_seconds']} s ({parse_stats['engine']})")
+    participants = sheets["participants"]
     # participants = participants.dropna(subset=["Participant-ID"])
     participants["Participant-ID"] = participants["Participant-ID"].astype(int)
 
@@ -50,7 +53,7 @@ def build_graph_from_excel(file_path):
     edge_type = []
 
     for relation, sheet in network_sheets.items():
-        df = xl.parse(sheet)
+        df = sheets[sheet]
 
         for _, row in df.iterrows():
             source_id = row.get("Source")
@@ -3,6 +3,7 @@ import torch.nn.functional as F
 from sklearn.cluster import KMeans
 from torch_geometric.data import Data
 from torch_geometric.nn import SAGEConv, GATConv, RGCNConv
+from ml.trainer import EarlyStoppingTrainer
 
 # -------------------------
 # Improved GNN Definition
@@ -39,24 +40,20 @@ model = ImprovedClassForgeGNN(
 )
 
 optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-model.train()
 
 # -------------------------
-# Train GNN
+# Train GNN (stops early once the loss plateaus)
 # -------------------------
-for epoch in range(200):
-    optimizer.zero_grad()
-    embeddings = model(data.x, data.edge_index, data.edge_type)
-    loss = embeddings.norm(p=2).mean()  # Simple unsupervised loss
-    loss.backward()
-    optimizer.step()
-    if epoch % 25 == 0:
-        print(f"Epoch {epoch} | Loss: {loss.item():.4f}")
+trainer = EarlyStoppingTrainer(max_epochs=200, patience=10, min_delta=1e-4, max_seconds=60, log_every=25)
+training_stats = trainer.fit(
+    model, optimizer,
+    lambda m: m(data.x, data.edge_index, data.edge_type).norm(p=2).mean()  # Simple unsupervised loss
+)
+print(f"Mean epoch time: {training_stats['mean_epoch_time'] * 1000:.1f} ms")
 
 # -------------------------
 # Inference & Clustering
 # -------------------------
-model.eval()
 with torch.no_grad():
     embeddings = model(data.x, data.edge_index, data.edge_type).cpu().numpy()
 
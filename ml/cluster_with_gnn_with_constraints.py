@@ -1,11 +1,26 @@
 import os
+import numpy as np
 import torch
 import torch.nn.functional as F
 from sklearn.cluster import KMeans
-from ortools.sat.python import cp_model
 from torch_geometric.data import Data
 from torch_geometric.nn import SAGEConv, GATConv, RGCNConv
 from .preserved_relationship import compute_preserved_relationships
+from .allocation_solver import (
+    SOLVER_BACKENDS,
+    aggregate_edge_pairs,
+    balanced_hint,
+    edge_coefficients,
+    solve_integer_allocation,
+    solve_one_hot_allocation,
+)
+from .decomposition_solver import solve_decomposed_allocation
+from .local_search import LocalSearchRefiner
+from .embedding_store import get_embedding_store, model_version
+from .model_cache import get_model_cache, graph_fingerprint
+from .solver_profiles import get_solver_profile
+from .neighbor_sampling import DEFAULT_NUM_NEIGHBORS, NeighborSampler
+from .trainer import EarlyStoppingTrainer
  
 class ImprovedClassForgeGNN(torch.nn.Module):
     def __init__(self, in_channels, hidden_channels, embedding_size, num_relations):
@@ -23,121 +38,171 @@ class ImprovedClassForgeGNN(torch.nn.Module):
         x_rgcn = self.rgcn(x_gat, edge_index, edge_type)
         x_all = torch.cat([x_sage, x_gat, x_rgcn], dim=1)
         return F.normalize(self.fusion(x_all), p=2, dim=1)
- 
-def cluster_students_with_gnn(graph, num_clusters):
+
+
+# Model and training settings, part of the model cache key
+GNN_HYPERPARAMETERS = {
+    "hidden_channels": 32, "embedding_size": 16, "lr": 0.01,
+    "max_epochs": 200, "patience": 10, "min_delta": 1e-4,
+}
+# Neighbour-sampled mini-batch settings, added to the cache key when used
+GNN_MINI_BATCH = {"batch_size": 512, "num_neighbors": list(DEFAULT_NUM_NEIGHBORS)}
+# Graphs with at least this many nodes train in mini-batches unless told otherwise
+MINI_BATCH_MIN_NODES = 20000
+# Wall-clock cap on GNN training per request
+GNN_TRAIN_SECONDS = 60
+
+
+def train_gnn_embeddings(graph, use_cache=True, log_progress=False, max_seconds=GNN_TRAIN_SECONDS,
+                         mini_batch=None):
     """
-    Function to perform GNN-based clustering with constraints.
+    Trains ImprovedClassForgeGNN on the graph and returns its final node embeddings.
+    Graphs built from the database (with `cohort`, `data_version` and `participant_ids`)
+    are served from the embedding store while the raw tables are unchanged; otherwise
+    results are cached by graph fingerprint, so an unchanged cohort skips training.
+
     Args:
-        graph (torch_geometric.data.Data): Input graph data.
-        num_clusters (int): Number of clusters (classrooms) to assign.
+        graph (torch_geometric.data.Data): Graph with `x`, `edge_index` and `edge_type`.
+        use_cache (bool): Read and write the shared model cache.
+        log_progress (bool): Print the loss every 25 epochs.
+        max_seconds (float, optional): Training budget; training also stops early once
+            the loss plateaus.
+        mini_batch (bool, optional): Train on neighbour-sampled mini-batches so memory is
+            bounded by the batch instead of the whole graph. None enables it for graphs
+            with at least MINI_BATCH_MIN_NODES nodes.
+
     Returns:
-        torch_geometric.data.Data: Clustered graph data with assignments.
+        tuple[np.ndarray, dict]: Embeddings [num_nodes, embedding_size] and cache and
+        training statistics.
     """
-    model = ImprovedClassForgeGNN(
+    hyperparameters = dict(
+        GNN_HYPERPARAMETERS,
         in_channels=graph.num_node_features,
-        hidden_channels=32,
-        embedding_size=16,
-        num_relations=len(set(graph.edge_type.tolist()))
+        num_relations=len(set(graph.edge_type.tolist())),
+    )
+    if mini_batch is None:
+        mini_batch = graph.num_nodes >= MINI_BATCH_MIN_NODES
+    if mini_batch:
+        hyperparameters["mini_batch"] = GNN_MINI_BATCH
+    cache = get_model_cache()
+
+    store, version = get_embedding_store(), model_version("improved_gnn", hyperparameters)
+    cohort, data_version = getattr(graph, "cohort", None), getattr(graph, "data_version", None)
+    use_store = use_cache and data_version is not None and hasattr(graph, "participant_ids")
+    if use_store:
+        stored = store.load(cohort, version, data_version, graph.participant_ids.tolist())
+        if stored is not None:
+            print(f"Embedding store hit for cohort {cohort} ({version}), skipping training")
+            return np.asarray(stored[0]), dict(cache.stats(), hit=True, source="embedding_store")
+
+    key = graph_fingerprint(graph, hyperparameters)
+    cached = cache.get(key) if use_cache else None
+    if cached is not None:
+        print(f"GNN cache hit for {key[:12]}, skipping training")
+        embeddings = cached["embeddings"]
+        if use_store:
+            store.save(cohort, version, data_version, graph.participant_ids.tolist(), embeddings)
+        return embeddings, dict(cache.stats(), hit=True, source="model_cache")
+
+    model = ImprovedClassForgeGNN(
+        in_channels=hyperparameters["in_channels"],
+        hidden_channels=hyperparameters["hidden_channels"],
+        embedding_size=hyperparameters["embedding_size"],
+        num_relations=hyperparameters["num_relations"]
     )
 
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-    model.train()
+    optimizer = torch.optim.Adam(model.parameters(), lr=hyperparameters["lr"])
+    trainer = EarlyStoppingTrainer(
+        max_epochs=hyperparameters["max_epochs"],
+        patience=hyperparameters["patience"],
+        min_delta=hyperparameters["min_delta"],
+        max_seconds=max_seconds,
+        log_every=25 if log_progress else None,
+    )
+    if mini_batch:
+        sampler = NeighborSampler(
+            graph.edge_index, graph.num_nodes,
+            num_neighbors=GNN_MINI_BATCH["num_neighbors"], batch_size=GNN_MINI_BATCH["batch_size"],
+        )
 
-    for epoch in range(200):
-        optimizer.zero_grad()
-        embeddings = model(graph.x, graph.edge_index, graph.edge_type)
-        loss = embeddings.norm(p=2).mean()
-        loss.backward()
-        optimizer.step()
-        if epoch % 25 == 0:
-            print(f"Epoch {epoch} | Loss: {loss.item():.4f}")
+        def batch_loss(m, batch):
+            out = m(graph.x[batch.n_id], batch.edge_index, graph.edge_type[batch.edge_ids])
+            return out[:batch.batch_size].norm(p=2).mean()
 
-    model.eval()
+        training_stats = trainer.fit(model, optimizer, batch_loss, batches=sampler)
+    else:
+        training_stats = trainer.fit(
+            model, optimizer,
+            lambda m: m(graph.x, graph.edge_index, graph.edge_type).norm(p=2).mean(),
+            num_nodes=graph.num_nodes,
+        )
+    training_stats.pop("epoch_times")
+
+    # Inference stays full-batch: without autograd it needs far less memory than a training step
     with torch.no_grad():
         embeddings = model(graph.x, graph.edge_index, graph.edge_type).cpu().numpy()
 
-    num_students = embeddings.shape[0]
+    if use_cache:
+        cache.put(key, model.state_dict(), embeddings)
+    if use_store:
+        store.save(cohort, version, data_version, graph.participant_ids.tolist(), embeddings)
+    return embeddings, dict(cache.stats(), hit=False, source="training", training=training_stats)
+
+
+def cluster_students_with_gnn(graph, num_clusters, solver_backend="one_hot", warm_start=True,
+                              previous_allocations=None, solver_profile=None, refine_seconds=0.0,
+                              use_model_cache=True, mini_batch=None):
+    """
+    Function to perform GNN-based clustering with constraints.
+    Args:
+        graph (torch_geometric.data.Data): Input graph data.
+        num_clusters (int): Number of clusters (classrooms) to assign.
+        solver_backend (str): CP-SAT formulation, "one_hot" (default), the original "integer",
+            or "decomposition" to solve blocks of the cohort in parallel.
+        warm_start (bool): Seed CP-SAT with a balanced repair of the k-means labels.
+        previous_allocations (dict, optional): {classroom_id: [participant_id, ...]} of the
+            previous run, used as the starting point for students it covers.
+        solver_profile (str | SolverProfile, optional): "fast", "balanced" (default) or "thorough".
+        refine_seconds (float): Time budget for local-search refinement of the CP-SAT
+            allocation, 0 to skip it.
+        use_model_cache (bool): Reuse the trained GNN of an unchanged cohort graph.
+        mini_batch (bool, optional): Neighbour-sampled mini-batch training, automatic
+            for large graphs when None.
+    Returns:
+        torch_geometric.data.Data: Clustered graph data with assignments and `solver_stats`.
+    """
+    if solver_backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend '{solver_backend}'. Expected one of {SOLVER_BACKENDS}")
+    solver_profile = get_solver_profile(solver_profile)
+
+    embeddings, gnn_stats = train_gnn_embeddings(
+        graph, use_cache=use_model_cache, log_progress=True, mini_batch=mini_batch
+    )
+
     kmeans = KMeans(n_clusters=num_clusters, random_state=42)
     preferred_clusters = kmeans.fit_predict(embeddings)
 
-    model_cp = cp_model.CpModel()
-    # Assign classroom IDs starting from 1
-    assignments = [model_cp.NewIntVar(1, num_clusters, f"student_{i}") for i in range(num_students)]
-
-    # Balanced size constraints
-    base = num_students // num_clusters
-    remainder = num_students % num_clusters
-    min_per_class = base
-    max_per_class = base + 1 if remainder > 0 else base
-
-    for c in range(1, num_clusters + 1):
-        class_members = []
-        for i in range(num_students):
-            is_in_class = model_cp.NewBoolVar(f"is_{i}_in_class_{c}")
-            model_cp.Add(assignments[i] == c).OnlyEnforceIf(is_in_class)
-            model_cp.Add(assignments[i] != c).OnlyEnforceIf(is_in_class.Not())
-            class_members.append(is_in_class)
-        model_cp.Add(sum(class_members) >= min_per_class)
-        model_cp.Add(sum(class_members) <= max_per_class)
-
-    # Match preferred k-means cluster (adjusted for 1-indexed cluster IDs)
-    match_vars = []
-    for i in range(num_students):
-        match = model_cp.NewBoolVar(f"match_{i}")
-        model_cp.Add(assignments[i] == (preferred_clusters[i] + 1)).OnlyEnforceIf(match)
-        model_cp.Add(assignments[i] != (preferred_clusters[i] + 1)).OnlyEnforceIf(match.Not())
-        match_vars.append(match)
-
     # Handle relationship-based bonuses/penalties
     friend_rels = {0, 1, 2, 3, 4}  # example: friends, advice, influence, etc.
     disrespect_rels = {5}         # example: disrespect relation
-
-    friend_bonus = []
-    disrespect_penalty = []
-
-    for idx in range(graph.edge_index.shape[1]):
-        src, tgt = graph.edge_index[:, idx].tolist()
-        rel = int(graph.edge_type[idx])
-        same_class = model_cp.NewBoolVar(f"same_class_{src}_{tgt}")
-        model_cp.Add(assignments[src] == assignments[tgt]).OnlyEnforceIf(same_class)
-        model_cp.Add(assignments[src] != assignments[tgt]).OnlyEnforceIf(same_class.Not())
-        if rel in friend_rels:
-            friend_bonus.append(same_class)
-        elif rel in disrespect_rels:
-            disrespect_penalty.append(same_class)
+    relation_weights = {rel: 2 for rel in friend_rels}
+    relation_weights.update({rel: -5 for rel in disrespect_rels})
+    coefficients = edge_coefficients(graph.edge_type.tolist(), relation_weights)
 
     # Objective: maximize match + friendships, minimize disrespect
-    model_cp.Maximize(
-        sum(match_vars) +
-        2 * sum(friend_bonus) -
-        5 * sum(disrespect_penalty)
+    return _allocate_with_cp_sat(
+        graph, num_clusters, preferred_clusters, coefficients, solver_backend, embeddings,
+        warm_start, previous_allocations, solver_profile, refine_seconds, gnn_stats, log_search_progress=True
     )
 
-    # Solve the constraint model
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60
-    solver.parameters.log_search_progress = True
-    status = solver.Solve(model_cp)
 
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        final_assignments = [solver.Value(assignments[i]) for i in range(num_students)]
-        cluster_labels = torch.tensor(final_assignments, dtype=torch.long)
+def cluster_students_with_gnn_with_user_input(graph, num_clusters, relationship_weights, solver_backend="one_hot",
+                                              warm_start=True, previous_allocations=None, solver_profile=None,
+                                              refine_seconds=0.0, use_model_cache=True, mini_batch=None):
+    if solver_backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend '{solver_backend}'. Expected one of {SOLVER_BACKENDS}")
+    solver_profile = get_solver_profile(solver_profile)
 
-        clustered_data = Data(
-            x=graph.x,
-            edge_index=graph.edge_index,
-            edge_type=graph.edge_type,
-            y=cluster_labels
-        )
-        if hasattr(graph, "participant_ids"):
-            clustered_data.participant_ids = graph.participant_ids
-        print("---------------")
-        return clustered_data, graph
-
-    raise RuntimeError("Clustering failed: No feasible solution found.")
-
-
-def cluster_students_with_gnn_with_user_input(graph, num_clusters, relationship_weights):
     if relationship_weights is None:
         relationship_weights = {
             "friend": 1.0, "influence": 1.0, "feedback": 1.0,
@@ -149,91 +214,63 @@ def cluster_students_with_gnn_with_user_input(graph, num_clusters, relationship_
         3: "more_time", 4: "advice", 5: "disrespect"
     }
 
-    model = ImprovedClassForgeGNN(
-        in_channels=graph.num_node_features,
-        hidden_channels=32,
-        embedding_size=16,
-        num_relations=len(set(graph.edge_type.tolist()))
-    )
+    embeddings, gnn_stats = train_gnn_embeddings(graph, use_cache=use_model_cache, mini_batch=mini_batch)
 
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-    model.train()
-    for epoch in range(200):
-        optimizer.zero_grad()
-        embeddings = model(graph.x, graph.edge_index, graph.edge_type)
-        loss = embeddings.norm(p=2).mean()
-        loss.backward()
-        optimizer.step()
-
-    model.eval()
-    with torch.no_grad():
-        embeddings = model(graph.x, graph.edge_index, graph.edge_type).cpu().numpy()
-
-    num_students = embeddings.shape[0]
     kmeans = KMeans(n_clusters=num_clusters, random_state=42)
     preferred_clusters = kmeans.fit_predict(embeddings)
 
-    model_cp = cp_model.CpModel()
-    assignments = [model_cp.NewIntVar(1, num_clusters, f"student_{i}") for i in range(num_students)]
-
-    # Balanced class sizes
-    base = num_students // num_clusters
-    remainder = num_students % num_clusters
-    min_per_class = base
-    max_per_class = base + 1 if remainder > 0 else base
-
-    for c in range(1, num_clusters + 1):
-        class_members = []
-        for i in range(num_students):
-            is_in_class = model_cp.NewBoolVar(f"is_{i}_in_class_{c}")
-            model_cp.Add(assignments[i] == c).OnlyEnforceIf(is_in_class)
-            model_cp.Add(assignments[i] != c).OnlyEnforceIf(is_in_class.Not())
-            class_members.append(is_in_class)
-        model_cp.Add(sum(class_members) >= min_per_class)
-        model_cp.Add(sum(class_members) <= max_per_class)
-
-    match_vars = []
-    for i in range(num_students):
-        match = model_cp.NewBoolVar(f"match_{i}")
-        model_cp.Add(assignments[i] == (preferred_clusters[i] + 1)).OnlyEnforceIf(match)
-        model_cp.Add(assignments[i] != (preferred_clusters[i] + 1)).OnlyEnforceIf(match.Not())
-        match_vars.append(match)
-
-    # Objective terms (positive or negative)
-    positive_terms = []
-    negative_terms = []
-
-    for idx in range(graph.edge_index.shape[1]):
-        src, tgt = graph.edge_index[:, idx].tolist()
-        rel = int(graph.edge_type[idx])
-        rel_name = edge_type_mapping.get(rel, None)
-        weight = relationship_weights.get(rel_name, 0.0)
-
-        same_class = model_cp.NewBoolVar(f"same_class_{src}_{tgt}")
-        model_cp.Add(assignments[src] == assignments[tgt]).OnlyEnforceIf(same_class)
-        model_cp.Add(assignments[src] != assignments[tgt]).OnlyEnforceIf(same_class.Not())
-
-        if weight != 0:
-            scaled_same = model_cp.NewIntVar(-1000, 1000, f"scaled_{src}_{tgt}")
-            model_cp.AddMultiplicationEquality(scaled_same, [same_class, int(abs(weight * 1000))])
-            if weight > 0:
-                positive_terms.append(scaled_same)
-            else:
-                negative_terms.append(scaled_same)
-
-    # Final objective
-    model_cp.Maximize(
-        sum(match_vars) +
-        sum(positive_terms) -
-        sum(negative_terms)
+    # Objective terms (positive or negative), scaled to integers for CP-SAT
+    relation_weights = {
+        rel: int(relationship_weights.get(rel_name, 0.0) * 1000)
+        for rel, rel_name in edge_type_mapping.items()
+    }
+    coefficients = edge_coefficients(graph.edge_type.tolist(), relation_weights)
+
+    return _allocate_with_cp_sat(
+        graph, num_clusters, preferred_clusters, coefficients, solver_backend, embeddings,
+        warm_start, previous_allocations, solver_profile, refine_seconds, gnn_stats
     )
 
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60
-    status = solver.Solve(model_cp)
 
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        final_assignments = [solver.Value(assignments[i]) for i in range(num_students)]
+def _allocate_with_cp_sat(graph, num_clusters, preferred_clusters, coefficients, solver_backend, embeddings,
+                          warm_start, previous_allocations, solver_profile, refine_seconds=0.0,
+                          gnn_stats=None, log_search_progress=False):
+    """
+    Solves the balanced allocation for the k-means preferences and edge
+    coefficients, optionally refines it with local search, and returns the
+    clustered graph with `solver_stats` attached.
+    """
+    preferred_clusters = preferred_clusters.tolist()
+    edge_index = graph.edge_index.tolist()
+    pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+
+    hint, hint_source = None, None
+    if warm_start:
+        previous_labels = _previous_labels(graph, previous_allocations) if previous_allocations else None
+        hint = balanced_hint(preferred_clusters, num_clusters, pair_weights, previous_labels)
+        has_previous = previous_labels is not None and any(label is not None for label in previous_labels)
+        hint_source = "previous_run" if has_previous else "kmeans"
+
+    if solver_backend == "decomposition":
+        final_assignments, solver_stats = solve_decomposed_allocation(
+            graph.num_nodes, num_clusters, preferred_clusters, edge_index, coefficients,
+            embeddings=embeddings, profile=solver_profile, hint=hint
+        )
+    else:
+        solve = solve_one_hot_allocation if solver_backend == "one_hot" else solve_integer_allocation
+        final_assignments, solver_stats = solve(
+            graph.num_nodes, num_clusters, preferred_clusters, edge_index, coefficients,
+            profile=solver_profile, log_search_progress=log_search_progress, hint=hint
+        )
+    solver_stats["hint_source"] = hint_source
+    solver_stats["gnn"] = gnn_stats
+
+    if final_assignments is not None and refine_seconds > 0:
+        refiner = LocalSearchRefiner(final_assignments, num_clusters, pair_weights, preferred_clusters)
+        final_assignments, solver_stats["local_search"] = refiner.run(time_budget=refine_seconds)
+    print(f"Solver stats: {solver_stats}")
+
+    if final_assignments is not None:
         cluster_labels = torch.tensor(final_assignments, dtype=torch.long)
 
         clustered_data = Data(
@@ -244,10 +281,31 @@ def cluster_students_with_gnn_with_user_input(graph, num_clusters, relationship_
         )
         if hasattr(graph, "participant_ids"):
             clustered_data.participant_ids = graph.participant_ids
+        clustered_data.solver_stats = solver_stats
         return clustered_data, graph
 
     raise RuntimeError("Clustering failed: No feasible solution found.")
 
+
+def _previous_labels(graph, previous_allocations):
+    """
+    Maps a previous run's {classroom_id: [participant_id, ...]} onto the graph's
+    node order. Classroom ids such as "3" or "Classroom_3" become 3; students that
+    were not allocated get None.
+    """
+    if not hasattr(graph, "participant_ids"):
+        return None
+
+    classroom_of = {}
+    for classroom_id, participant_ids in previous_allocations.items():
+        digits = "".join(ch for ch in str(classroom_id).split("_")[-1] if ch.isdigit())
+        if not digits:
+            continue
+        for pid in participant_ids:
+            classroom_of[int(pid)] = int(digits)
+
+    return [classroom_of.get(int(pid)) for pid in graph.participant_ids.tolist()]
+
 # def cluster_students_with_gnn_with_user_input(graph, num_clusters, relationship_weights):
 #     if relationship_weights is None:
 #         relationship_weights = {"friend": 1.0, "influence": 1.0, "feedback": 1.0, "more_time": 1.0, "advice": 1.0, "disrespect": 0.0}
@@ -0,0 +1,303 @@
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+from sklearn.cluster import KMeans
+
+from .allocation_solver import (
+    aggregate_edge_pairs,
+    allocation_objective,
+    repair_class_sizes,
+    solve_one_hot_allocation,
+)
+from .solver_profiles import get_solver_profile
+
+# Ways of splitting the cohort into independent blocks
+PARTITION_METHODS = ("embedding", "graph")
+
+
+def partition_students(num_students, num_blocks, pair_weights, embeddings=None, method="embedding"):
+    """
+    Splits the students into `num_blocks` blocks that are solved independently.
+
+    Args:
+        num_students (int): Number of students (nodes).
+        num_blocks (int): Number of blocks to produce.
+        pair_weights (dict[tuple[int, int], int]): Aggregated edge weights, used by
+            the "graph" method.
+        embeddings (np.ndarray, optional): Node embeddings, required by the
+            "embedding" method.
+        method (str): "embedding" runs k-means on the GNN embeddings, "graph" packs
+            Louvain communities of the positively weighted relationship graph.
+
+    Returns:
+        list[list[int]]: Node indices of every non-empty block.
+    """
+    if method not in PARTITION_METHODS:
+        raise ValueError(f"Unknown partition method '{method}'. Expected one of {PARTITION_METHODS}")
+    if num_blocks <= 1:
+        return [list(range(num_students))]
+
+    if method == "embedding":
+        if embeddings is None:
+            raise ValueError("The 'embedding' partition method requires node embeddings.")
+        block_labels = KMeans(n_clusters=num_blocks, random_state=42).fit_predict(embeddings)
+        blocks = defaultdict(list)
+        for node, block in enumerate(block_labels):
+            blocks[block].append(node)
+        return [members for members in blocks.values() if members]
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(num_students))
+    graph.add_weighted_edges_from((src, tgt, w) for (src, tgt), w in pair_weights.items() if w > 0)
+    communities = nx.community.louvain_communities(graph, weight="weight", seed=42)
+
+    # Pack communities into blocks of roughly equal size, largest first
+    block_size = math.ceil(num_students / num_blocks)
+    chunks = []
+    for community in sorted(communities, key=len, reverse=True):
+        members = sorted(community)
+        chunks.extend(members[i:i + block_size] for i in range(0, len(members), block_size))
+    blocks = [[] for _ in range(num_blocks)]
+    for chunk in sorted(chunks, key=len, reverse=True):
+        min(blocks, key=len).extend(chunk)
+    return [members for members in blocks if members]
+
+
+def block_class_sizes(block_sizes, num_clusters):
+    """
+    Chooses an exact size for every classroom within every block. The spare
+    students of each block go to the classrooms that are smallest so far, so the
+    combined classrooms differ by at most one student.
+    """
+    totals = [0] * num_clusters
+    sizes_per_block = []
+    for block_size in block_sizes:
+        base, remainder = divmod(block_size, num_clusters)
+        sizes = [base] * num_clusters
+        for c in sorted(range(num_clusters), key=lambda c: (totals[c], c))[:remainder]:
+            sizes[c] += 1
+        for c in range(num_clusters):
+            totals[c] += sizes[c]
+        sizes_per_block.append(sizes)
+    return sizes_per_block
+
+
+def _solve_block(task):
+    """
+    Process-pool worker: solves one block with the one-hot backend. The task
+    holds only the block's own nodes and edges, already re-indexed locally.
+    """
+    preferred, edge_index, coefficients, num_clusters, class_sizes, profile, hint = task
+    return solve_one_hot_allocation(
+        len(preferred), num_clusters, preferred, edge_index, coefficients,
+        profile=profile,
+        hint=hint,
+        class_bounds=[(size, size) for size in class_sizes],
+    )
+
+
+def _block_tasks(blocks, sizes_per_block, num_clusters, preferred, pair_weights, profile, hint=None):
+    """
+    Builds one picklable task per block, keeping only the pairs inside the block.
+    """
+    block_of = {}
+    local_index = {}
+    for block_id, members in enumerate(blocks):
+        for idx, node in enumerate(members):
+            block_of[node] = block_id
+            local_index[node] = idx
+
+    block_edges = [([], [], []) for _ in blocks]
+    for (src, tgt), weight in pair_weights.items():
+        if block_of[src] != block_of[tgt]:
+            continue
+        sources, targets, weights = block_edges[block_of[src]]
+        sources.append(local_index[src])
+        targets.append(local_index[tgt])
+        weights.append(weight)
+
+    return [
+        ([preferred[node] for node in members], [sources, targets], weights,
+         num_clusters, sizes, profile,
+         [hint[node] for node in members] if hint is not None else None)
+        for members, sizes, (sources, targets, weights) in zip(blocks, sizes_per_block, block_edges)
+    ]
+
+
+def solve_decomposed_allocation(num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+                                embeddings=None, partition="embedding", block_size=150,
+                                profile=None, max_processes=None, hint=None):
+    """
+    Decomposition backend: partitions the cohort into blocks, solves each block
+    as an independent CP-SAT problem in a process pool and repairs the global
+    class-size balance afterwards. Edges between blocks are ignored while
+    solving but counted in the reported objective.
+
+    Args:
+        num_students, num_clusters, preferred_clusters, edge_index, coefficients:
+            Same as for `solve_one_hot_allocation`.
+        embeddings (np.ndarray, optional): Node embeddings for the "embedding" partition.
+        partition (str): One of PARTITION_METHODS.
+        block_size (int): Target number of students per block.
+        profile (SolverProfile | str, optional): Search settings for the whole solve. Its
+            time limits are split between the rounds needed when there are more blocks
+            than processes, and its workers between the processes.
+        max_processes (int, optional): Pool size, defaults to the CPU count.
+        hint (list[int], optional): 1-indexed starting classroom per student, sliced
+            into per-block solution hints.
+
+    Returns:
+        tuple[list[int] | None, dict]: 1-indexed classroom per student and the solver statistics.
+        Blocks without a CP-SAT solution are counted in "failed_blocks" and make the
+        status "PARTIAL" (see _combined_status).
+    """
+    start = time.perf_counter()
+    pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+    num_blocks = max(1, math.ceil(num_students / block_size))
+    if embeddings is not None:
+        embeddings = np.asarray(embeddings)
+    blocks = partition_students(num_students, num_blocks, pair_weights, embeddings, partition)
+    sizes_per_block = block_class_sizes([len(members) for members in blocks], num_clusters)
+    partition_time = time.perf_counter() - start
+
+    # Share the cores between the processes instead of oversubscribing them
+    cpu_count = os.cpu_count() or 1
+    max_processes = max_processes or min(len(blocks), cpu_count)
+    profile = get_solver_profile(profile)
+    rounds = math.ceil(len(blocks) / max_processes)
+    block_profile = profile.replace(
+        max_time_in_seconds=profile.max_time_in_seconds / rounds,
+        max_deterministic_time=(
+            profile.max_deterministic_time / rounds if profile.max_deterministic_time is not None else None
+        ),
+        num_workers=max(1, (profile.num_workers or cpu_count) // max_processes),
+    )
+    preferred = [int(c) for c in preferred_clusters]
+    tasks = _block_tasks(blocks, sizes_per_block, num_clusters, preferred, pair_weights, block_profile, hint)
+
+    solve_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_processes) as pool:
+        results = list(pool.map(_solve_block, tasks))
+    solve_time = time.perf_counter() - solve_start
+
+    # Blocks without a solution fall back to their k-means preference and are fixed by the repair
+    labels = [0] * num_students
+    failed_blocks = 0
+    for members, (block_labels, _) in zip(blocks, results):
+        if block_labels is None:
+            failed_blocks += 1
+            block_labels = [preferred[node] + 1 for node in members]
+        for node, label in zip(members, block_labels):
+            labels[node] = label
+
+    repair_start = time.perf_counter()
+    repair_moves = repair_class_sizes(labels, num_clusters, preferred, pair_weights)
+    repair_time = time.perf_counter() - repair_start
+
+    stats = {
+        "backend": "decomposition",
+        "profile": profile.name,
+        "status": _combined_status(failed_blocks, len(blocks)),
+        "partition": partition,
+        "num_blocks": len(blocks),
+        "block_sizes": [len(members) for members in blocks],
+        "num_processes": max_processes,
+        "hinted": hint is not None,
+        "failed_blocks": failed_blocks,
+        "block_statuses": [block_stats["status"] for _, block_stats in results],
+        "partition_time": round(partition_time, 4),
+        "model_build_time": round(sum(block_stats["model_build_time"] for _, block_stats in results), 4),
+        "num_variables": sum(block_stats["num_variables"] for _, block_stats in results),
+        "num_constraints": sum(block_stats["num_constraints"] for _, block_stats in results),
+        "solve_time": round(solve_time, 4),
+        "num_branches": sum(block_stats["num_branches"] for _, block_stats in results),
+        "num_conflicts": sum(block_stats["num_conflicts"] for _, block_stats in results),
+        "time_to_first_feasible": _slowest_block(results, "time_to_first_feasible"),
+        "time_to_best": _slowest_block(results, "time_to_best"),
+        "repair_moves": repair_moves,
+        "repair_time": round(repair_time, 4),
+        "wall_time": round(time.perf_counter() - start, 4),
+        "num_edges": len(coefficients),
+        "num_edge_pairs": len(pair_weights),
+        "objective": allocation_objective(labels, preferred, pair_weights),
+    }
+    return labels, stats
+
+
+def _combined_status(failed_blocks, num_blocks):
+    """
+    "FEASIBLE" when every block was solved, "PARTIAL" when some blocks fell back
+    to their k-means preference, "UNKNOWN" when all of them did.
+    """
+    if failed_blocks == 0:
+        return "FEASIBLE"
+    return "PARTIAL" if failed_blocks < num_blocks else "UNKNOWN"
+
+
+def _slowest_block(results, key):
+    """
+    Blocks run concurrently, so a timing for the whole cohort is reached only once
+    the slowest block reaches it.
+    """
+    values = [block_stats[key] for _, block_stats in results]
+    return None if any(value is None for value in values) else max(values)
+
+
+def compare_with_monolithic(num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+                            embeddings=None, partition="embedding", block_size=150, profile=None):
+    """
+    Quality-vs-time report: solves the same problem with the monolithic one-hot
+    backend and with the decomposition backend, and scores both allocations with
+    the full objective (including edges between blocks).
+
+    Returns:
+        dict: Objective, wall time and status of each approach plus their ratios.
+    """
+    pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+
+    start = time.perf_counter()
+    mono_labels, mono_stats = solve_one_hot_allocation(
+        num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+        profile=profile,
+    )
+    mono_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decomp_labels, decomp_stats = solve_decomposed_allocation(
+        num_students, num_clusters, preferred_clusters, edge_index, coefficients,
+        embeddings=embeddings, partition=partition, block_size=block_size,
+        profile=profile,
+    )
+    decomp_time = time.perf_counter() - start
+
+    mono_objective = (
+        allocation_objective(mono_labels, preferred_clusters, pair_weights) if mono_labels is not None else None
+    )
+    decomp_objective = decomp_stats["objective"]
+
+    return {
+        "num_students": num_students,
+        "num_clusters": num_clusters,
+        "num_edge_pairs": len(pair_weights),
+        "monolithic": {
+            "status": mono_stats["status"],
+            "objective": mono_objective,
+            "wall_time": round(mono_time, 4),
+        },
+        "decomposition": {
+            "status": decomp_stats["status"],
+            "objective": decomp_objective,
+            "wall_time": round(decomp_time, 4),
+            "num_blocks": decomp_stats["num_blocks"],
+            "repair_moves": decomp_stats["repair_moves"],
+        },
+        "objective_ratio": (
+            round(decomp_objective / mono_objective, 4) if mono_objective else None
+        ),
+        "speedup": round(mono_time / decomp_time, 2) if decomp_time > 0 else None,
+    }
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from psycopg2 import Error
+from psycopg2.errors import UndefinedTable
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "CLASSFORGE_EMBEDDING_STORE_DIR", os.path.join(os.path.dirname(__file__), "data", "embeddings")
+)
+
+# Raw survey tables the graphs (and therefore the embeddings) are built from
+RAW_TABLES = ("participants", "friends", "influential", "feedback", "more_time", "advice", "disrespect")
+
+
+def raw_data_version(db):
+    """
+    Version stamp of the raw tables: a counter in raw.data_version that the
+    survey import bumps in the transaction writing them (see
+    bump_raw_data_version), so reading it is a one-row lookup however much
+    data is stored. A new version invalidates embeddings and graphs computed
+    from the old data.
+
+    Args:
+        db (Database): An instance of the Database class.
+
+    Returns:
+        str | None: Version string, or None if the stamp could not be read
+        (e.g. before `python -m db.migrations`), which bypasses the caches.
+    """
+    if not db.connection:
+        return None
+    try:
+        with db.connection.cursor() as cursor:
+            # A savepoint keeps a failed read from aborting the caller's transaction
+            cursor.execute("SAVEPOINT raw_data_version")
+            try:
+                cursor.execute("SELECT version FROM raw.data_version")
+                row = cursor.fetchone()
+            except Error as e:
+                print(f"Raw data version unavailable: {str(e).strip()}")
+                cursor.execute("ROLLBACK TO SAVEPOINT raw_data_version")
+                row = None
+            cursor.execute("RELEASE SAVEPOINT raw_data_version")
+    except Error:
+        return None
+    return f"raw-{row[0]}" if row else None
+
+
+def bump_raw_data_version(cursor):
+    """
+    Advances the raw data version. Call it in the transaction of every write
+    to RAW_TABLES, or cached embeddings and graphs keep serving the old data.
+    Without the raw.data_version table (migration 4 not applied) this does
+    nothing: raw_data_version then returns None and the caches are bypassed.
+    """
+    cursor.execute("SAVEPOINT bump_raw_data_version")
+    try:
+        cursor.execute("UPDATE raw.data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP")
+    except UndefinedTable:
+        print("raw.data_version does not exist, run `python -m db.migrations`")
+        cursor.execute("ROLLBACK TO SAVEPOINT bump_raw_data_version")
+    cursor.execute("RELEASE SAVEPOINT bump_raw_data_version")
+
+
+def model_version(name, hyperparameters):
+    """Version string of an embedding model, e.g. "graphsage-1a2b3c4d"."""
+    digest = hashlib.sha256(json.dumps(hyperparameters, sort_keys=True).encode()).hexdigest()
+    return f"{name}-{digest[:8]}"
+
+
+class EmbeddingStore:
+    """
+    Node embeddings per cohort and model version, stored as a float32 `.npy`
+    array (opened memory-mapped) plus a participant_id index, so they can be
+    served to the allocation pipelines, similarity lookups or analytics
+    without recomputation.
+
+    Layout: <root>/cohort_<cohort>/<model_version>/{embeddings.npy, participant_ids.npy, meta.json}
+
+    Args:
+        root (str): Directory of the store.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _dir(self, cohort, version):
+        return os.path.join(self.root, f"cohort_{cohort if cohort is not None else 'all'}", version)
+
+    def save(self, cohort, version, data_version, participant_ids, embeddings):
+        """Writes the embeddings of one cohort, replacing any previous entry."""
+        directory = self._dir(cohort, version)
+        os.makedirs(directory, exist_ok=True)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        participant_ids = np.asarray(participant_ids, dtype=np.int64)
+
+        # The arrays go first and meta.json last, so a reader never sees a half-written entry
+        for name, array in (("embeddings", embeddings), ("participant_ids", participant_ids)):
+            tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+
+        meta = {
+            "cohort": cohort,
+            "model_version": version,
+            "data_version": data_version,
+            "num_nodes": int(embeddings.shape[0]),
+            "embedding_size": int(embeddings.shape[1]),
+            "created_at": time.time(),
+        }
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    def load(self, cohort, version, data_version, participant_ids=None):
+        """
+        Returns the stored embeddings if they were computed from `data_version`.
+
+        Args:
+            participant_ids (list[int], optional): Node order wanted by the caller; the
+                rows are reordered to match and the lookup misses if any id is unknown.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray] | None: (embeddings [n, d] float32, participant_ids),
+            memory-mapped when no reordering was needed, or None if missing or stale.
+        """
+        directory = self._dir(cohort, version)
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            if meta["data_version"] != data_version:
+                return None
+            embeddings = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+            stored_ids = np.load(os.path.join(directory, "participant_ids.npy"))
+        except (OSError, ValueError, KeyError):
+            return None
+        if embeddings.shape != (meta["num_nodes"], meta["embedding_size"]) or len(stored_ids) != len(embeddings):
+            return None
+
+        if participant_ids is None:
+            return embeddings, stored_ids
+        participant_ids = np.asarray(participant_ids, dtype=np.int64)
+        if np.array_equal(participant_ids, stored_ids):
+            return embeddings, stored_ids
+
+        row_of = {int(pid): row for row, pid in enumerate(stored_ids)}
+        if any(int(pid) not in row_of for pid in participant_ids):
+            return None
+        rows = np.fromiter((row_of[int(pid)] for pid in participant_ids), dtype=np.int64, count=len(participant_ids))
+        return np.asarray(embeddings[rows]), participant_ids
+
+    def most_similar(self, cohort, version, data_version, participant_id, top_k=5):
+        """
+        Cosine-similarity lookup of the students closest to `participant_id`.
+
+        Returns:
+            list[tuple[int, float]]: (participant_id, similarity) pairs, best first, or
+            an empty list if the store has no fresh entry for the student.
+        """
+        entry = self.load(cohort, version, data_version)
+        if entry is None:
+            return []
+        embeddings, participant_ids = entry
+        matches = np.flatnonzero(participant_ids == participant_id)
+        if len(matches) == 0:
+            return []
+
+        norms = np.linalg.norm(embeddings, axis=1) + 1e-9
+        similarity = (embeddings @ embeddings[matches[0]]) / (norms * norms[matches[0]])
+        best = [i for i in np.argsort(-similarity) if i != matches[0]][:top_k]
+        return [(int(participant_ids[i]), float(similarity[i])) for i in best]
+
+
+_embedding_store = None
+
+
+def get_embedding_store():
+    """Process-wide store shared by both allocation pipelines."""
+    global _embedding_store
+    if _embedding_store is None:
+        _embedding_store = EmbeddingStore()
+    return _embedding_store
@@ -1,6 +1,8 @@
+import numpy as np
 import torch
 from collections import defaultdict
 import pandas as pd
+from .intra_class_edges import intra_class_edges
  
  
  
@@ -48,40 +50,33 @@ def evaluate_relationships(data, cluster_labels, participant_ids, id_to_name, ac
         5: "disrespect"
     }
  
-    preserved_counts = defaultdict(int)
-    total_counts = defaultdict(int)
-    classroom_edge_counts = defaultdict(lambda: defaultdict(int))
-    disrespect_violations = defaultdict(list)
-    disrespect_counts = defaultdict(int)
-    friends_per_node = defaultdict(set)
-    influence_targets = defaultdict(set)
     cluster_members = defaultdict(list)
  
-    # Analyze edges
-    for idx in range(data.edge_index.shape[1]):
-        src, tgt = data.edge_index[:, idx]
-        rel = int(data.edge_type[idx])
-        rel_name = EDGE_TYPE[rel]
-        src_class = cluster_labels[src]
-        tgt_class = cluster_labels[tgt]
- 
-        total_counts[rel_name] += 1
-        if src_class == tgt_class:
-            preserved_counts[rel_name] += 1
-            classroom_edge_counts[src_class][rel_name] += 1
- 
-            if rel == 5:  # Disrespect
-                src_pid = participant_ids[src]
-                tgt_pid = participant_ids[tgt]
-                disrespect_violations[src_class].append((src_pid, tgt_pid))
-                disrespect_counts[src_class] += 1
- 
-        # Track friends and influence
-        if rel == 0:
-            friends_per_node[src].add(tgt)
-            friends_per_node[tgt].add(src)
-        if rel == 1:
-            influence_targets[src].add(tgt)
+    # Analyze edges: intra-class masks and per-class counts in one pass
+    intra = intra_class_edges(data.edge_index, data.edge_type, cluster_labels)
+    preserved = intra["counts"].sum(dim=0).tolist()
+    totals = intra["totals"].tolist()
+    classes = intra["classes"].tolist()
+    class_counts = intra["counts"].tolist()
+ 
+    # Disrespect edges inside a class, grouped by class in order of first appearance
+    disrespect_violations = defaultdict(list)
+    disrespect = intra["edge_type"] == 5
+    for cls, src, tgt in zip(intra["classroom"][disrespect].tolist(), intra["source"][disrespect].tolist(),
+                             intra["target"][disrespect].tolist()):
+        disrespect_violations[cls].append((participant_ids[src], participant_ids[tgt]))
+    disrespect_counts = {cls: len(pairs) for cls, pairs in disrespect_violations.items()}
+ 
+    # Distinct friends (either direction) and influence targets per node
+    edge_index = data.edge_index.cpu().numpy()
+    edge_type = data.edge_type.cpu().numpy()
+    friend_edges = edge_index[:, edge_type == 0]
+    friend_pairs = np.unique(np.hstack([friend_edges, friend_edges[::-1]]), axis=1)
+    friend_degree = np.bincount(friend_pairs[0], minlength=len(cluster_labels))
+    friend_nodes = pd.unique(friend_edges.T.ravel())  # in order of first appearance
+    influence_pairs = np.unique(edge_index[:, edge_type == 1], axis=1)
+    influence_degree = np.bincount(influence_pairs[0], minlength=len(cluster_labels))
+    influence_sources = pd.unique(edge_index[0, edge_type == 1])
  
     # Assign participants to clusters
     for i, label in enumerate(cluster_labels):
@@ -104,32 +99,30 @@ def evaluate_relationships(data, cluster_labels, participant_ids, id_to_name, ac
             }
  
     # Isolation count
-    all_nodes = set(range(len(participant_ids)))
-    isolated_nodes = [i for i in all_nodes if i not in friends_per_node]
-    isolation_count = len(isolated_nodes)
+    isolation_count = len(participant_ids) - int(intra["has_friend"][:len(participant_ids)].sum())
  
     # Influence spread
     influence_spread = {
-        participant_ids[src]: len(targets)
-        for src, targets in influence_targets.items()
+        participant_ids[src]: int(influence_degree[src])
+        for src in influence_sources.tolist()
     }
  
     metrics = {
         "relationship_preservation": {
             rel_name: {
-                "preserved": preserved_counts.get(rel_name, 0),
-                "total": total_counts.get(rel_name, 0),
-                "percentage": (100 * preserved_counts.get(rel_name, 0) / total_counts.get(rel_name, 0))
-                if total_counts.get(rel_name, 0) > 0 else 0
+                "preserved": preserved[rel],
+                "total": totals[rel],
+                "percentage": (100 * preserved[rel] / totals[rel])
+                if totals[rel] > 0 else 0
             }
-            for rel_name in EDGE_TYPE.values()
+            for rel, rel_name in EDGE_TYPE.items()
         },
         "classroom_relationships": {
             cls: {
-                rel_name: classroom_edge_counts[cls].get(rel_name, 0)
-                for rel_name in EDGE_TYPE.values()
+                rel_name: counts[rel]
+                for rel, rel_name in EDGE_TYPE.items()
             }
-            for cls in sorted(classroom_edge_counts.keys())
+            for cls, counts in zip(classes, class_counts) if sum(counts) > 0
         },
         "disrespect_violations": {
             cls: [
@@ -140,12 +133,12 @@ def evaluate_relationships(data, cluster_labels, participant_ids, id_to_name, ac
             ]
             for cls in disrespect_violations
         },
-        "disrespect_counts_per_class": dict(disrespect_counts),
+        "disrespect_counts_per_class": disrespect_counts,
         "academic_distribution_per_class": academic_distribution,
         "isolation_count": isolation_count,
         "friend_counts": {
-            participant_ids[i]: len(friends_per_node[i])
-            for i in friends_per_node
+            participant_ids[i]: int(friend_degree[i])
+            for i in friend_nodes.tolist()
         },
         "influence_spread": influence_spread,
         "group_sizes": {
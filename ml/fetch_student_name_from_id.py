@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import uuid
-from db.db_usage import save_allocations_to_db
+from db.db_usage import enrich_allocations_with_names, save_allocations_to_db
 
 def generate_run_number():
     return str(uuid.uuid4()) 
@@ -20,25 +20,11 @@ def fetch_student_name_from_id(db, json_data):
     "Total_Students": 175
     """
 
-    #At first save this allocation
-    run_number = save_allocations_to_db(db, json_data )
-
-
-    allocations = json_data["Allocations"]
-
     try:
-        enriched = {}
-
-        with db:
-            for classroom, student_ids in allocations.items():
-                query = f"""
-                    SELECT participant_id, first_name, last_name
-                    FROM raw.participants
-                    WHERE participant_id = ANY(%s);
-                """
-                result = db.query_df(query, (student_ids,))
-
-                enriched[classroom] = result.to_dict(orient="records")
+        # One transaction for the insert and a single name query for all classrooms
+        with db.transaction():
+            run_number = save_allocations_to_db(db, json_data)
+            enriched = enrich_allocations_with_names(db, json_data["Allocations"])
         return {
             "Allocations": enriched,
             "Total_Classrooms": json_data["Total_Classrooms"],
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+from .build_graph_from_db import build_graph_from_db
+from .embedding_store import raw_data_version
+from .model_2.construct_graph import construct_graph
+from .model_2.csr_graph import CSRGraph
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    "CLASSFORGE_GRAPH_SNAPSHOT_DIR", os.path.join(os.path.dirname(__file__), "data", "graph_snapshots")
+)
+
+class GraphSnapshotCache:
+    """
+    Built cohort graphs stored as plain NumPy arrays (one `.npy` per array plus
+    meta.json), keyed by graph kind, cohort and the raw data version. Arrays are
+    opened memory-mapped copy-on-write, so a hit costs no database round trips
+    and only touches the pages that are read.
+
+    Layout: <root>/<kind>/cohort_<cohort>/{meta.json, <array>.npy}
+
+    Args:
+        root (str): Directory of the snapshots.
+    """
+
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _dir(self, kind, cohort):
+        return os.path.join(self.root, kind, f"cohort_{cohort if cohort else 'all'}")
+
+    def load(self, kind, cohort, data_version):
+        """Returns {name: np.ndarray} for a snapshot built from `data_version`, or None."""
+        directory = self._dir(kind, cohort)
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            if meta["data_version"] != data_version:
+                raise KeyError("stale snapshot")
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="c")
+                for name in meta["arrays"]
+            }
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return arrays
+
+    def save(self, kind, cohort, data_version, arrays):
+        """Writes a snapshot, replacing the previous one for the same kind and cohort."""
+        directory = self._dir(kind, cohort)
+        os.makedirs(directory, exist_ok=True)
+        for name, array in arrays.items():
+            tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+
+        # meta.json goes last, so a reader never sees a half-written snapshot
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"kind": kind, "cohort": cohort, "data_version": data_version, "arrays": list(arrays)}, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    def invalidate(self):
+        """Drops every snapshot, e.g. after new data has been imported."""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+
+_snapshot_cache = None
+
+
+def get_graph_snapshot_cache():
+    """Process-wide snapshot cache shared by all routes."""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        _snapshot_cache = GraphSnapshotCache()
+    return _snapshot_cache
+
+
+def load_cohort_graph(db, cohort=None):
+    """
+    Cached `build_graph_from_db`: returns the PyG cohort graph, rebuilding it
+    from Postgres only when the raw tables changed since the last snapshot.
+    """
+    cache = get_graph_snapshot_cache()
+    cohort = str(cohort) if cohort else None
+    data_version = raw_data_version(db)
+    arrays = cache.load("pyg", cohort, data_version) if data_version is not None else None
+
+    if arrays is None:
+        graph = build_graph_from_db(db, cohort, data_version=data_version)
+        if data_version is not None:
+            cache.save("pyg", cohort, data_version, {
+                "x": graph.x.numpy(),
+                "participant_ids": graph.participant_ids.numpy(),
+                "edge_index": graph.edge_index.numpy(),
+                "edge_type": graph.edge_type.numpy(),
+            })
+        return graph
+
+    num_nodes = arrays["x"].shape[0]
+    graph = Data(
+        x=torch.from_numpy(arrays["x"]),
+        edge_index=torch.from_numpy(arrays["edge_index"]),
+        edge_type=torch.from_numpy(arrays["edge_type"]),
+        y=torch.randint(0, 3, (num_nodes,), dtype=torch.long),
+    )
+    graph.participant_ids = torch.from_numpy(arrays["participant_ids"])
+    graph.cohort = cohort
+    graph.data_version = data_version
+    print(f"Graph snapshot hit for cohort {cohort}: {num_nodes} nodes, {graph.edge_index.shape[1]} edges")
+    return graph
+
+
+def load_social_graph(db, cohort=None):
+    """
+    Cached `construct_graph`: returns the array-backed relationship graph,
+    rebuilding it from Postgres only when the raw tables changed since the last
+    snapshot.
+    """
+    cache = get_graph_snapshot_cache()
+    cohort = str(cohort) if cohort else None
+    data_version = raw_data_version(db)
+    arrays = cache.load("csr", cohort, data_version) if data_version is not None else None
+
+    if arrays is None:
+        graph = construct_graph(db, cohort=cohort, data_version=data_version)
+        if data_version is not None:
+            try:
+                arrays = graph.to_arrays()
+            except TypeError as e:
+                # Feature values that cannot be stored without pickling; rebuilt every time
+                print(f"Graph snapshot skipped for cohort {cohort}: {e}")
+            else:
+                cache.save("csr", cohort, data_version, arrays)
+        return graph
+
+    graph = CSRGraph.from_arrays(arrays, cohort=cohort, data_version=data_version)
+    print(f"Graph snapshot hit for cohort {cohort}: {graph.num_nodes} nodes, {graph.num_edges} edges")
+    return graph
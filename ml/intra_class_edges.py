@@ -0,0 +1,88 @@
+import numpy as np
+import torch
+
+# Relationship types of the six raw network tables (see build_graph_from_db.EDGE_TYPE)
+NUM_RELATIONS = 6
+FRIEND_TYPE = 0
+
+
+def _as_long_tensor(values):
+    if isinstance(values, torch.Tensor):
+        return values.detach().cpu().long()
+    # Copies, so read-only (memory-mapped) arrays are accepted as well
+    return torch.from_numpy(np.array(values, dtype=np.int64))
+
+
+def intra_class_edges(edge_index, edge_type, labels, friend_type=FRIEND_TYPE):
+    """
+    Finds the relationships that stay inside a classroom with one mask over
+    all edges, `labels[src] == labels[dst]`, and counts them per (classroom,
+    relation) with a single bincount.
+
+    Args:
+        edge_index (torch.Tensor | np.ndarray): Node positions [2, num_edges].
+        edge_type (torch.Tensor | np.ndarray): Relationship type per edge [num_edges].
+        labels (torch.Tensor | np.ndarray | list[int]): Classroom per node [num_nodes];
+            a negative label marks a node without a classroom.
+        friend_type (int): Relationship type that counts as a friendship for isolation.
+
+    Returns:
+        dict: Tensors
+            - "mask": bool [num_edges], edge stays inside its classroom.
+            - "source", "target", "edge_type", "classroom": the intra-class edges,
+              in edge order.
+            - "classes": sorted classroom labels [num_classes], rows of the counts.
+            - "counts": intra-class edges per (classroom, relation) [num_classes, num_relations].
+            - "totals": all edges per relation [num_relations].
+            - "isolated": per classroom, students with an intra-class relationship
+              but no intra-class friendship [num_classes].
+            - "has_friend": bool [num_nodes], node has a friendship in any classroom.
+    """
+    edge_index = _as_long_tensor(edge_index).reshape(2, -1)
+    edge_type = _as_long_tensor(edge_type)
+    labels = _as_long_tensor(labels)
+    num_nodes = len(labels)
+    num_relations = max(NUM_RELATIONS, int(edge_type.max()) + 1 if len(edge_type) else 0)
+    src, dst = edge_index[0], edge_index[1]
+
+    classes = torch.unique(labels[labels >= 0])
+    class_index = torch.full((num_nodes,), -1, dtype=torch.long)
+    assigned = labels >= 0
+    class_index[assigned] = torch.searchsorted(classes, labels[assigned])
+
+    mask = (labels[src] == labels[dst]) & (labels[src] >= 0)
+    intra_src, intra_dst, intra_type = src[mask], dst[mask], edge_type[mask]
+    intra_class = class_index[intra_src]
+
+    counts = torch.bincount(
+        intra_class * num_relations + intra_type, minlength=len(classes) * num_relations
+    ).view(len(classes), num_relations)
+    totals = torch.bincount(edge_type, minlength=num_relations)
+
+    # Isolation: endpoints of intra-class edges that no intra-class friendship touches
+    in_class = torch.zeros(num_nodes, dtype=torch.bool)
+    in_class[intra_src] = True
+    in_class[intra_dst] = True
+    friend = intra_type == friend_type
+    has_class_friend = torch.zeros(num_nodes, dtype=torch.bool)
+    has_class_friend[intra_src[friend]] = True
+    has_class_friend[intra_dst[friend]] = True
+    isolated = torch.bincount(class_index[in_class & ~has_class_friend], minlength=len(classes))
+
+    any_friend = edge_type == friend_type
+    has_friend = torch.zeros(num_nodes, dtype=torch.bool)
+    has_friend[src[any_friend]] = True
+    has_friend[dst[any_friend]] = True
+
+    return {
+        "mask": mask,
+        "source": intra_src,
+        "target": intra_dst,
+        "edge_type": intra_type,
+        "classroom": labels[intra_src],
+        "classes": classes,
+        "counts": counts,
+        "totals": totals,
+        "isolated": isolated,
+        "has_friend": has_friend,
+    }
@@ -0,0 +1,283 @@
+import random
+import time
+from collections import defaultdict
+
+from .allocation_solver import aggregate_edge_pairs, class_size_bounds, edge_coefficients
+
+# Same relation weights as cluster_students_with_gnn: reward positive ties, penalise disrespect
+DEFAULT_RELATION_WEIGHTS = {0: 2, 1: 2, 2: 2, 3: 2, 4: 2, 5: -5}
+
+
+class LocalSearchRefiner:
+    """
+    Improves an existing allocation with move and swap neighbourhoods plus
+    large-neighbourhood ruin-and-recreate kicks, under a time budget.
+
+    The refiner keeps, for every student, the summed edge weight towards each
+    classroom (`class_weight[i][c]`). The change in objective of moving or
+    swapping students is read from that table, and applying a move only touches
+    the moved students' neighbours, so every step costs O(degree).
+
+    Args:
+        labels (list[int]): 1-indexed classroom per student.
+        num_clusters (int): Number of classrooms.
+        pair_weights (dict[tuple[int, int], int]): Aggregated edge weights.
+        preferred_clusters (list[int], optional): 0-indexed preferred cluster per student,
+            rewarded with 1 point like in the CP-SAT objective.
+        size_bounds (tuple[int, int], optional): (min, max) class size. Defaults to the
+            balanced bounds, widened to the input allocation's sizes if it is less balanced.
+        seed (int): Random seed.
+    """
+
+    def __init__(self, labels, num_clusters, pair_weights, preferred_clusters=None, size_bounds=None, seed=42):
+        self.num_students = len(labels)
+        self.num_clusters = num_clusters
+        self.labels = [int(label) - 1 for label in labels]
+        self.preferred = [int(c) for c in preferred_clusters] if preferred_clusters is not None else None
+        self.pair_weights = pair_weights
+        self.random = random.Random(seed)
+
+        self.neighbours = [[] for _ in range(self.num_students)]
+        for (src, tgt), weight in pair_weights.items():
+            self.neighbours[src].append((tgt, weight))
+            self.neighbours[tgt].append((src, weight))
+
+        self.class_weight = [[0] * num_clusters for _ in range(self.num_students)]
+        for i, adjacent in enumerate(self.neighbours):
+            for j, weight in adjacent:
+                self.class_weight[i][self.labels[j]] += weight
+
+        self.sizes = [0] * num_clusters
+        self.members = [[] for _ in range(num_clusters)]
+        self.position = [0] * self.num_students
+        for i, label in enumerate(self.labels):
+            self.sizes[label] += 1
+            self.position[i] = len(self.members[label])
+            self.members[label].append(i)
+
+        if size_bounds is None:
+            min_size, max_size = class_size_bounds(self.num_students, num_clusters)
+            size_bounds = (min(min_size, min(self.sizes)), max(max_size, max(self.sizes)))
+        self.min_size, self.max_size = size_bounds
+
+        self.score = self.objective()
+        self.stats = {"moves": 0, "swaps": 0, "kicks": 0, "iterations": 0}
+
+    def objective(self):
+        """Full objective recomputation, used for the initial score and checks."""
+        score = sum(weight for (src, tgt), weight in self.pair_weights.items()
+                    if self.labels[src] == self.labels[tgt])
+        if self.preferred is not None:
+            score += sum(1 for label, preferred in zip(self.labels, self.preferred) if label == preferred)
+        return score
+
+    def _gain(self, i, c):
+        gain = self.class_weight[i][c]
+        if self.preferred is not None and self.preferred[i] == c:
+            gain += 1
+        return gain
+
+    def move_delta(self, i, target):
+        return self._gain(i, target) - self._gain(i, self.labels[i])
+
+    def swap_delta(self, i, j):
+        a, b = self.labels[i], self.labels[j]
+        if a == b:
+            return 0
+        w_ij = self.pair_weights.get((i, j) if i < j else (j, i), 0)
+        return self.move_delta(i, b) + self.move_delta(j, a) - 2 * w_ij
+
+    def _relabel(self, i, target):
+        source = self.labels[i]
+        for j, weight in self.neighbours[i]:
+            row = self.class_weight[j]
+            row[source] -= weight
+            row[target] += weight
+
+        # O(1) removal from the member list by swapping with its last element
+        members = self.members[source]
+        last = members.pop()
+        if last != i:
+            members[self.position[i]] = last
+            self.position[last] = self.position[i]
+        self.position[i] = len(self.members[target])
+        self.members[target].append(i)
+
+        self.sizes[source] -= 1
+        self.sizes[target] += 1
+        self.labels[i] = target
+
+    def apply_move(self, i, target):
+        self.score += self.move_delta(i, target)
+        self._relabel(i, target)
+        self.stats["moves"] += 1
+
+    def apply_swap(self, i, j):
+        self.score += self.swap_delta(i, j)
+        a, b = self.labels[i], self.labels[j]
+        self._relabel(i, b)
+        self._relabel(j, a)
+        self.stats["swaps"] += 1
+
+    def _improve_student(self, i):
+        """Tries the best feasible move for student i, then swaps into its most attractive class."""
+        source = self.labels[i]
+        best_target, best_delta = None, 0
+        if self.sizes[source] > self.min_size:
+            for c in range(self.num_clusters):
+                if c != source and self.sizes[c] < self.max_size:
+                    delta = self.move_delta(i, c)
+                    if delta > best_delta:
+                        best_target, best_delta = c, delta
+        if best_target is not None:
+            self.apply_move(i, best_target)
+            return True
+
+        target = max(range(self.num_clusters), key=lambda c: self._gain(i, c))
+        if target == source or not self.members[target]:
+            return False
+        # Prefer swapping with a neighbour in the target class, else a random member
+        candidates = [j for j, _ in self.neighbours[i] if self.labels[j] == target]
+        candidates.append(self.random.choice(self.members[target]))
+        for j in candidates:
+            if self.swap_delta(i, j) > 0:
+                self.apply_swap(i, j)
+                return True
+        return False
+
+    def _kick(self, size):
+        """
+        Ruin and recreate: takes a connected group of students around a random
+        seed and swaps each one into its most attractive other classroom, even
+        when that lowers the objective. The next descent repairs the damage.
+        """
+        seed = self.random.randrange(self.num_students)
+        released, frontier = [seed], [seed]
+        seen = {seed}
+        while frontier and len(released) < size:
+            i = frontier.pop()
+            for j, _ in self.neighbours[i]:
+                if j not in seen and len(released) < size:
+                    seen.add(j)
+                    released.append(j)
+                    frontier.append(j)
+
+        for i in released:
+            source = self.labels[i]
+            target = max((c for c in range(self.num_clusters) if c != source), key=lambda c: self._gain(i, c))
+            if self.members[target]:
+                j = self.random.choice(self.members[target])
+                self.score += self.swap_delta(i, j)
+                self._relabel(i, target)
+                self._relabel(j, source)
+        self.stats["kicks"] += 1
+
+    def run(self, time_budget=5.0, kick_size=8):
+        """
+        Runs the search until the time budget (seconds) is used up.
+
+        Returns:
+            tuple[list[int], dict]: Best 1-indexed allocation found and search statistics.
+        """
+        start = time.perf_counter()
+        initial_score = self.score
+        best_score, best_labels = self.score, list(self.labels)
+        order = list(range(self.num_students))
+
+        while time.perf_counter() - start < time_budget:
+            # Local descent: sweep all students until no move or swap improves
+            improved = True
+            while improved and time.perf_counter() - start < time_budget:
+                improved = False
+                self.random.shuffle(order)
+                for i in order:
+                    self.stats["iterations"] += 1
+                    if self._improve_student(i):
+                        improved = True
+
+            if self.score > best_score:
+                best_score, best_labels = self.score, list(self.labels)
+            elif self.score < best_score:
+                # Kicks that did not pay off are reverted to the best allocation
+                self._reset(best_labels)
+            self._kick(kick_size)
+
+        stats = dict(self.stats)
+        stats.update({
+            "initial_objective": initial_score,
+            "objective": best_score,
+            "improvement": best_score - initial_score,
+            "refine_time": round(time.perf_counter() - start, 4),
+        })
+        return [label + 1 for label in best_labels], stats
+
+    def _reset(self, labels):
+        for i, label in enumerate(labels):
+            if self.labels[i] != label:
+                self._relabel(i, label)
+        self.score = self.objective()
+
+
+def refine_allocation(labels, num_clusters, edge_index, edge_type, relation_weights=None, preferred_clusters=None,
+                      time_budget=5.0, size_bounds=None, seed=42):
+    """
+    Convenience wrapper: builds the pair weights from raw edges and runs the
+    refiner on a 1-indexed allocation.
+
+    Args:
+        labels (list[int]): 1-indexed classroom per student.
+        num_clusters (int): Number of classrooms.
+        edge_index (list[list[int]]): [sources, targets] node indices.
+        edge_type (list[int]): Relation id of every edge.
+        relation_weights (dict[int, int], optional): Integer weight per relation id,
+            defaults to DEFAULT_RELATION_WEIGHTS.
+        preferred_clusters (list[int], optional): 0-indexed preferred cluster per student.
+        time_budget (float): Seconds to search.
+        size_bounds (tuple[int, int], optional): (min, max) class size.
+
+    Returns:
+        tuple[list[int], dict]: Refined 1-indexed allocation and search statistics.
+    """
+    coefficients = edge_coefficients(edge_type, relation_weights or DEFAULT_RELATION_WEIGHTS)
+    pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+    refiner = LocalSearchRefiner(labels, num_clusters, pair_weights, preferred_clusters, size_bounds, seed)
+    return refiner.run(time_budget)
+
+
+def refine_allocation_result(allocation_result, data, relation_weights=None, time_budget=5.0):
+    """
+    Refines a model_2 style result ({"Allocations": {classroom: [student_id, ...]}})
+    in place, using the relationship edges of the PyG data it was computed from.
+    Students of the graph that the result does not allocate are left out of the
+    search, together with their edges, and stay unallocated.
+
+    Returns:
+        dict: Search statistics.
+    """
+    classrooms = list(allocation_result["Allocations"].keys())
+    index_of = {int(sid): idx for idx, sid in enumerate(data.student_ids)}
+    label_of = {}
+    for label, classroom in enumerate(classrooms, start=1):
+        for sid in allocation_result["Allocations"][classroom]:
+            label_of[index_of[int(sid)]] = label
+
+    # Search over the allocated students only, renumbered in graph order
+    nodes = sorted(label_of)
+    position = {node: i for i, node in enumerate(nodes)}
+    sources, targets, edge_type = [], [], []
+    for source, target, relation in zip(*data.edge_index.tolist(), data.edge_type.tolist()):
+        if source in position and target in position:
+            sources.append(position[source])
+            targets.append(position[target])
+            edge_type.append(relation)
+
+    refined, stats = refine_allocation(
+        [label_of[node] for node in nodes], len(classrooms), [sources, targets], edge_type,
+        relation_weights=relation_weights, time_budget=time_budget
+    )
+
+    allocations = defaultdict(list)
+    for node, label in zip(nodes, refined):
+        allocations[classrooms[label - 1]].append(int(data.student_ids[node]))
+    allocation_result["Allocations"] = {classroom: allocations[classroom] for classroom in classrooms}
+    return stats
@@ -5,7 +5,9 @@ import math
 from db.database import Database
 from sklearn.cluster import KMeans
 import numpy as np
+import pandas as pd
 from torch_geometric.data import Data
+from ml.model_2.participant_attributes import attribute_matrix
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,19 +17,23 @@ def allocate_students(
     data: Data,
     num_allocations: int,
     db: Database,
-    constraint_map: Dict[int, float],
+    attributes: pd.DataFrame,
+    constraint: str = "perc_academic",
     academic_weight: float = 2.0,
-    all_constraints: Dict[str, Dict[int, float]] = None,
 ) -> dict:
 
     """
     Evenly allocates students into classrooms while trying to balance average academic score.
+
+    Args:
+        attributes (pd.DataFrame): Metrics per participant from `load_participant_attributes`.
+        constraint (str): Metric column whose classroom totals are balanced.
     """
     student_ids = data.student_ids
     embeddings = data.embeddings.cpu().numpy()
 
-    # Normalize academic scores
-    academic_scores = np.array([constraint_map.get(int(sid), 0) for sid in student_ids])
+    # Normalize academic scores (0 for students without attributes)
+    academic_scores = attribute_matrix(attributes, student_ids, [constraint])[:, 0]
     min_score, max_score = academic_scores.min(), academic_scores.max()
     norm_scores = (academic_scores - min_score) / (max_score - min_score + 1e-6)
 
@@ -38,7 +44,7 @@ def allocate_students(
     ])
 
     # Get student list with academic info
-    student_list = list(zip(student_ids, extended_embeddings, norm_scores))
+    student_list = list(zip(range(len(student_ids)), extended_embeddings, norm_scores))
 
     # Sort by academic score (descending)
     student_list.sort(key=lambda x: x[2], reverse=True)
@@ -46,16 +52,18 @@ def allocate_students(
     # Initialize balanced bins
     max_per_group = math.ceil(len(student_list) / num_allocations)
     assignments = {i: [] for i in range(num_allocations)}
+    positions = {i: [] for i in range(num_allocations)}
     group_scores = {i: 0.0 for i in range(num_allocations)}
 
     # Round-robin assign students to group with lowest total academic score & not full
-    for student_id, emb, score in student_list:
+    for position, emb, score in student_list:
         eligible_groups = [
             gid for gid in range(num_allocations)
             if len(assignments[gid]) < max_per_group
         ]
         best_group = min(eligible_groups, key=lambda gid: group_scores[gid])
-        assignments[best_group].append(int(student_id))
+        assignments[best_group].append(int(student_ids[position]))
+        positions[best_group].append(position)
         group_scores[best_group] += score
 
     # Logging
@@ -65,21 +73,13 @@ def allocate_students(
 
     allocations = {f"{gid + 1}": members for gid, members in assignments.items()}
     avg_performance_scores = {}
-    for cluster_id, members in assignments.items():
-        scores = [constraint_map.get(sid, 0) for sid in members]
-        avg_score = np.mean(scores) if scores else 0
+    for cluster_id, members in positions.items():
+        avg_score = np.mean(academic_scores[members]) if members else 0
         avg_performance_scores[str(cluster_id + 1)] = avg_score
         print(avg_score)
 
     # Compute average scores for all metrics per classroom
-    average_metrics_per_classroom = {}
-
-    for metric_name, metric_map in (all_constraints or {}).items():
-        average_metrics_per_classroom[metric_name] = {}
-        for cluster_id, members in assignments.items():
-            scores = [metric_map.get(sid, 0) for sid in members]
-            avg_score = np.mean(scores) if scores else 0
-            average_metrics_per_classroom[metric_name][str(cluster_id + 1)] = avg_score
+    average_metrics = average_metrics_per_classroom(allocations, attributes)
 
   # Key matches frontend classroom keys
 
@@ -87,9 +87,24 @@ def allocate_students(
         "Total_Students": len(student_ids),
         "Total_Classrooms": num_allocations,
         "Allocations": allocations,
-        "AveragePerformance": average_metrics_per_classroom  # <-- now holds all metrics
+        "AveragePerformance": average_metrics  # <-- now holds all metrics
     }
 
 
     return result
 
+
+def average_metrics_per_classroom(allocations: Dict[str, List[int]], attributes: pd.DataFrame = None) -> dict:
+    """
+    Averages every metric over the members of each classroom, e.g. after the
+    allocation has been changed by local-search refinement.
+    """
+    if attributes is None:
+        return {}
+    average_metrics = {metric_name: {} for metric_name in attributes.columns}
+    for classroom_id, members in allocations.items():
+        # Column-major, so every metric is averaged over a contiguous array
+        values = np.asfortranarray(attribute_matrix(attributes, members))
+        for column, metric_name in enumerate(attributes.columns):
+            average_metrics[metric_name][classroom_id] = np.mean(values[:, column]) if members else 0
+    return average_metrics
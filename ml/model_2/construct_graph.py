@@ -1,66 +1,52 @@
 import networkx as nx
 from db.db_manager import get_db
+from ml.build_graph_from_db import load_relationship_edges
+from ml.embedding_store import raw_data_version
+from ml.model_2.csr_graph import CSRGraph
 import matplotlib.pyplot as plt
 
-def construct_graph(db,cohort=None):
+def construct_graph(db,cohort=None,data_version=None):
     """
     Constructs a unified directed graph from multiple relationship tables for social network analysis.
 
     Args:
         db (Database): An instance of the Database class for querying data.
+        cohort (int | str, optional): Cohort whose participants become the feature nodes.
+        data_version (str, optional): Raw data version if the caller already has it.
 
     Returns:
-        nx.DiGraph: A directed graph with nodes and edges representing students and their relationships.
+        CSRGraph: An array-backed directed graph with nodes and edges representing students and
+        their relationships; `to_networkx()` converts it for visualisation.
     """
-    # Define the mapping of edge types
-    edge_type_map =  {
-        "friends": 0,
-        "influential": 1,
-        "feedback": 2,
-        "more_time": 3,
-        "advice": 4,
-        "disrespect": 5
-    }
-    # Initialize a directed graph
-    graph = nx.DiGraph()
-
     # Fetch participant data of respective cohort if any for node features 
     participants_query = """
     SELECT participant_id, perc_academic, perc_effort, attendance, cohort
     FROM raw.participants
-    """ + (f" WHERE cohort = '{cohort}'" if cohort else "")
-    df_participants = db.query_df(participants_query)
-
-    # Add nodes with features
-    for _, row in df_participants.iterrows():
-        graph.add_node(
-            row['participant_id'],
-            perc_academic=row['perc_academic'],
-            perc_effort=row['perc_effort'],
-            attendance=row['attendance']
-        )
+    """ + (" WHERE cohort = %(cohort)s" if cohort else "")
+    df_participants = db.query_df(participants_query, {"cohort": str(cohort)} if cohort else None)
 
-    # Iterate over each relationship table to add edges
-    for table_name, edge_type in edge_type_map.items():
-        relationship_query = f"SELECT source, target FROM raw.{table_name}"
-        df_relationships = db.query_df(relationship_query)
+    # All six relationship tables in one query; a stable sort by edge type keeps
+    # the table order, so a pair listed in several tables gets the last table's type
+    df_relationships, _ = load_relationship_edges(db)
+    df_relationships = df_relationships.sort_values("edge_type", kind="stable")
 
-        for _, row in df_relationships.iterrows():
-            graph.add_edge(
-                row['source'],
-                row['target'],
-                edge_type=edge_type
-            )
-
-    return graph
+    # Cohort and data version key the embedding store
+    return CSRGraph.from_frames(
+        df_participants,
+        df_relationships,
+        cohort=str(cohort) if cohort else None,
+        data_version=data_version or raw_data_version(db),
+    )
 
 def visualize_graph(graph):
     """
     Visualizes the directed graph using matplotlib.
 
     Args:
-        graph (nx.DiGraph): The directed graph to visualize.
+        graph (nx.DiGraph | CSRGraph): The directed graph to visualize.
     """
+    if isinstance(graph, CSRGraph):
+        graph = graph.to_networkx()
     plt.figure(figsize=(12, 8))
 
     # Draw the graph
@@ -90,5 +76,5 @@ if __name__ == "__main__":
         social_network_graph = construct_graph(db,'2025')
         # visualize_graph(social_network_graph)
         print(f"Graph constructed with {social_network_graph.number_of_nodes()} nodes and {social_network_graph.number_of_edges()} edges.")
-        visualize_graph(social_network_graph.subgraph(['student_id_1', 'student_id_2', 'student_id_3']))
+        visualize_graph(social_network_graph.to_networkx().subgraph(['student_id_1', 'student_id_2', 'student_id_3']))
         
\ No newline at end of file
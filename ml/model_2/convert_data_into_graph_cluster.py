@@ -1,4 +1,5 @@
 import torch
+from ml.model_2.graph_conversion import graph_edge_types
 from ml.preserved_relationship import compute_preserved_relationships, save_edge_relationships_db
 from db.db_usage import generate_run_number
 
@@ -13,13 +14,8 @@ def convert_data_in_graph_cluster(allocation_result,pyg_data, graph, db, run_num
     cluster_labels = [student_to_cluster[int(sid)] for sid in pyg_data.student_ids]
     pyg_data.y = torch.tensor(cluster_labels, dtype=torch.long)  # Required for relationship functions
 
-    # Step 5: Extract edge_type from networkx graph edge attributes
-    # edge_attrs = [d['edge_attr'][0] for _, _, d in graph.edges(data=True)]
-    edge_attrs = [
-    d.get('edge_attr', [d.get('edge_type', 0)])[0]
-    for _, _, d in graph.edges(data=True)
-    ]
-    pyg_data.edge_type = torch.tensor(edge_attrs, dtype=torch.long)  # Required for relationship functions
+    # Step 5: Extract edge_type from the graph, in the same order as pyg_data.edge_index
+    pyg_data.edge_type = graph_edge_types(graph)  # Required for relationship functions
 
     # Step 6: Collect participant IDs in same order as nodes
     participant_ids = [int(pid) for pid in pyg_data.student_ids]
@@ -0,0 +1,192 @@
+import numbers
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+# Node attributes construct_graph reads from raw.participants, in feature column order
+NODE_FEATURES = ("perc_academic", "perc_effort", "attendance")
+
+# Type codes of object-valued features in snapshots: None, text, integer, real
+FEATURE_NONE, FEATURE_TEXT, FEATURE_INT, FEATURE_REAL = range(4)
+
+
+def encode_feature_values(values):
+    """
+    Splits object-valued features (text columns of raw.participants) into a
+    fixed-width text array and a type code per value, which np.save stores
+    without pickling and np.load can memory-map.
+
+    Raises:
+        TypeError: For values that are not None, text or numbers.
+    """
+    kinds = np.empty(values.size, dtype=np.int8)
+    texts = []
+    for i, value in enumerate(values.ravel().tolist()):
+        if value is None:
+            kinds[i], value = FEATURE_NONE, ""
+        elif isinstance(value, str):
+            kinds[i] = FEATURE_TEXT
+        elif isinstance(value, numbers.Integral):
+            kinds[i] = FEATURE_INT
+        elif isinstance(value, numbers.Real):
+            kinds[i] = FEATURE_REAL
+        else:
+            raise TypeError(f"Unsupported feature value {value!r}")
+        texts.append(str(value))
+    return np.array(texts, dtype=str).reshape(values.shape), kinds.reshape(values.shape)
+
+
+def decode_feature_values(texts, kinds):
+    """Inverse of encode_feature_values: the object array with the original values."""
+    decoders = {FEATURE_NONE: lambda text: None, FEATURE_TEXT: str, FEATURE_INT: int, FEATURE_REAL: float}
+    values = [decoders[kind](text) for text, kind in zip(texts.ravel().tolist(), kinds.ravel().tolist())]
+    decoded = np.empty(len(values), dtype=object)
+    decoded[:] = values
+    return decoded.reshape(texts.shape)
+
+
+class CSRGraph:
+    """
+    Directed relationship graph of the model_2 pipeline stored as arrays in
+    compressed sparse row form. Nodes are addressed by position, `node_ids[i]`
+    is the participant id of node i, and the outgoing edges of node i are
+    `indices[indptr[i]:indptr[i + 1]]` with their types in `edge_type`.
+
+    Nodes and edges are kept in the order the former networkx DiGraph iterated
+    them (participants first, then ids that only occur in relationships; edges
+    grouped by source), so tensors built from it line up with `from_networkx`.
+
+    Args:
+        node_ids (np.ndarray): Participant id per node [num_nodes].
+        node_features (np.ndarray): Raw NODE_FEATURES values per node [num_nodes, 3].
+        num_participants (int): Leading nodes that came from raw.participants and
+            carry features; the remaining nodes only occur in relationships.
+        indptr (np.ndarray): Row pointer [num_nodes + 1].
+        indices (np.ndarray): Target node per edge [num_edges].
+        edge_type (np.ndarray): Relationship type per edge [num_edges].
+        cohort (str, optional): Cohort the participants were selected from.
+        data_version (str, optional): Raw data version the graph was built from.
+    """
+
+    def __init__(self, node_ids, node_features, num_participants, indptr, indices, edge_type,
+                 cohort=None, data_version=None):
+        self.node_ids = node_ids
+        self.node_features = node_features
+        self.num_participants = int(num_participants)
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_type = edge_type
+        self.cohort = cohort
+        self.data_version = data_version
+
+    @classmethod
+    def from_frames(cls, participants, relationships, cohort=None, data_version=None):
+        """
+        Builds the graph from a raw.participants frame and a relationship frame
+        with `source`, `target`, `edge_type` columns, with the semantics of adding
+        them one by one to a DiGraph: repeated participants keep their last
+        attributes, and a repeated (source, target) pair keeps its last edge type.
+        Relationships with a missing endpoint are dropped.
+        """
+        participants = participants.dropna(subset=["participant_id"])
+        participant_ids = participants["participant_id"].astype(np.int64)
+        features = participants.assign(participant_id=participant_ids).drop_duplicates("participant_id", keep="last")
+        features = features.set_index("participant_id").reindex(pd.unique(participant_ids))
+
+        relationships = relationships.dropna(subset=["source", "target"])
+        edges = pd.DataFrame({
+            "source": relationships["source"].to_numpy().astype(np.int64),
+            "target": relationships["target"].to_numpy().astype(np.int64),
+            "edge_type": relationships["edge_type"].to_numpy().astype(np.int64),
+        })
+        # Groups come out in order of first appearance, carrying the last type
+        edges = edges.groupby(["source", "target"], sort=False)["edge_type"].last().reset_index()
+
+        # Ids seen only in relationships are appended in order of first appearance
+        endpoints = pd.unique(np.column_stack([edges["source"], edges["target"]]).ravel())
+        extra_ids = endpoints[~np.isin(endpoints, features.index.to_numpy())]
+        node_ids = np.concatenate([features.index.to_numpy(dtype=np.int64), extra_ids.astype(np.int64)])
+
+        feature_values = features[list(NODE_FEATURES)].to_numpy()
+        node_features = np.zeros((len(node_ids), len(NODE_FEATURES)), dtype=feature_values.dtype)
+        node_features[:len(features)] = feature_values
+
+        node_index = pd.Index(node_ids)
+        sources = node_index.get_indexer(edges["source"])
+        targets = node_index.get_indexer(edges["target"])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(sources, minlength=len(node_ids)))
+
+        return cls(node_ids, node_features, len(features), indptr, targets[order].astype(np.int64),
+                   edges["edge_type"].to_numpy()[order], cohort=cohort, data_version=data_version)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def number_of_edges(self):
+        return self.num_edges
+
+    def edge_index(self):
+        """Edges as node positions [2, num_edges], in CSR order."""
+        sources = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.indptr))
+        return np.vstack([sources, self.indices])
+
+    def edge_list(self):
+        """Edges as (source participant ids, target participant ids, edge types)."""
+        edge_index = self.edge_index()
+        return self.node_ids[edge_index[0]], self.node_ids[edge_index[1]], self.edge_type
+
+    def to_arrays(self):
+        """
+        Plain arrays for the graph snapshot cache. Object-valued features are
+        stored as text plus type codes (see encode_feature_values).
+        """
+        arrays = {
+            "node_ids": self.node_ids,
+            "num_participants": np.array([self.num_participants], dtype=np.int64),
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "edge_type": self.edge_type,
+        }
+        if self.node_features.dtype == object:
+            arrays["node_feature_text"], arrays["node_feature_kind"] = encode_feature_values(self.node_features)
+        else:
+            arrays["node_features"] = self.node_features
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, cohort=None, data_version=None):
+        if "node_feature_kind" in arrays:
+            node_features = decode_feature_values(arrays["node_feature_text"], arrays["node_feature_kind"])
+        else:
+            node_features = arrays["node_features"]
+        return cls(arrays["node_ids"], node_features, int(arrays["num_participants"][0]),
+                   arrays["indptr"], arrays["indices"], arrays["edge_type"],
+                   cohort=cohort, data_version=data_version)
+
+    def to_networkx(self):
+        """
+        Converts to the networkx DiGraph construct_graph used to return, for
+        visualisation and the Cytoscape export.
+        """
+        graph = nx.DiGraph(cohort=self.cohort, data_version=self.data_version)
+        node_ids = self.node_ids.tolist()
+        for node, features in zip(node_ids[:self.num_participants], self.node_features.tolist()):
+            graph.add_node(node, **dict(zip(NODE_FEATURES, features)))
+        graph.add_nodes_from(node_ids[self.num_participants:])
+
+        sources, targets, edge_type = self.edge_list()
+        graph.add_edges_from(
+            (u, v, {"edge_type": t}) for u, v, t in zip(sources.tolist(), targets.tolist(), edge_type.tolist())
+        )
+        return graph
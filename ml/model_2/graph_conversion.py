@@ -1,8 +1,11 @@
-from typing import Optional
+from typing import Optional, Union
 import networkx as nx
+import numpy as np
+import pandas as pd
 import torch
 from torch_geometric.data import Data
 from torch_geometric.utils import from_networkx
+from ml.model_2.csr_graph import CSRGraph, NODE_FEATURES
 
 def normalize_features(features: torch.Tensor) -> torch.Tensor:
     """
@@ -27,6 +30,84 @@ def preprocess_value(value, node, key):
         raise ValueError(f"Node {node} has a non-numeric value for '{key}': {value}")
     return float(value)
 
+def preprocess_column(values, nodes, key) -> np.ndarray:
+    """
+    Column-wise `preprocess_value`. Numeric columns are converted in one cast.
+    Other columns are factorised: pandas parses the distinct plain numbers in
+    bulk, the remaining distinct values (percent strings, NA markers, padded
+    text) go through `preprocess_value` once each, and the results are
+    scattered back by code. Spreadsheet columns repeat a small set of values,
+    so the scalar rules run on a few hundred values instead of every node,
+    and a non-numeric value raises the same ValueError for the first node
+    holding it.
+
+    Args:
+        values (array-like): Raw values of one feature, in node order.
+        nodes (list): Node of every value, for error messages.
+        key (str): Feature name, for error messages.
+
+    Returns:
+        np.ndarray: float64 values [num_nodes].
+    """
+    typed = isinstance(values, (np.ndarray, pd.Series)) and values.dtype != object
+    series = pd.Series(values, copy=False)
+    # Typed arrays cannot hold None; in other input it is inferred as NaN, so NaN needs a closer look
+    if series.dtype != object and pd.api.types.is_numeric_dtype(series):
+        if typed or not series.isna().any():
+            return series.to_numpy(dtype=np.float64)
+    # Object dtype keeps None apart from NaN (a float, which passes)
+    values = pd.Series(values, dtype=object, copy=False).to_numpy()
+
+    # Distinct values in order of first appearance; None and NaN get code -1
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    parsed_uniques = np.array(pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce"), dtype=np.float64)
+    first_position = np.full(len(uniques), len(values), dtype=np.int64)
+    np.minimum.at(first_position, codes[codes >= 0], np.flatnonzero(codes >= 0))
+
+    invalid = []
+    for index in np.flatnonzero(np.isnan(parsed_uniques)):
+        position = int(first_position[index])
+        try:
+            parsed_uniques[index] = preprocess_value(uniques[index], nodes[position], key)
+        except ValueError as error:
+            # Later distinct values first appear further down the column
+            invalid.append((position, error))
+            break
+
+    parsed = parsed_uniques[np.maximum(codes, 0)] if len(uniques) else np.zeros(len(values))
+    missing = np.flatnonzero(codes < 0)
+    parsed[missing] = np.nan
+    # NaN passes as a float, None does not
+    nones = missing[np.equal(values[missing], None)]
+    if len(nones):
+        position = int(nones[0])
+        invalid.append((position, ValueError(f"Node {nodes[position]} has a non-numeric value for '{key}': None")))
+
+    if invalid:
+        position, error = min(invalid, key=lambda item: item[0])
+        error.position = position
+        raise error
+    return parsed
+
+def preprocess_features(columns, nodes, keys) -> np.ndarray:
+    """
+    Runs `preprocess_column` over every feature and stacks the result into a
+    [num_nodes, num_features] float32 matrix. When several values are invalid,
+    the error names the first one in node order, as the per-node loop did.
+    """
+    features, errors = [], []
+    for column, key in zip(columns, keys):
+        try:
+            features.append(preprocess_column(column, nodes, key))
+        except ValueError as error:
+            errors.append((error.position, len(errors), error))
+    if errors:
+        raise min(errors, key=lambda e: e[:2])[2]
+    if not features:
+        return np.zeros((len(nodes), 0), dtype=np.float32)
+    return np.column_stack(features).astype(np.float32)
+
 def graph_to_pyg_data(graph: nx.DiGraph, use_edge_types: bool = True) -> Data:
     """
     Converts a networkx.DiGraph to a PyTorch Geometric Data object.
@@ -41,14 +122,11 @@ def graph_to_pyg_data(graph: nx.DiGraph, use_edge_types: bool = True) -> Data:
         if "student_id" not in attrs:
             attrs["student_id"] = node  # Fallback to node index
 
-    node_features = []
-    real_ids = []
-    for node, attrs in graph.nodes(data=True):
-        feature_row = [preprocess_value(attrs[key], node, key) for key in node_feature_keys]
-        node_features.append(feature_row)
-        real_ids.append(attrs["student_id"])
+    nodes = list(graph.nodes)
+    real_ids = [attrs["student_id"] for _, attrs in graph.nodes(data=True)]
+    columns = [[attrs[key] for _, attrs in graph.nodes(data=True)] for key in node_feature_keys]
 
-    node_features = torch.tensor(node_features, dtype=torch.float)
+    node_features = torch.from_numpy(preprocess_features(columns, nodes, node_feature_keys))
     node_features = normalize_features(node_features)
 
     if use_edge_types and "edge_type" in nx.get_edge_attributes(graph, "edge_type"):
@@ -61,8 +139,47 @@ def graph_to_pyg_data(graph: nx.DiGraph, use_edge_types: bool = True) -> Data:
 
     return pyg_data
 
-def preprocessing(graph: nx.DiGraph, use_edge_types: bool = True) -> Data:
+def csr_graph_to_pyg_data(graph: CSRGraph, use_edge_types: bool = True) -> Data:
+    """
+    Converts a CSRGraph to a PyTorch Geometric Data object straight from its
+    arrays, with the same features, edge order and `student_ids` as
+    `graph_to_pyg_data` on the equivalent networkx graph.
+    """
+    node_ids = graph.node_ids.tolist()
+    node_features = preprocess_features(graph.node_features.T, node_ids, NODE_FEATURES)
+    node_features = normalize_features(torch.from_numpy(node_features))
+
+    edge_type = torch.from_numpy(np.asarray(graph.edge_type, dtype=np.int64))
+    pyg_data = Data(
+        x=node_features,
+        edge_index=torch.from_numpy(graph.edge_index()),
+        edge_type=edge_type,
+        num_nodes=graph.num_nodes,
+    )
+    if use_edge_types and graph.num_edges > 0:
+        pyg_data.edge_attr = edge_type.view(-1, 1)
+    pyg_data.student_ids = node_ids
+    pyg_data.cohort = graph.cohort
+    pyg_data.data_version = graph.data_version
+    return pyg_data
+
+def graph_edge_types(graph: Union[nx.DiGraph, CSRGraph]) -> torch.Tensor:
+    """
+    Edge types of the graph as a tensor, in the same order as the `edge_index` of its PyG data.
+    """
+    if isinstance(graph, CSRGraph):
+        return torch.from_numpy(np.asarray(graph.edge_type, dtype=np.int64))
+    # edge_attrs = [d['edge_attr'][0] for _, _, d in graph.edges(data=True)]
+    edge_attrs = [
+        d.get('edge_attr', [d.get('edge_type', 0)])[0]
+        for _, _, d in graph.edges(data=True)
+    ]
+    return torch.tensor(edge_attrs, dtype=torch.long)
+
+def preprocessing(graph: Union[nx.DiGraph, CSRGraph], use_edge_types: bool = True) -> Data:
     """
     Preprocesses the graph by converting it to a PyTorch Geometric Data object.
     """
+    if isinstance(graph, CSRGraph):
+        return csr_graph_to_pyg_data(graph, use_edge_types=use_edge_types)
     return graph_to_pyg_data(graph, use_edge_types=use_edge_types)
@@ -3,6 +3,7 @@ from collections import defaultdict
 import networkx as nx
 import random
 import pandas as pd
+from ml.model_2.csr_graph import CSRGraph
 
 # Fixed color palettes
 CLASSROOM_COLORS = [
@@ -33,6 +34,8 @@ def attach_names_to_graph(graph: nx.DiGraph, df: pd.DataFrame) -> None:
             graph.nodes[pid]["last_name"] = row["last_name"]
 
 def get_split_graphs(graph: nx.DiGraph, allocations: dict) -> dict:
+    if isinstance(graph, CSRGraph):
+        graph = graph.to_networkx()  # Cytoscape export works on networkx subgraphs
     edge_type_map = {0: 'friends', 1: 'influential', 2: 'feedback', 3: 'more_time', 4: 'advice', 5: 'disrespect'}
     data = {}
     positions_by_classroom = {}
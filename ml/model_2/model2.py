@@ -1,7 +1,9 @@
+import numpy as np
 import torch
 import torch.nn.functional as F
 from torch_geometric.nn import SAGEConv
 from torch_geometric.data import Data
+from ml.embedding_store import get_embedding_store, model_version
 
 class GraphSAGE(torch.nn.Module):
     def __init__(self, in_channels: int, hidden_channels: int, out_channels: int, num_layers: int = 2, dropout: float = 0.5):
@@ -44,10 +46,24 @@ class GraphSAGE(torch.nn.Module):
 def generate_embeddings(data: Data, hidden_channels: int = 32, out_channels: int = 16, num_layers: int = 3, dropout: float = 0.5) -> Data:
     """
     Generates node embeddings and attaches them to the Data object.
+    Graphs from `construct_graph` carry `cohort` and `data_version`; their embeddings
+    are read from the embedding store while the raw tables are unchanged.
 
     Returns:
         Data: The input object with embeddings added as `data.embeddings`.
     """
+    store = get_embedding_store()
+    version = model_version("graphsage", {
+        "in_channels": data.num_node_features, "hidden_channels": hidden_channels,
+        "out_channels": out_channels, "num_layers": num_layers, "dropout": dropout,
+    })
+    data_version = getattr(data, "data_version", None)
+    if data_version is not None:
+        stored = store.load(getattr(data, "cohort", None), version, data_version, data.student_ids)
+        if stored is not None:
+            data.embeddings = torch.from_numpy(np.array(stored[0]))
+            return data
+
     model = GraphSAGE(
         in_channels=data.num_node_features,
         hidden_channels=hidden_channels,
@@ -60,5 +76,8 @@ def generate_embeddings(data: Data, hidden_channels: int = 32, out_channels: int
     with torch.no_grad():
         embeddings = model(data.x, data.edge_index)
 
+    if data_version is not None:
+        store.save(getattr(data, "cohort", None), version, data_version, data.student_ids, embeddings.numpy())
+
     data.embeddings = embeddings
     return data
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# Allocation metric name -> raw.participants column
+PARTICIPANT_METRICS = {
+    "perc_academic": "perc_academic",
+    "perc_effort": "perc_effort",
+    "perc_attendance": "attendance",
+}
+
+
+def load_participant_attributes(db, cohort=None, participant_ids=None):
+    """
+    Fetches the numeric attributes the allocation balances in one query, as a
+    float64 table indexed by participant_id with one column per metric of
+    PARTICIPANT_METRICS. Values that are not numbers become 0 and a repeated
+    participant keeps its last row, like the per-metric dicts it replaces.
+
+    Args:
+        db (Database): An instance of the Database class.
+        cohort (int | str, optional): Cohort whose participants are fetched.
+        participant_ids (list[int], optional): Participants fetched in addition
+            to the cohort, e.g. graph nodes that only occur in relationships.
+
+    Returns:
+        pd.DataFrame: Metrics per participant, indexed by participant_id.
+    """
+    columns = ", ".join(f"{column} AS {metric}" for metric, column in PARTICIPANT_METRICS.items())
+    conditions, params = [], {}
+    if cohort:
+        conditions.append("cohort = %(cohort)s")
+        params["cohort"] = str(cohort)
+    if participant_ids is not None:
+        # Bound as integers, like the column, so an index on participant_id can be used
+        conditions.append("participant_id = ANY(%(participant_ids)s)")
+        params["participant_ids"] = [int(pid) for pid in participant_ids]
+    query = f"SELECT participant_id, {columns} FROM raw.participants"
+    if conditions:
+        query += " WHERE " + " OR ".join(conditions)
+
+    df = db.query_df(query, params or None)
+    if df is None:
+        df = pd.DataFrame(columns=["participant_id", *PARTICIPANT_METRICS])
+
+    index = pd.Index(
+        pd.to_numeric(df["participant_id"], errors="coerce").fillna(0).to_numpy(dtype=np.int64),
+        name="participant_id",
+    )
+    attributes = pd.DataFrame(
+        {metric: pd.to_numeric(df[metric], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+         for metric in PARTICIPANT_METRICS},
+        index=index,
+    )
+    return attributes[~attributes.index.duplicated(keep="last")]
+
+
+def attribute_matrix(attributes, participant_ids, metrics=None):
+    """
+    Aligns the attribute table with a list of participants.
+
+    Returns:
+        np.ndarray: float64 [len(participant_ids), len(metrics)], 0 for
+        participants missing from the table.
+    """
+    metrics = list(metrics or attributes.columns)
+    ids = pd.Index(np.asarray(participant_ids, dtype=np.int64))
+    return attributes[metrics].reindex(ids).fillna(0).to_numpy(dtype=np.float64)
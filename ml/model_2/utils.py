@@ -1,7 +1,9 @@
-from collections import defaultdict
+import pandas as pd
 from flask import jsonify
-from ml.model_2.construct_graph import construct_graph
+from ml.intra_class_edges import intra_class_edges
+from ml.graph_snapshot import load_social_graph
 from db.db_manager import get_db
+from db.run_summary import cached_run_summary
 
 def relationship_counts_per_class():
     """
@@ -22,19 +24,32 @@ def relationship_counts_per_class():
         return jsonify({"error": "No allocation runs found"}), 404
     run_number = run_result.iloc[0]["run_number"]
 
-    # 2. Get the mapping of participant_id to classroom_id for this run
+    # 2. Stored when the run was saved; computed here for older runs
+    result = cached_run_summary(
+        db, run_number, "relationship_counts", lambda: relationship_counts_for_run(db, run_number)
+    )
+    return jsonify(result)
+
+
+def relationship_counts_for_run(db, run_number):
+    """
+    Counts each relationship type inside every classroom of one allocation run,
+    plus 'isolation' per classroom; the payload of /fetch_relationship.
+    """
+    # 1. Get the mapping of participant_id to classroom_id for this run
     alloc_query = """
         SELECT participant_id, classroom_id
         FROM classroom_allocation
         WHERE run_number = %s
     """
     alloc_df = db.query_df(alloc_query, (run_number,))
-    student_to_class = dict(zip(alloc_df["participant_id"], alloc_df["classroom_id"]))
+    alloc_df = alloc_df.drop_duplicates("participant_id", keep="last")
+    student_to_class = pd.Series(alloc_df["classroom_id"].to_numpy(), index=alloc_df["participant_id"].to_numpy())
 
-    # 3. Build the graph (or get it from your pipeline)
-    graph = construct_graph(db)
+    # 2. Build the graph (or reuse the snapshot shared with the pipeline routes)
+    graph = load_social_graph(db)
 
-    # 4. Prepare relationship type mapping (consistent with construct_graph)
+    # 3. Prepare relationship type mapping (consistent with construct_graph)
     EDGE_TYPE_MAP =  {
         "friends": 0,
         "influential": 1,
@@ -44,29 +59,10 @@ def relationship_counts_per_class():
         "disrespect": 5
     }
 
-    EDGE_TYPE_LABELS = {v: k for k, v in EDGE_TYPE_MAP.items()}
-    REL_TYPES = list(EDGE_TYPE_MAP.keys())
-
-    # 5. Count relationships per class
-    class_rel_counts = defaultdict(lambda: defaultdict(int))
-    # For isolation: track students in each class and their in-class friends
-    class_students = defaultdict(set)
-    in_class_friends = defaultdict(lambda: defaultdict(set))  # class_id -> student -> set(friend)
-
-    for u, v, d in graph.edges(data=True):
-        rel_type = d.get("edge_type")
-        rel_name = EDGE_TYPE_LABELS.get(rel_type, f"rel_{rel_type}")
-        class_u = student_to_class.get(u)
-        class_v = student_to_class.get(v)
-        # Only count if both students are in the same class
-        if class_u is not None and class_u == class_v:
-            class_rel_counts[class_u][rel_name] += 1
-            class_students[class_u].add(u)
-            class_students[class_u].add(v)
-            # Track friends for isolation
-            if rel_type == EDGE_TYPE_MAP['friends']:
-                in_class_friends[class_u][u].add(v)
-                in_class_friends[class_u][v].add(u)
+    # 4. Count relationships per class in one pass over the edges; nodes
+    # without a classroom in this run get code -1 and never match
+    class_codes, class_ids = pd.factorize(student_to_class.reindex(graph.node_ids))
+    intra = intra_class_edges(graph.edge_index(), graph.edge_type, class_codes, friend_type=EDGE_TYPE_MAP["friends"])
 
     # Always include all relationship types, even if zero
     result = {
@@ -74,15 +70,14 @@ def relationship_counts_per_class():
         "relationship_counts": {},
     }
 
-    for class_id, rel_counts in sorted(class_rel_counts.items(), key=lambda x: int(x[0])):
+    class_stats = zip(intra["classes"].tolist(), intra["counts"].tolist(), intra["isolated"].tolist())
+    for code, rel_counts, isolated_count in sorted(class_stats, key=lambda x: int(class_ids[x[0]])):
+        # Classes without an in-class relationship are left out
+        if sum(rel_counts) == 0:
+            continue
         # Isolation: students with no in-class friends
-        students = class_students[class_id]
-        friends_map = in_class_friends[class_id]
-        isolated_count = sum(1 for s in students if len(friends_map.get(s, set())) == 0)
-        result["relationship_counts"][str(class_id)] = {
-            **{rel: rel_counts.get(rel, 0) for rel in REL_TYPES},
+        result["relationship_counts"][str(class_ids[code])] = {
+            **{rel: rel_counts[rel_type] for rel, rel_type in EDGE_TYPE_MAP.items()},
             "isolation": isolated_count
         }
-
-    print(result)
-    return jsonify(result)
\ No newline at end of file
+    return result
\ No newline at end of file
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "CLASSFORGE_MODEL_CACHE_DIR", os.path.join(os.path.dirname(__file__), "data", "model_cache")
+)
+DEFAULT_MAX_ENTRIES = 16
+
+
+def graph_fingerprint(graph, hyperparameters):
+    """
+    Hashes the node features, edges, edge types and training hyperparameters,
+    so any change to the cohort graph or the model setup gives a new key.
+
+    Args:
+        graph (torch_geometric.data.Data): Graph with `x`, `edge_index` and `edge_type`.
+        hyperparameters (dict): JSON-serialisable model and training settings.
+
+    Returns:
+        str: Hex digest used as the cache key.
+    """
+    digest = hashlib.sha256()
+    for tensor in (graph.x, graph.edge_index, graph.edge_type):
+        tensor = tensor.detach().cpu().contiguous()
+        digest.update(str((tuple(tensor.shape), str(tensor.dtype))).encode())
+        digest.update(tensor.numpy().tobytes())
+    digest.update(json.dumps(hyperparameters, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    Disk-backed LRU cache of trained GNN state dicts and their final embeddings.
+
+    Entries are stored as one `<key>.pt` file each. The least recently used file
+    is deleted once more than `max_entries` are stored; file modification times
+    carry the recency across restarts.
+
+    Args:
+        cache_dir (str): Directory holding the cached entries.
+        max_entries (int): Maximum number of entries kept on disk.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        files = [name for name in os.listdir(cache_dir) if name.endswith(".pt")]
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(cache_dir, name)))
+        self._entries = OrderedDict((name[:-3], None) for name in files)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def get(self, key):
+        """
+        Returns {"state_dict": ..., "embeddings": np.ndarray} for `key`, or None on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                entry = torch.load(self._path(key), weights_only=False)
+            except (OSError, RuntimeError, EOFError):
+                # Unreadable or removed file: treat as a miss and forget it
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            os.utime(self._path(key))
+            self.hits += 1
+            return entry
+
+    def put(self, key, state_dict, embeddings):
+        """Stores a trained model and its embeddings, evicting the least recently used entries."""
+        with self._lock:
+            # Write to a temporary file first so readers never see a partial entry
+            tmp_path = self._path(key) + ".tmp"
+            torch.save({"state_dict": state_dict, "embeddings": embeddings}, tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                try:
+                    os.remove(self._path(evicted))
+                except FileNotFoundError:
+                    pass
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+_model_cache = None
+
+
+def get_model_cache():
+    """Process-wide cache shared by the allocation routes."""
+    global _model_cache
+    if _model_cache is None:
+        _model_cache = ModelCache()
+    return _model_cache
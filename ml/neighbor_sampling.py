@@ -0,0 +1,104 @@
+import torch
+
+# Neighbours sampled per hop, one entry per message-passing layer of
+# ImprovedClassForgeGNN (sage1, sage2, gat1, rgcn)
+DEFAULT_NUM_NEIGHBORS = (4, 3, 2, 2)
+
+
+class SampledBatch:
+    """
+    Sub-graph around a batch of seed nodes. The seeds are the first
+    `batch_size` entries of `n_id`, so their outputs are `out[:batch_size]`.
+    """
+
+    def __init__(self, n_id, edge_index, edge_ids, batch_size):
+        self.n_id = n_id
+        self.edge_index = edge_index
+        self.edge_ids = edge_ids
+        self.batch_size = batch_size
+
+    @property
+    def num_nodes(self):
+        return self.n_id.numel()
+
+
+class NeighborSampler:
+    """
+    Pure-torch neighbour sampler for mini-batch GNN training. For every seed it
+    samples up to `num_neighbors[h]` incoming edges at hop h (with replacement,
+    duplicates dropped), so the memory of one step depends on the batch size and
+    fan-out instead of the size of the whole graph.
+
+    PyG's NeighborLoader does the same but needs pyg-lib or torch-sparse, which
+    are not part of ml/requirements.txt.
+
+    Args:
+        edge_index (torch.Tensor): [2, num_edges] edges, messages flow source -> target.
+        num_nodes (int): Number of nodes in the graph.
+        num_neighbors (tuple[int]): Fan-out per hop.
+        batch_size (int): Seed nodes per batch.
+        shuffle (bool): Shuffle the seeds every epoch.
+        seed (int, optional): Random seed of the sampler.
+    """
+
+    def __init__(self, edge_index, num_nodes, num_neighbors=DEFAULT_NUM_NEIGHBORS, batch_size=512,
+                 shuffle=True, seed=None):
+        self.edge_index = edge_index
+        self.num_nodes = num_nodes
+        self.num_neighbors = tuple(num_neighbors)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.generator = torch.Generator()
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+        # CSR over targets: incoming edges of node v are perm[rowptr[v]:rowptr[v + 1]]
+        targets = edge_index[1]
+        self.perm = torch.argsort(targets, stable=True)
+        counts = torch.bincount(targets, minlength=num_nodes)
+        self.rowptr = torch.zeros(num_nodes + 1, dtype=torch.long)
+        self.rowptr[1:] = torch.cumsum(counts, dim=0)
+
+    def __len__(self):
+        return (self.num_nodes + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        order = (torch.randperm(self.num_nodes, generator=self.generator) if self.shuffle
+                 else torch.arange(self.num_nodes))
+        for start in range(0, self.num_nodes, self.batch_size):
+            yield self.sample(order[start:start + self.batch_size])
+
+    def sample(self, seeds):
+        """Samples the multi-hop neighbourhood of `seeds` and relabels it locally."""
+        node_mask = torch.zeros(self.num_nodes, dtype=torch.bool)
+        node_mask[seeds] = True
+        n_id = [seeds]
+        edge_ids = []
+        frontier = seeds
+
+        for fanout in self.num_neighbors:
+            if frontier.numel() == 0:
+                break
+            start = self.rowptr[frontier]
+            degree = self.rowptr[frontier + 1] - start
+            has_edges = degree > 0
+            start, degree = start[has_edges], degree[has_edges]
+            if start.numel() == 0:
+                break
+
+            offsets = (torch.rand(start.numel(), fanout, generator=self.generator) * degree[:, None]).long()
+            hop_edges = torch.unique(self.perm[(start[:, None] + offsets).flatten()])
+            edge_ids.append(hop_edges)
+
+            sources = torch.unique(self.edge_index[0, hop_edges])
+            frontier = sources[~node_mask[sources]]
+            node_mask[frontier] = True
+            n_id.append(frontier)
+
+        n_id = torch.cat(n_id)
+        edge_ids = torch.unique(torch.cat(edge_ids)) if edge_ids else torch.empty(0, dtype=torch.long)
+
+        local = torch.full((self.num_nodes,), -1, dtype=torch.long)
+        local[n_id] = torch.arange(n_id.numel())
+        edge_index = local[self.edge_index[:, edge_ids]]
+        return SampledBatch(n_id, edge_index, edge_ids, seeds.numel())
@@ -1,42 +1,38 @@
-from collections import defaultdict
+import numpy as np
+import pandas as pd
 from db.db_manager import get_db
+from .intra_class_edges import NUM_RELATIONS, intra_class_edges
+
+EDGE_TYPE = {
+    0: "friend",
+    1: "influence",
+    2: "feedback",
+    3: "more_time",
+    4: "advice",
+    5: "disrespect"
+}
+
+
+def relation_names(edge_types):
+    """Relationship name per edge type id, `rel_<id>` for unknown types."""
+    num_relations = max(NUM_RELATIONS, int(np.max(edge_types)) + 1 if len(edge_types) else 0)
+    names = np.array([EDGE_TYPE.get(rel_type, f"rel_{rel_type}") for rel_type in range(num_relations)], dtype=object)
+    return names[np.asarray(edge_types, dtype=np.int64)]
+
 
 def compute_preserved_relationships(db, clustered_data, run_number):
-    relation_counts_per_group = defaultdict(lambda: defaultdict(int))
-    EDGE_TYPE = {
-        0: "friend",
-        1: "influence",
-        2: "feedback",
-        3: "more_time",
-        4: "advice",
-        5: "disrespect"
-    }
-
-    edge_index = clustered_data.edge_index
-    edge_type = clustered_data.edge_type
-    cluster_labels = clustered_data.y
-
-    for i in range(edge_index.shape[1]):
-        src = edge_index[0, i].item()
-        dst = edge_index[1, i].item()
-        rel_type = edge_type[i].item()
-
-        group_src = cluster_labels[src].item()
-        group_dst = cluster_labels[dst].item()
-
-        if group_src == group_dst:
-            relation_name = EDGE_TYPE.get(rel_type, f"rel_{rel_type}")
-            relation_counts_per_group[group_src][relation_name] += 1
-
-    # Convert to DataFrame for easier analysis
-    import pandas as pd
-    group_summary = []
-    for group_id, relations in relation_counts_per_group.items():
-        row = {"Group ID": group_id}
-        row.update(relations)
-        group_summary.append(row)
-
-    realtionship_df = pd.DataFrame(group_summary).fillna(0).astype({"Group ID": int}).sort_values("Group ID")
+    intra = intra_class_edges(clustered_data.edge_index, clustered_data.edge_type, clustered_data.y)
+    if not intra["mask"].any():
+        print(f"No intra-classroom relationships found for run {run_number}")
+        return
+
+    # One row per group with intra-class edges, one column per relation that
+    # occurs inside a group (in order of first appearance)
+    counts = intra["counts"].numpy()
+    groups = counts.sum(axis=1) > 0
+    relations = pd.unique(intra["edge_type"].numpy())
+    realtionship_df = pd.DataFrame(counts[groups][:, relations], columns=relation_names(relations))
+    realtionship_df.insert(0, "Group ID", intra["classes"].numpy()[groups].astype(int))
     save_relationship_db(db, realtionship_df, run_number)
 
 
@@ -52,57 +48,28 @@ def save_edge_relationships_db(db, clustered_data, run_number, participant_ids):
         run_number: numeric run identifier
         participant_ids: List of participant IDs in node order
     """
-    import torch
-
-    EDGE_TYPE = {
-        0: "friend",
-        1: "influence",
-        2: "feedback",
-        3: "more_time",
-        4: "advice",
-        5: "disrespect"
-    }
-
-    edge_index = clustered_data.edge_index
-    edge_type = clustered_data.edge_type
-    cluster_labels = clustered_data.y
-
-    records = []
-
-    for i in range(edge_index.shape[1]):
-        src_idx = edge_index[0, i].item()
-        tgt_idx = edge_index[1, i].item()
-        rel_type_id = edge_type[i].item()
-        rel_type = EDGE_TYPE.get(rel_type_id, f"rel_{rel_type_id}")
-
-        group_src = cluster_labels[src_idx].item()
-        group_dst = cluster_labels[tgt_idx].item()
-
-        # Only save if both nodes are in the same class
-        if group_src == group_dst:
-            src_pid = participant_ids[src_idx]
-            tgt_pid = participant_ids[tgt_idx]
-
-            # Ensure native Python types
-            if isinstance(src_pid, torch.Tensor):
-                src_pid = src_pid.item()
-            if isinstance(tgt_pid, torch.Tensor):
-                tgt_pid = tgt_pid.item()
-
-            records.append((run_number, src_pid, tgt_pid, rel_type, group_src))
+    intra = intra_class_edges(clustered_data.edge_index, clustered_data.edge_type, clustered_data.y)
+
+    # Only edges with both nodes in the same class, as native Python types
+    participant_ids = np.asarray(participant_ids)
+    records = list(zip(
+        [run_number] * len(intra["source"]),
+        participant_ids[intra["source"].numpy()].tolist(),
+        participant_ids[intra["target"].numpy()].tolist(),
+        relation_names(intra["edge_type"].numpy()).tolist(),
+        intra["classroom"].tolist(),
+    ))
 
     if not records:
         print(f"No intra-classroom relationships found for run {run_number}")
         return
 
-    query = """
-        INSERT INTO public.edge_relationship (
-            run_number, source_id, target_id, relationship_type, classroom_id
-        ) VALUES (%s, %s, %s, %s, %s)
-    """
-
     with db:
-        db.execute_many(query, records)
+        db.bulk_insert(
+            "public.edge_relationship",
+            ["run_number", "source_id", "target_id", "relationship_type", "classroom_id"],
+            records,
+        )
            
     
 
@@ -135,15 +102,8 @@ def save_relationship_db(db, df, run_number):
     # Prepare and insert
     columns = list(df.columns)
     data = [tuple(row) for row in df.to_numpy()]
-    placeholders = ", ".join(["%s"] * len(columns))
-    col_str = ", ".join(columns)
-
-    query = f"""
-        INSERT INTO public.preserve_edge ({col_str})
-        VALUES ({placeholders})
-    """
 
     with db:
-        db.execute_many(query, data)
+        db.bulk_insert("public.preserve_edge", columns, data)
 
     print(f"Saved {len(data)} group-level relationship rows for run {run_number}")
@@ -0,0 +1,71 @@
+class SolverProfile:
+    """
+    CP-SAT search settings for the allocation solver.
+
+    Args:
+        name (str): Profile name reported in the solver statistics.
+        max_time_in_seconds (float): Wall-clock limit of one solve.
+        num_workers (int): Parallel search workers (0 keeps the CP-SAT default).
+        relative_gap_limit (float): Stop once (bound - objective) / objective is below this.
+        max_deterministic_time (float, optional): Limit in CP-SAT's deterministic time
+            units, which makes runs reproducible across machine load.
+    """
+
+    def __init__(self, name, max_time_in_seconds, num_workers, relative_gap_limit, max_deterministic_time=None):
+        self.name = name
+        self.max_time_in_seconds = max_time_in_seconds
+        self.num_workers = num_workers
+        self.relative_gap_limit = relative_gap_limit
+        self.max_deterministic_time = max_deterministic_time
+
+    def apply(self, parameters):
+        """Copies the profile onto a CpSolver's `parameters`."""
+        parameters.max_time_in_seconds = self.max_time_in_seconds
+        if self.num_workers:
+            parameters.num_workers = self.num_workers
+        parameters.relative_gap_limit = self.relative_gap_limit
+        if self.max_deterministic_time is not None:
+            parameters.max_deterministic_time = self.max_deterministic_time
+
+    def replace(self, **changes):
+        """Returns a copy of the profile with some settings changed."""
+        settings = self.to_dict()
+        settings.update(changes)
+        return SolverProfile(**settings)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "max_time_in_seconds": self.max_time_in_seconds,
+            "num_workers": self.num_workers,
+            "relative_gap_limit": self.relative_gap_limit,
+            "max_deterministic_time": self.max_deterministic_time,
+        }
+
+
+SOLVER_PROFILES = {
+    # Interactive use: stop at a 5% gap or after 15 seconds
+    "fast": SolverProfile("fast", max_time_in_seconds=15, num_workers=4, relative_gap_limit=0.05,
+                          max_deterministic_time=10),
+    # Default: the previous 60 second budget, stopping early at a 1% gap
+    "balanced": SolverProfile("balanced", max_time_in_seconds=60, num_workers=8, relative_gap_limit=0.01),
+    # Overnight or final allocations: search until proven optimal or 5 minutes
+    "thorough": SolverProfile("thorough", max_time_in_seconds=300, num_workers=16, relative_gap_limit=0.0),
+}
+
+DEFAULT_SOLVER_PROFILE = "balanced"
+
+
+def get_solver_profile(profile=None):
+    """
+    Resolves a profile name (or an existing SolverProfile) to a SolverProfile.
+
+    Raises:
+        ValueError: If the name is not one of SOLVER_PROFILES.
+    """
+    if isinstance(profile, SolverProfile):
+        return profile
+    name = profile or DEFAULT_SOLVER_PROFILE
+    if name not in SOLVER_PROFILES:
+        raise ValueError(f"Unknown solver profile '{name}'. Expected one of {tuple(SOLVER_PROFILES)}")
+    return SOLVER_PROFILES[name]
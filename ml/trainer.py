@@ -0,0 +1,112 @@
+import time
+
+
+class EarlyStoppingTrainer:
+    """
+    Training loop that stops once the loss plateaus or a wall-clock budget runs
+    out, and records how long every epoch took and how many nodes per second
+    were trained. Epochs are full-batch, or one optimizer step per mini-batch
+    when `batches` is given to `fit`.
+
+    Args:
+        max_epochs (int): Upper bound on the number of epochs.
+        patience (int): Epochs without an improvement of at least `min_delta`
+            before training stops.
+        min_delta (float): Smallest loss decrease counted as an improvement.
+        max_seconds (float, optional): Wall-clock budget for the whole loop.
+        log_every (int, optional): Print the loss every `log_every` epochs.
+    """
+
+    def __init__(self, max_epochs=200, patience=10, min_delta=1e-4, max_seconds=None, log_every=None):
+        self.max_epochs = max_epochs
+        self.patience = patience
+        self.min_delta = min_delta
+        self.max_seconds = max_seconds
+        self.log_every = log_every
+
+    def fit(self, model, optimizer, loss_fn, batches=None, num_nodes=None):
+        """
+        Trains `model` in place.
+
+        Args:
+            model (torch.nn.Module): Model to train.
+            optimizer (torch.optim.Optimizer): Optimizer over the model's parameters.
+            loss_fn (callable): Full-batch: called with the model and returns the loss of one
+                epoch. Mini-batch: called with the model and a batch, returns the batch loss.
+            batches (iterable, optional): Re-iterable source of batches with a `batch_size`
+                (seed nodes) and `num_nodes` (sampled nodes), e.g. a NeighborSampler.
+            num_nodes (int, optional): Nodes per full-batch epoch, for the throughput metrics.
+
+        Returns:
+            dict: Epochs run, why training stopped, best/final loss, per-epoch timings and
+            throughput in nodes per second.
+        """
+        model.train()
+        start = time.perf_counter()
+        best_loss = float("inf")
+        epochs_without_improvement = 0
+        epoch_times = []
+        loss_value = None
+        stop_reason = "max_epochs"
+        seed_nodes = sampled_nodes = 0
+
+        for epoch in range(self.max_epochs):
+            epoch_start = time.perf_counter()
+            if batches is None:
+                optimizer.zero_grad()
+                loss = loss_fn(model)
+                loss.backward()
+                optimizer.step()
+                loss_value = loss.item()
+                seed_nodes += num_nodes or 0
+                sampled_nodes += num_nodes or 0
+            else:
+                # Epoch loss is the seed-weighted mean of the batch losses
+                total_loss, total_seeds = 0.0, 0
+                for batch in batches:
+                    optimizer.zero_grad()
+                    loss = loss_fn(model, batch)
+                    loss.backward()
+                    optimizer.step()
+                    total_loss += loss.item() * batch.batch_size
+                    total_seeds += batch.batch_size
+                    sampled_nodes += batch.num_nodes
+                seed_nodes += total_seeds
+                loss_value = total_loss / max(total_seeds, 1)
+            epoch_times.append(time.perf_counter() - epoch_start)
+
+            if self.log_every and epoch % self.log_every == 0:
+                print(f"Epoch {epoch} | Loss: {loss_value:.4f} | {epoch_times[-1] * 1000:.1f} ms")
+
+            if loss_value < best_loss - self.min_delta:
+                best_loss = loss_value
+                epochs_without_improvement = 0
+            else:
+                epochs_without_improvement += 1
+                if epochs_without_improvement >= self.patience:
+                    stop_reason = "plateau"
+                    break
+
+            if self.max_seconds is not None and time.perf_counter() - start >= self.max_seconds:
+                stop_reason = "time_budget"
+                break
+
+        model.eval()
+        epochs_run = len(epoch_times)
+        train_time = time.perf_counter() - start
+        stats = {
+            "epochs_run": epochs_run,
+            "max_epochs": self.max_epochs,
+            "stop_reason": stop_reason,
+            "best_loss": best_loss,
+            "final_loss": loss_value,
+            "train_time": round(train_time, 4),
+            "mean_epoch_time": round(sum(epoch_times) / epochs_run, 6) if epochs_run else None,
+            "epoch_times": [round(t, 6) for t in epoch_times],
+            "mini_batch": batches is not None,
+            # Seed nodes trained per second, and nodes run through the model including sampled neighbours
+            "nodes_per_second": round(seed_nodes / train_time, 1) if seed_nodes else None,
+            "sampled_nodes_per_second": round(sampled_nodes / train_time, 1) if sampled_nodes else None,
+        }
+        print(f"Training stopped after {epochs_run} epochs ({stop_reason}), {stats['train_time']}s")
+        return stats
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the packages from the repository root (db, ml, backend)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from ml.allocation_solver import (
+    aggregate_edge_pairs,
+    allocation_objective,
+    class_size_bounds,
+    repair_class_sizes,
+    solve_integer_allocation,
+    solve_one_hot_allocation,
+)
+from ml.solver_profiles import SolverProfile
+
+# Small enough to be solved to optimality by every backend
+EXACT = SolverProfile("exact", max_time_in_seconds=60, num_workers=1, relative_gap_limit=0.0)
+
+
+def small_instance(num_students=12, num_clusters=3, num_edges=30, seed=0):
+    rng = random.Random(seed)
+    # Without self-loops: the per-edge models count them as a constant, aggregated pairs drop them
+    pairs = [rng.sample(range(num_students), 2) for _ in range(num_edges)]
+    edge_index = [[src for src, _ in pairs], [tgt for _, tgt in pairs]]
+    # Rewards and penalties, so both sides of the pair linearisation are exercised
+    coefficients = [rng.choice([2, 2, 2, -5]) for _ in range(num_edges)]
+    preferred = [rng.randrange(num_clusters) for _ in range(num_students)]
+    return num_students, num_clusters, preferred, edge_index, coefficients
+
+
+def test_class_size_bounds():
+    assert class_size_bounds(10, 3) == (3, 4)
+    assert class_size_bounds(9, 3) == (3, 3)
+
+
+def test_aggregate_edge_pairs_merges_reciprocal_edges():
+    edge_index = [[0, 1, 2, 2, 3], [1, 0, 2, 3, 2]]
+    assert aggregate_edge_pairs(edge_index, [2, 2, 2, 2, -2]) == {(0, 1): 4}
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("edge_encoding", ["aggregated", "per_edge"])
+def test_one_hot_matches_integer_backend(seed, edge_encoding):
+    instance = small_instance(seed=seed)
+    _, num_clusters, preferred, edge_index, coefficients = instance
+    pair_weights = aggregate_edge_pairs(edge_index, coefficients)
+
+    integer_labels, integer_stats = solve_integer_allocation(*instance, profile=EXACT)
+    one_hot_labels, one_hot_stats = solve_one_hot_allocation(*instance, profile=EXACT, edge_encoding=edge_encoding)
+
+    assert integer_stats["status"] == one_hot_stats["status"] == "OPTIMAL"
+    assert one_hot_stats["objective"] == integer_stats["objective"]
+    # The linearised pair indicators must not count pairs the allocation does not keep together
+    assert allocation_objective(one_hot_labels, preferred, pair_weights) == one_hot_stats["objective"]
+    assert allocation_objective(integer_labels, preferred, pair_weights) == integer_stats["objective"]
+
+    min_size, max_size = class_size_bounds(len(preferred), num_clusters)
+    sizes = [one_hot_labels.count(c) for c in range(1, num_clusters + 1)]
+    assert min_size <= min(sizes) and max(sizes) <= max_size
+
+
+def test_repair_class_sizes_balances_allocation():
+    labels = [1] * 8 + [2] * 2
+    moves = repair_class_sizes(labels, 3, [0] * 10, {})
+    assert sorted(labels.count(c) for c in (1, 2, 3)) == [3, 3, 4]
+    assert moves == 4
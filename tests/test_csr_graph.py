@@ -0,0 +1,74 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from ml.model_2.csr_graph import NODE_FEATURES, CSRGraph
+
+
+def digraph_from_frames(participants, relationships):
+    """The DiGraph construct_graph used to build, node by node and edge by edge."""
+    graph = nx.DiGraph()
+    for _, row in participants.iterrows():
+        graph.add_node(row["participant_id"], **{key: row[key] for key in NODE_FEATURES})
+    for _, row in relationships.iterrows():
+        graph.add_edge(row["source"], row["target"], edge_type=row["edge_type"])
+    return graph
+
+
+def random_frames(num_participants=40, num_edges=300, seed=0):
+    rng = np.random.default_rng(seed)
+    # Repeated participants keep their last row; relationships also reach ids without a participant row
+    ids = rng.choice(np.arange(1000, 1000 + num_participants), num_participants + 5)
+    participants = pd.DataFrame({
+        "participant_id": ids,
+        "perc_academic": rng.integers(0, 100, len(ids)).astype(str),
+        "perc_effort": rng.random(len(ids)),
+        "attendance": rng.random(len(ids)),
+    })
+    endpoints = np.arange(1000, 1000 + num_participants + 10)
+    relationships = pd.DataFrame({
+        "source": rng.choice(endpoints, num_edges),
+        "target": rng.choice(endpoints, num_edges),
+        "edge_type": rng.integers(0, 6, num_edges),
+    }).sort_values("edge_type", kind="stable")
+    return participants, relationships
+
+
+def test_node_and_edge_order_match_digraph():
+    participants, relationships = random_frames()
+    graph = CSRGraph.from_frames(participants, relationships)
+    expected = digraph_from_frames(participants, relationships)
+
+    assert graph.node_ids.tolist() == list(expected.nodes)
+    sources, targets, edge_type = graph.edge_list()
+    assert list(zip(sources.tolist(), targets.tolist(), edge_type.tolist())) == \
+        [(u, v, t) for u, v, t in expected.edges(data="edge_type")]
+    assert graph.number_of_nodes() == expected.number_of_nodes()
+    assert graph.number_of_edges() == expected.number_of_edges()
+
+
+def test_to_networkx_matches_digraph():
+    participants, relationships = random_frames(seed=1)
+    graph = CSRGraph.from_frames(participants, relationships).to_networkx()
+    expected = digraph_from_frames(participants, relationships)
+
+    assert list(graph.nodes(data=True)) == list(expected.nodes(data=True))
+    assert list(graph.edges(data=True)) == list(expected.edges(data=True))
+
+
+def test_relationships_with_missing_endpoints_are_dropped():
+    participants = pd.DataFrame({"participant_id": [1, 2], "perc_academic": [1, 2], "perc_effort": [1, 2],
+                                 "attendance": [1, 2]})
+    relationships = pd.DataFrame({"source": [1, None, 2], "target": [2, 1, None], "edge_type": [0, 1, 2]})
+    graph = CSRGraph.from_frames(participants, relationships)
+    assert graph.edge_index().tolist() == [[0], [1]]
+
+
+def test_arrays_round_trip():
+    participants, relationships = random_frames(seed=2)
+    graph = CSRGraph.from_frames(participants, relationships)
+    restored = CSRGraph.from_arrays(graph.to_arrays())
+    for name in ("node_ids", "indptr", "indices", "edge_type"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(graph, name))
+    assert restored.node_features.tolist() == graph.node_features.tolist()
+    assert restored.num_participants == graph.num_participants
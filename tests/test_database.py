@@ -0,0 +1,161 @@
+import json
+import threading
+
+import numpy as np
+import psycopg2
+import pytest
+
+from db import database
+from db.database import Database, _copy_value
+
+
+class FakeCursor:
+    """Records statements and COPY input; COPY (or every write) can be made to fail."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, data=None):
+        query = query.decode() if isinstance(query, bytes) else query
+        if self.connection.fail_writes and query.startswith("INSERT"):
+            raise psycopg2.Error("insert failed")
+        self.connection.statements.append(query)
+
+    def copy_expert(self, sql, buffer):
+        if self.connection.fail_copy:
+            raise psycopg2.Error("COPY rejected")
+        self.connection.statements.append(sql)
+        self.connection.copied.append(buffer.getvalue())
+
+    def mogrify(self, template, args):
+        return repr(tuple(args)).encode()
+
+
+class FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self, fail_copy=False, fail_writes=False):
+        self.closed = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.fail_copy = fail_copy
+        self.fail_writes = fail_writes
+        self.statements = []
+        self.copied = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.commits += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def unpooled_db(tmp_path, monkeypatch):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"database": {"user": "u", "password": "", "host": "h", "port": 5432, "dbname": "d"}}))
+    monkeypatch.delenv("CLASSFORGE_DB_POOL", raising=False)
+    monkeypatch.setattr(database.psycopg2, "connect", lambda **kwargs: FakeConnection())
+    Database._instance = None
+    yield Database(config_file=str(config))
+    Database._instance = None
+
+
+def test_threads_get_their_own_connection(unpooled_db):
+    unpooled_db.connect()
+    other = {}
+
+    def request():
+        unpooled_db.connect()
+        other["connection"] = unpooled_db.connection
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    thread.join()
+    assert other["connection"] is not unpooled_db.connection
+
+
+def test_end_request_leaves_other_requests_transactions_alone(unpooled_db):
+    opened, finished = threading.Event(), threading.Event()
+    seen = {}
+
+    def request_in_transaction():
+        unpooled_db.begin_request()
+        with unpooled_db.transaction():
+            seen["connection"] = unpooled_db.connection
+            seen["connection"].status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+            opened.set()
+            finished.wait(5)
+        unpooled_db.end_request()
+
+    thread = threading.Thread(target=request_in_transaction)
+    thread.start()
+    opened.wait(5)
+
+    # A read-only request ends on this thread while the other is mid-transaction
+    unpooled_db.begin_request()
+    unpooled_db.connect()
+    own = unpooled_db.connection
+    own.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    assert unpooled_db.end_request() == 1
+    assert own.rollbacks == 1 and own.closed
+    assert seen["connection"].rollbacks == 0
+
+    finished.set()
+    thread.join()
+    assert seen["connection"].commits == 1 and seen["connection"].rollbacks == 0
+
+
+def test_copy_value_escapes_text_format():
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(np.int64(7)) == "7"
+    assert _copy_value("a\tb\nc\rd\\e") == "a\\tb\\nc\\rd\\\\e"
+
+
+def test_bulk_insert_streams_rows_through_copy(unpooled_db):
+    unpooled_db.connect()
+    rows = [(1, "tab\there", None), (2, "back\\slash", "line\nbreak")]
+    assert unpooled_db.bulk_insert("public.t", ["id", "a", "b"], rows) == 2
+
+    connection = unpooled_db.connection
+    assert connection.statements == ["SAVEPOINT bulk_insert", "COPY public.t (id, a, b) FROM STDIN",
+                                     "RELEASE SAVEPOINT bulk_insert"]
+    assert connection.copied == ["1\ttab\\there\t\\N\n2\tback\\\\slash\tline\\nbreak\n"]
+    assert connection.commits == 1
+
+
+def test_bulk_insert_falls_back_to_execute_values(unpooled_db, monkeypatch):
+    monkeypatch.setattr(database.psycopg2, "connect", lambda **kwargs: FakeConnection(fail_copy=True))
+    unpooled_db.connect()
+    assert unpooled_db.bulk_insert("public.t", ["id", "a"], [(1, "x"), (2, None)]) == 2
+
+    statements = unpooled_db.connection.statements
+    assert statements[:2] == ["SAVEPOINT bulk_insert", "ROLLBACK TO SAVEPOINT bulk_insert"]
+    assert statements[2] == "INSERT INTO public.t (id, a) VALUES (1, 'x'),(2, None)"
+    assert statements[3] == "RELEASE SAVEPOINT bulk_insert"
+
+
+def test_bulk_insert_reports_a_failed_fallback(unpooled_db, monkeypatch):
+    monkeypatch.setattr(database.psycopg2, "connect",
+                        lambda **kwargs: FakeConnection(fail_copy=True, fail_writes=True))
+    unpooled_db.connect()
+    assert unpooled_db.bulk_insert("public.t", ["id"], [(1,)]) is None
+    assert unpooled_db.connection.commits == 0
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from flask import Flask
+from psycopg2 import Error
+
+from db.database import Database
+
+
+class FailingCursor:
+    """Accepts savepoints; every write fails like a rejected COPY/INSERT would."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, data=None):
+        if isinstance(query, str) and query.split()[0] in ("SAVEPOINT", "ROLLBACK", "RELEASE"):
+            return
+        raise Error("insert failed")
+
+    def copy_expert(self, sql, buffer):
+        raise Error("COPY failed")
+
+    def mogrify(self, template, args):
+        return b"()"
+
+    def fetchone(self):
+        return None
+
+
+class FailingConnection:
+    encoding = "UTF8"
+    closed = 0
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FailingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def failing_db(tmp_path, monkeypatch):
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"database": {"user": "u", "password": "", "host": "h", "port": 5432, "dbname": "d"}}))
+    monkeypatch.delenv("CLASSFORGE_DB_POOL", raising=False)
+    db = Database(config_file=str(config))
+    db.connection = FailingConnection()
+    yield db
+    # Database is a singleton; later tests get a fresh one
+    Database._instance = None
+
+
+def test_failed_insert_rolls_back_and_reports_no_run(failing_db, monkeypatch):
+    from db import db_usage
+
+    # Only the insert fails; the name lookup is not under test
+    monkeypatch.setattr(db_usage, "enrich_allocations_with_names", lambda db, allocations: allocations)
+
+    allocation = {"Allocations": {"Classroom_1": [1, 2]}, "Total_Classrooms": 1, "Total_Students": 2}
+    with Flask(__name__).app_context():
+        response, status = db_usage.fetch_student_dict_from_id(failing_db, allocation)
+
+    assert status == 500
+    assert "Run_Number" not in response.get_json()
+    assert failing_db.connection.rollbacks == 1
+    assert failing_db.connection.commits == 0
@@ -0,0 +1,77 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ml import decomposition_solver
+from ml.allocation_solver import aggregate_edge_pairs, allocation_objective, class_size_bounds
+from ml.decomposition_solver import block_class_sizes, partition_students, solve_decomposed_allocation
+from ml.solver_profiles import SolverProfile
+
+PROFILE = SolverProfile("test", max_time_in_seconds=10, num_workers=1, relative_gap_limit=0.0)
+
+
+def instance(num_students=30, num_clusters=3, num_edges=80, seed=0):
+    rng = random.Random(seed)
+    pairs = [rng.sample(range(num_students), 2) for _ in range(num_edges)]
+    edge_index = [[src for src, _ in pairs], [tgt for _, tgt in pairs]]
+    coefficients = [rng.choice([2, 2, -5]) for _ in range(num_edges)]
+    preferred = [rng.randrange(num_clusters) for _ in range(num_students)]
+    return num_students, num_clusters, preferred, edge_index, coefficients
+
+
+def test_block_class_sizes_keep_classrooms_balanced():
+    sizes_per_block = block_class_sizes([7, 5, 8], 3)
+    assert [sum(sizes) for sizes in sizes_per_block] == [7, 5, 8]
+    totals = np.sum(sizes_per_block, axis=0)
+    assert totals.max() - totals.min() <= 1
+
+
+def test_graph_partition_covers_every_student_once():
+    num_students, _, _, edge_index, coefficients = instance()
+    blocks = partition_students(num_students, 3, aggregate_edge_pairs(edge_index, coefficients), method="graph")
+    assert sorted(node for block in blocks for node in block) == list(range(num_students))
+
+
+def test_decomposed_allocation_is_balanced_and_scored_on_all_edges():
+    num_students, num_clusters, preferred, edge_index, coefficients = instance()
+    labels, stats = solve_decomposed_allocation(
+        num_students, num_clusters, preferred, edge_index, coefficients,
+        partition="graph", block_size=10, profile=PROFILE, max_processes=2,
+    )
+
+    min_size, max_size = class_size_bounds(num_students, num_clusters)
+    sizes = [labels.count(c) for c in range(1, num_clusters + 1)]
+    assert min_size <= min(sizes) and max(sizes) <= max_size
+    assert stats["status"] == "FEASIBLE"
+    assert stats["failed_blocks"] == 0
+    assert stats["num_blocks"] == 3
+    assert stats["objective"] == allocation_objective(labels, preferred, aggregate_edge_pairs(edge_index, coefficients))
+
+
+def test_failed_blocks_make_the_status_partial(monkeypatch):
+    # One in-process worker, so blocks are solved in order and the first one can be failed
+    monkeypatch.setattr(decomposition_solver, "ProcessPoolExecutor", ThreadPoolExecutor)
+    solve_block = decomposition_solver._solve_block
+    calls = []
+
+    def first_block_fails(task):
+        calls.append(task)
+        labels, stats = solve_block(task)
+        if len(calls) == 1:
+            return None, dict(stats, status="INFEASIBLE")
+        return labels, stats
+
+    monkeypatch.setattr(decomposition_solver, "_solve_block", first_block_fails)
+    num_students, num_clusters, preferred, edge_index, coefficients = instance()
+    labels, stats = solve_decomposed_allocation(
+        num_students, num_clusters, preferred, edge_index, coefficients,
+        partition="graph", block_size=10, profile=PROFILE, max_processes=1,
+    )
+
+    assert stats["status"] == "PARTIAL"
+    assert stats["failed_blocks"] == 1
+    assert stats["block_statuses"][0] == "INFEASIBLE"
+    assert all(status in ("OPTIMAL", "FEASIBLE") for status in stats["block_statuses"][1:])
+    min_size, max_size = class_size_bounds(num_students, num_clusters)
+    assert all(min_size <= labels.count(c) <= max_size for c in range(1, num_clusters + 1))
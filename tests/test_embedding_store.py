@@ -0,0 +1,23 @@
+from psycopg2.errors import UndefinedTable
+
+from ml.embedding_store import bump_raw_data_version
+
+
+class MissingVersionTableCursor:
+    """Cursor of a database where migration 4 has not run."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, data=None):
+        self.statements.append(query)
+        if query.startswith("UPDATE raw.data_version"):
+            raise UndefinedTable('relation "raw.data_version" does not exist')
+
+
+def test_bump_tolerates_missing_version_table():
+    cursor = MissingVersionTableCursor()
+    bump_raw_data_version(cursor)
+    assert cursor.statements[0] == "SAVEPOINT bump_raw_data_version"
+    assert cursor.statements[-2:] == ["ROLLBACK TO SAVEPOINT bump_raw_data_version",
+                                      "RELEASE SAVEPOINT bump_raw_data_version"]
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from backend.classforge_project.file_upload.file_handle import frame_to_csv_buffer
+
+
+def test_only_integer_columns_lose_the_decimal_point():
+    df = pd.DataFrame({
+        "participant_id": [1.0, np.nan, 3.0],
+        "score": [85.0, 70.0, np.nan],
+        "name": ["a", None, "c"],
+    })
+    buffer = frame_to_csv_buffer(df, integer_columns={"participant_id"})
+    assert buffer.getvalue().splitlines() == ["1,85.0,a", ",70.0,", "3,,c"]
+
+
+def test_without_integer_columns_values_are_unchanged():
+    df = pd.DataFrame({"cohort": [2025.0, 2026.0]})
+    assert frame_to_csv_buffer(df).getvalue().splitlines() == ["2025.0", "2026.0"]
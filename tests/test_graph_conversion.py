@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from ml.model_2.graph_conversion import preprocess_column
+
+
+@pytest.mark.parametrize("values", [["1", None], [1.5, None]])
+def test_preprocess_column_rejects_none(values):
+    with pytest.raises(ValueError, match="Node b has a non-numeric value for 'score': None") as error:
+        preprocess_column(values, ["a", "b"], "score")
+    assert error.value.position == 1
+
+
+def test_preprocess_column_reports_first_invalid_value():
+    with pytest.raises(ValueError, match="Node a has a non-numeric value for 'score': None"):
+        preprocess_column([None, "x"], ["a", "b"], "score")
+
+
+def test_preprocess_column_parses_mixed_values():
+    parsed = preprocess_column(["1", " 2 ", "3%", "NA", 4], list("abcde"), "score")
+    np.testing.assert_array_equal(parsed, [1.0, 2.0, 3.0, 0.0, 4.0])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml.graph_snapshot as graph_snapshot
+from ml.graph_snapshot import GraphSnapshotCache, load_social_graph
+from ml.model_2.csr_graph import CSRGraph
+
+
+def text_feature_graph(data_version=None):
+    participants = pd.DataFrame({
+        "participant_id": [101, 102, 103],
+        "perc_academic": ["85.0", "NA", None],
+        "perc_effort": ["70%", " 3 ", "4"],
+        "attendance": [0.9, 1.0, 0.5],
+    })
+    relationships = pd.DataFrame({"source": [101, 102, 103], "target": [102, 104, 101], "edge_type": [0, 1, 2]})
+    return CSRGraph.from_frames(participants, relationships, data_version=data_version)
+
+
+def feature_reprs(graph):
+    # Missing values are NaN, which never compares equal; repr also pins the value types
+    return [[repr(value) for value in row] for row in graph.node_features.tolist()]
+
+
+@pytest.fixture
+def snapshot_cache(tmp_path, monkeypatch):
+    cache = GraphSnapshotCache(str(tmp_path))
+    monkeypatch.setattr(graph_snapshot, "_snapshot_cache", cache)
+    monkeypatch.setattr(graph_snapshot, "raw_data_version", lambda db: "raw-7")
+    return cache
+
+
+def test_text_features_round_trip_through_arrays():
+    graph = text_feature_graph()
+    assert graph.node_features.dtype == object
+
+    restored = CSRGraph.from_arrays(graph.to_arrays())
+    assert feature_reprs(restored) == feature_reprs(graph)
+    np.testing.assert_array_equal(restored.indices, graph.indices)
+
+
+def test_second_load_is_a_snapshot_hit(snapshot_cache, monkeypatch):
+    builds = []
+
+    def construct_graph(db, cohort=None, data_version=None):
+        builds.append(data_version)
+        return text_feature_graph(data_version)
+
+    monkeypatch.setattr(graph_snapshot, "construct_graph", construct_graph)
+
+    first = load_social_graph(db=None)
+    second = load_social_graph(db=None)
+
+    assert builds == ["raw-7"]
+    assert snapshot_cache.stats()["hits"] == 1
+    assert feature_reprs(second) == feature_reprs(first)
+    np.testing.assert_array_equal(second.node_ids, first.node_ids)
+    np.testing.assert_array_equal(second.edge_type, first.edge_type)
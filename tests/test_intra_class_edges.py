@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+import numpy as np
+import torch
+
+from ml.intra_class_edges import FRIEND_TYPE, intra_class_edges
+
+
+def loop_intra_class_edges(edge_index, edge_type, labels):
+    """The per-edge loop of relationship_counts_per_class the kernel replaced."""
+    counts = defaultdict(lambda: defaultdict(int))
+    edges = []
+    class_students = defaultdict(set)
+    in_class_friends = defaultdict(lambda: defaultdict(set))
+    for src, dst, rel_type in zip(*edge_index.tolist(), edge_type.tolist()):
+        class_src, class_dst = labels[src], labels[dst]
+        if class_src >= 0 and class_src == class_dst:
+            counts[class_src][rel_type] += 1
+            edges.append((src, dst, rel_type, class_src))
+            class_students[class_src].update((src, dst))
+            if rel_type == FRIEND_TYPE:
+                in_class_friends[class_src][src].add(dst)
+                in_class_friends[class_src][dst].add(src)
+    isolated = {
+        class_id: sum(1 for s in students if not in_class_friends[class_id].get(s))
+        for class_id, students in class_students.items()
+    }
+    return counts, edges, isolated
+
+
+def test_matches_per_edge_loop():
+    rng = np.random.default_rng(0)
+    num_nodes, num_edges = 60, 400
+    edge_index = rng.integers(0, num_nodes, (2, num_edges))
+    edge_type = rng.integers(0, 6, num_edges)
+    # Four classrooms with gaps in the labels, plus students without one
+    labels = rng.choice([-1, 2, 5, 7, 11], num_nodes)
+
+    intra = intra_class_edges(edge_index, edge_type, labels)
+    counts, edges, isolated = loop_intra_class_edges(edge_index, edge_type, labels)
+
+    classes = intra["classes"].tolist()
+    assert classes == [2, 5, 7, 11]
+    for row, class_id in enumerate(classes):
+        assert intra["counts"][row].tolist() == [counts[class_id][rel_type] for rel_type in range(6)]
+        assert intra["isolated"][row].item() == isolated.get(class_id, 0)
+    assert list(zip(intra["source"].tolist(), intra["target"].tolist(), intra["edge_type"].tolist(),
+                    intra["classroom"].tolist())) == edges
+    assert intra["totals"].tolist() == np.bincount(edge_type, minlength=6).tolist()
+
+
+def test_friendship_flag_and_unknown_relation_types():
+    edge_index = torch.tensor([[0, 1, 2], [1, 3, 0]])
+    intra = intra_class_edges(edge_index, torch.tensor([0, 7, 3]), [1, 1, 2, 2])
+
+    assert intra["mask"].tolist() == [True, False, False]
+    assert intra["counts"].shape == (2, 8)
+    assert intra["has_friend"].tolist() == [True, True, False, False]
+
+
+def test_no_edges():
+    intra = intra_class_edges(np.zeros((2, 0), dtype=np.int64), np.zeros(0, dtype=np.int64), [0, 1])
+    assert intra["counts"].sum().item() == 0
+    assert intra["isolated"].tolist() == [0, 0]
@@ -0,0 +1,83 @@
+import random
+
+import torch
+from torch_geometric.data import Data
+
+from ml.allocation_solver import aggregate_edge_pairs, edge_coefficients
+from ml.local_search import DEFAULT_RELATION_WEIGHTS, LocalSearchRefiner, refine_allocation_result
+
+
+def random_instance(num_students=40, num_clusters=4, num_edges=160, seed=0):
+    rng = random.Random(seed)
+    edge_index = [[rng.randrange(num_students) for _ in range(num_edges)],
+                  [rng.randrange(num_students) for _ in range(num_edges)]]
+    edge_type = [rng.randrange(6) for _ in range(num_edges)]
+    pair_weights = aggregate_edge_pairs(edge_index, edge_coefficients(edge_type, DEFAULT_RELATION_WEIGHTS))
+    labels = [i % num_clusters + 1 for i in range(num_students)]
+    rng.shuffle(labels)
+    preferred = [rng.randrange(num_clusters) for _ in range(num_students)]
+    return labels, num_clusters, pair_weights, preferred
+
+
+def recomputed_objective(refiner, changes):
+    """Full objective of the refiner's allocation with `changes` ({student: 0-indexed class}) applied."""
+    labels = list(refiner.labels)
+    for i, target in changes.items():
+        labels[i] = target
+    score = sum(weight for (src, tgt), weight in refiner.pair_weights.items() if labels[src] == labels[tgt])
+    return score + sum(1 for label, preferred in zip(labels, refiner.preferred) if label == preferred)
+
+
+def test_swap_delta_matches_full_recomputation():
+    refiner = LocalSearchRefiner(*random_instance())
+    rng = random.Random(1)
+    for _ in range(300):
+        i, j = rng.sample(range(refiner.num_students), 2)
+        a, b = refiner.labels[i], refiner.labels[j]
+        expected = recomputed_objective(refiner, {i: b, j: a}) - refiner.objective()
+        assert refiner.swap_delta(i, j) == expected
+
+
+def test_move_delta_matches_full_recomputation():
+    refiner = LocalSearchRefiner(*random_instance(seed=2))
+    rng = random.Random(3)
+    for _ in range(300):
+        i, target = rng.randrange(refiner.num_students), rng.randrange(refiner.num_clusters)
+        expected = recomputed_objective(refiner, {i: target}) - refiner.objective()
+        assert refiner.move_delta(i, target) == expected
+
+
+def test_incremental_score_tracks_applied_moves_and_swaps():
+    refiner = LocalSearchRefiner(*random_instance(seed=4))
+    rng = random.Random(5)
+    for step in range(200):
+        if step % 2:
+            refiner.apply_swap(*rng.sample(range(refiner.num_students), 2))
+        else:
+            refiner.apply_move(rng.randrange(refiner.num_students), rng.randrange(refiner.num_clusters))
+        assert refiner.score == refiner.objective()
+        assert [len(members) for members in refiner.members] == refiner.sizes
+
+
+def test_run_improves_within_size_bounds():
+    refiner = LocalSearchRefiner(*random_instance(seed=6))
+    initial = refiner.objective()
+    labels, stats = refiner.run(time_budget=0.2)
+
+    sizes = [labels.count(c) for c in range(1, refiner.num_clusters + 1)]
+    assert refiner.min_size <= min(sizes) and max(sizes) <= refiner.max_size
+    assert stats["initial_objective"] == initial
+    assert stats["objective"] >= initial
+    assert recomputed_objective(refiner, {i: label - 1 for i, label in enumerate(labels)}) == stats["objective"]
+
+
+def test_refine_allocation_result_keeps_unallocated_students_out():
+    data = Data(edge_index=torch.tensor([[0, 1, 2, 3], [1, 2, 3, 0]]), edge_type=torch.tensor([0, 0, 0, 5]))
+    data.student_ids = [10, 11, 12, 13]
+    result = {"Allocations": {"Classroom_1": [10, 12], "Classroom_2": [11]}}
+
+    refine_allocation_result(result, data, time_budget=0.05)
+
+    allocated = sorted(sid for students in result["Allocations"].values() for sid in students)
+    assert allocated == [10, 11, 12]
+    assert list(result["Allocations"]) == ["Classroom_1", "Classroom_2"]
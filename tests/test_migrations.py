@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+
+import pytest
+
+from db import migrations
+from db.migrations import SCHEMA_VERSION, ensure_run_partitions, migrate, partition_name
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, data=None):
+        self.db.statements.append((" ".join(query.split()), data))
+        if query.startswith("INSERT INTO public.schema_migrations"):
+            self.db.applied.append(data[0])
+
+
+class FakeDatabase:
+    """Records the DDL; tracks schema_migrations rows and which run tables are partitioned."""
+
+    def __init__(self, partitioned=False):
+        self.connection = self
+        self.partitioned = partitioned
+        self.statements = []
+        self.applied = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    @contextmanager
+    def transaction(self):
+        yield self
+
+    def fetch_one(self, query, data=None):
+        if "pg_partitioned_table" in query:
+            return (1,) if self.partitioned else None
+        if "schema_migrations" in query:
+            return (max(self.applied, default=0),)
+        raise AssertionError(f"Unexpected query: {query}")
+
+
+@pytest.fixture(autouse=True)
+def fresh_partition_cache(monkeypatch):
+    monkeypatch.setattr(migrations, "_partitioned", {})
+
+
+def test_ensure_run_partitions_is_idempotent():
+    db = FakeDatabase(partitioned=True)
+    ensure_run_partitions(db, "run-1")
+    first = list(db.statements)
+    ensure_run_partitions(db, "run-1")
+
+    assert db.statements == first * 2
+    assert first == [
+        (f"CREATE TABLE IF NOT EXISTS public.{partition_name(table, 'run-1')} "
+         f"PARTITION OF public.{table} FOR VALUES IN (%s)", ("run-1",))
+        for table in migrations.RUN_TABLES
+    ]
+
+
+def test_ensure_run_partitions_skips_unpartitioned_tables():
+    db = FakeDatabase(partitioned=False)
+    ensure_run_partitions(db, "run-1")
+    assert db.statements == []
+
+
+def test_partition_names_are_stable_identifiers():
+    name = partition_name("classroom_allocation", "3f2b'; DROP TABLE x; --")
+    assert name == partition_name("classroom_allocation", "3f2b'; DROP TABLE x; --")
+    assert name.startswith("classroom_allocation_r") and name.replace("_", "").isalnum()
+    assert partition_name("classroom_allocation", "run-2") != partition_name("classroom_allocation", "run-1")
+
+
+def test_migrate_applies_each_version_once():
+    db = FakeDatabase()
+    assert migrate(db) == list(range(1, SCHEMA_VERSION + 1))
+    statements = len(db.statements)
+
+    assert migrate(db) == []
+    assert db.applied == list(range(1, SCHEMA_VERSION + 1))
+    # The second run only makes sure the bookkeeping table exists
+    assert [query for query, _ in db.statements[statements:]] == [" ".join(migrations.MIGRATIONS_DDL.split())]
+
+
+def test_migrate_requires_a_connection():
+    db = FakeDatabase()
+    db.connection = None
+    with pytest.raises(RuntimeError, match="no database connection"):
+        migrate(db)
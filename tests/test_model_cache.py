@@ -0,0 +1,51 @@
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+from ml.model_cache import ModelCache, graph_fingerprint
+
+
+def small_graph():
+    return Data(x=torch.ones(3, 2), edge_index=torch.tensor([[0, 1], [1, 2]]), edge_type=torch.tensor([0, 1]))
+
+
+def test_fingerprint_changes_with_graph_and_hyperparameters():
+    graph = small_graph()
+    key = graph_fingerprint(graph, {"epochs": 10})
+    assert graph_fingerprint(small_graph(), {"epochs": 10}) == key
+    assert graph_fingerprint(graph, {"epochs": 20}) != key
+
+    graph.edge_type = torch.tensor([0, 2])
+    assert graph_fingerprint(graph, {"epochs": 10}) != key
+
+
+def test_round_trip_and_lru_eviction(tmp_path):
+    cache = ModelCache(str(tmp_path), max_entries=2)
+    embeddings = np.arange(6, dtype=np.float32).reshape(3, 2)
+    cache.put("a", {"w": torch.ones(2)}, embeddings)
+    cache.put("b", {"w": torch.zeros(2)}, embeddings)
+
+    entry = cache.get("a")
+    np.testing.assert_array_equal(entry["embeddings"], embeddings)
+    assert torch.equal(entry["state_dict"]["w"], torch.ones(2))
+
+    # "b" is now the least recently used entry
+    cache.put("c", {}, embeddings)
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert not (tmp_path / "b.pt").exists()
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 0.6667, "evictions": 1, "entries": 2,
+                             "max_entries": 2}
+
+
+def test_entries_survive_a_restart(tmp_path):
+    ModelCache(str(tmp_path)).put("a", {}, np.zeros((1, 1), dtype=np.float32))
+    assert ModelCache(str(tmp_path)).get("a") is not None
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    cache.put("a", {}, np.zeros((1, 1), dtype=np.float32))
+    (tmp_path / "a.pt").write_bytes(b"")
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,45 @@
+import torch
+
+from ml.neighbor_sampling import NeighborSampler
+
+
+def random_edges(num_nodes=50, num_edges=300, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randint(0, num_nodes, (2, num_edges), generator=generator)
+
+
+def test_sampled_edges_are_graph_edges_relabelled_locally():
+    edge_index = random_edges()
+    sampler = NeighborSampler(edge_index, 50, num_neighbors=(3, 2), batch_size=8, seed=1)
+    batch = sampler.sample(torch.tensor([4, 9, 17]))
+
+    assert batch.n_id[:batch.batch_size].tolist() == [4, 9, 17]
+    assert len(set(batch.n_id.tolist())) == batch.num_nodes
+    # Local edges map back to exactly the sampled global edges
+    assert torch.equal(batch.n_id[batch.edge_index], edge_index[:, batch.edge_ids])
+
+
+def test_fanout_bounds_first_hop():
+    edge_index = random_edges(seed=2)
+    sampler = NeighborSampler(edge_index, 50, num_neighbors=(2,), seed=3)
+    seeds = torch.arange(10)
+    batch = sampler.sample(seeds)
+
+    targets = edge_index[1, batch.edge_ids]
+    assert torch.isin(targets, seeds).all()
+    assert torch.bincount(targets, minlength=50).max() <= 2
+
+
+def test_large_fanout_keeps_every_incoming_edge():
+    edge_index = torch.tensor([[1, 2, 3, 4, 1], [0, 0, 0, 1, 2]])
+    sampler = NeighborSampler(edge_index, 5, num_neighbors=(50,), seed=0)
+    batch = sampler.sample(torch.tensor([0]))
+    assert sorted(batch.edge_ids.tolist()) == [0, 1, 2]
+    assert sorted(batch.n_id.tolist()) == [0, 1, 2, 3]
+
+
+def test_epoch_visits_every_node_once_as_seed():
+    sampler = NeighborSampler(random_edges(), 50, batch_size=16, seed=4)
+    seeds = torch.cat([batch.n_id[:batch.batch_size] for batch in sampler])
+    assert len(sampler) == 4
+    assert sorted(seeds.tolist()) == list(range(50))
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+from flask import Flask
+
+from db.database import Database
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The routes module connects through db_usage at import; no server is needed for these requests
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"database": {"user": "u", "password": "", "host": "h", "port": 5432, "dbname": "d"}}))
+    monkeypatch.delenv("CLASSFORGE_DB_POOL", raising=False)
+    Database(config_file=str(config))
+    from backend.app.routes.main import pipeline_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(pipeline_bp)
+    yield app.test_client()
+    Database._instance = None
+
+
+@pytest.mark.parametrize("route", ["/get_allocation", "/get_allocation_by_user_preference", "/run_model2"])
+@pytest.mark.parametrize("value", ["abc", "-1", "nan", "inf"])
+def test_invalid_refine_seconds_is_a_bad_request(client, route, value):
+    method = client.post if route == "/get_allocation_by_user_preference" else client.get
+    response = method(route, query_string={"refine_seconds": value}, json={})
+    assert response.status_code == 400
+    assert "refine_seconds" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("value, seconds", [(None, 0.0), ("", 0.0), ("0", 0.0), ("2.5", 2.5)])
+def test_parse_refine_seconds(client, value, seconds):
+    from backend.app.routes.main import parse_refine_seconds
+
+    assert parse_refine_seconds(value) == seconds